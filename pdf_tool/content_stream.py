@@ -0,0 +1,240 @@
+WHITESPACE = b"\x00\t\n\x0c\r "
+DELIMITERS = b"()<>[]{}/%"
+KEYWORD_OPERANDS = (b"true", b"false", b"null")
+
+# Operands of these operators keep extra precision: small errors in a matrix or
+# font size are magnified by everything drawn with it
+HIGH_PRECISION_OPERATORS = (b"cm", b"Tm", b"Tf")
+
+FILL_COLOR_OPERATORS = (b"g", b"rg", b"k")
+STROKE_COLOR_OPERATORS = (b"G", b"RG", b"K")
+
+# Operators that put marks on the page; everything else only sets up state
+PAINTING_OPERATORS = frozenset((b"S", b"s", b"f", b"F", b"f*", b"B", b"B*", b"b", b"b*", b"sh", b"Do",
+                                b"Tj", b"TJ", b"'", b'"'))
+
+
+class ContentStreamError(ValueError):
+    pass
+
+
+def _is_regular(byte):
+    return byte not in WHITESPACE and byte not in DELIMITERS
+
+
+def _read_literal_string(data, pos):
+    """Return the end index of the literal string starting at data[pos] == '('"""
+    depth = 0
+    length = len(data)
+    while pos < length:
+        char = data[pos]
+        if char == 0x5C:  # backslash escapes the next byte
+            pos += 2
+            continue
+        if char == 0x28:
+            depth += 1
+        elif char == 0x29:
+            depth -= 1
+            if depth == 0:
+                return pos + 1
+        pos += 1
+    raise ContentStreamError("Unterminated string")
+
+
+def _read_inline_image(data, pos):
+    """Return the end index of an inline image whose ID operator ends at pos"""
+    pos += 1  # single whitespace byte after ID
+    length = len(data)
+    while True:
+        end = data.find(b"EI", pos)
+        if end < 0:
+            raise ContentStreamError("Unterminated inline image")
+        before_ok = data[end - 1] in WHITESPACE
+        after_ok = end + 2 >= length or data[end + 2] in WHITESPACE
+        if before_ok and after_ok:
+            return end + 2
+        pos = end + 2
+
+
+def tokenize(data):
+    """
+    Yield (kind, token) pairs for a content stream. kind is one of
+    'number', 'name', 'string', 'delimiter', 'keyword' or 'inline' (a whole
+    BI ... ID ... EI inline image, kept verbatim). Comments are dropped.
+    """
+    pos = 0
+    length = len(data)
+    while pos < length:
+        char = data[pos]
+        if char in WHITESPACE:
+            pos += 1
+        elif char == 0x25:  # % comment
+            while pos < length and data[pos] not in b"\r\n":
+                pos += 1
+        elif char == 0x28:
+            end = _read_literal_string(data, pos)
+            yield "string", data[pos:end]
+            pos = end
+        elif char == 0x3C:
+            if data[pos + 1:pos + 2] == b"<":
+                yield "delimiter", b"<<"
+                pos += 2
+            else:
+                end = data.find(b">", pos)
+                if end < 0:
+                    raise ContentStreamError("Unterminated hex string")
+                yield "string", data[pos:end + 1]
+                pos = end + 1
+        elif char == 0x3E:
+            if data[pos + 1:pos + 2] != b">":
+                raise ContentStreamError("Unexpected '>'")
+            yield "delimiter", b">>"
+            pos += 2
+        elif char in b"[]{}":
+            yield "delimiter", data[pos:pos + 1]
+            pos += 1
+        elif char == 0x29:
+            raise ContentStreamError("Unexpected ')'")
+        else:
+            start = pos
+            pos += 1
+            while pos < length and _is_regular(data[pos]):
+                pos += 1
+            token = data[start:pos]
+            if char == 0x2F:
+                yield "name", token
+            elif token[0] in b"+-.0123456789":
+                yield "number", token
+            elif token == b"BI":
+                id_pos = data.find(b"ID", pos)
+                while id_pos >= 0 and not (data[id_pos - 1] in WHITESPACE and
+                                           (id_pos + 2 >= length or data[id_pos + 2] in WHITESPACE)):
+                    id_pos = data.find(b"ID", id_pos + 2)
+                if id_pos < 0:
+                    raise ContentStreamError("Inline image without ID")
+                pos = _read_inline_image(data, id_pos + 2)
+                yield "inline", data[start:pos]
+            else:
+                yield "keyword", token
+
+
+def parse_operations(data):
+    """Group tokens into (operands, operator) pairs; inline images have operands None"""
+    operands = []
+    depth = 0
+    for kind, token in tokenize(data):
+        if kind == "inline":
+            if operands:
+                raise ContentStreamError("Operands before inline image")
+            yield None, token
+        elif kind == "delimiter":
+            depth += 1 if token in (b"[", b"<<", b"{") else -1
+            operands.append((kind, token))
+        elif kind == "keyword" and depth == 0 and token not in KEYWORD_OPERANDS:
+            yield operands, token
+            operands = []
+        else:
+            operands.append((kind, token))
+    if operands:
+        raise ContentStreamError("Trailing operands without operator")
+
+
+def paints_anything(data):
+    """
+    False if a content stream draws nothing (empty, or only graphics state
+    changes); True as soon as a painting operator or inline image turns up,
+    and also when the stream cannot be parsed.
+    """
+    if not data.strip():
+        return False
+    try:
+        for operands, operator in parse_operations(data):
+            if operands is None or operator in PAINTING_OPERATORS:
+                return True
+    except ContentStreamError:
+        return True
+    return False
+
+
+def format_number(token, precision):
+    """Round a real number token to precision decimals in its shortest form"""
+    if b"." not in token:
+        return token
+    try:
+        value = round(float(token), precision)
+    except ValueError:
+        return token
+    text = f"{value:.{precision}f}".rstrip("0").rstrip(".")
+    if text in ("", "-0", "-"):
+        return b"0"
+    if text.startswith("0."):
+        text = text[1:]
+    elif text.startswith("-0."):
+        text = "-" + text[2:]
+    return text.encode()
+
+
+def _join(tokens):
+    """Join tokens, inserting a space only where two regular characters meet"""
+    out = bytearray()
+    for token in tokens:
+        if out and _is_regular(out[-1]) and _is_regular(token[0]):
+            out += b" "
+        out += token
+    return bytes(out)
+
+
+def optimize_content_stream(data, precision=3):
+    """
+    Minify a page content stream: round numbers, drop comments and whitespace,
+    and remove no-op operators (identity cm, empty q/Q pairs, and font, colour
+    or line-width settings that repeat the current graphics state).
+
+    The stream is returned unchanged if it cannot be parsed.
+    """
+    try:
+        return _optimize(data, precision)
+    except ContentStreamError:
+        return data
+
+
+def _optimize(data, precision):
+    state = {}
+    saved_states = []
+    output = []
+
+    for operands, operator in parse_operations(data):
+        if operands is None:
+            output.append(operator)
+            continue
+
+        digits = precision + 3 if operator in HIGH_PRECISION_OPERATORS else precision
+        tokens = [format_number(token, digits) if kind == "number" else token for kind, token in operands]
+        key = tuple(tokens)
+
+        if operator == b"q":
+            saved_states.append(dict(state))
+        elif operator == b"Q":
+            state = saved_states.pop() if saved_states else {}
+            if output and output[-1] == b"q":
+                output.pop()  # q immediately followed by Q does nothing
+                continue
+        elif operator == b"cm" and key == (b"1", b"0", b"0", b"1", b"0", b"0"):
+            continue
+        elif operator in (b"Tf", b"w") or operator in FILL_COLOR_OPERATORS or operator in STROKE_COLOR_OPERATORS:
+            slot = "fill" if operator in FILL_COLOR_OPERATORS else "stroke" if operator in STROKE_COLOR_OPERATORS else operator
+            if state.get(slot) == (operator, key):
+                continue
+            state[slot] = (operator, key)
+        elif operator in (b"cs", b"sc", b"scn"):
+            state.pop("fill", None)
+        elif operator in (b"CS", b"SC", b"SCN"):
+            state.pop("stroke", None)
+        elif operator == b"gs":
+            # An ExtGState may set the font or line width
+            state.pop(b"Tf", None)
+            state.pop(b"w", None)
+
+        output.append(_join(tokens + [operator]))
+
+    return b"\n".join(output)
@@ -1,24 +1,550 @@
+import hashlib
+import io
 import os
+import re
+import time
+import zlib
+from collections import defaultdict
 import fitz  # PyMuPDF
 
+from content_stream import optimize_content_stream
+from pdf_objects import add_stream_object, add_image_xobject, add_image_mask
+from worker_pool import imap_ordered, open_worker_document, worker_document
+
+# pikepdf (qpdf) is only needed for linearized output; MuPDF dropped linearisation support
+try:
+    import pikepdf
+    LINEARIZE_AVAILABLE = True
+except ImportError:
+    LINEARIZE_AVAILABLE = False
+
+# NumPy is only needed for mixed raster content (MRC) segmentation
+try:
+    import numpy as np
+    MRC_AVAILABLE = True
+except ImportError:
+    MRC_AVAILABLE = False
+
+# Pillow's libtiff writer provides CCITT G4 for MRC text masks; Flate is used without it
+try:
+    from PIL import Image
+    G4_AVAILABLE = True
+except ImportError:
+    G4_AVAILABLE = False
+
+# A scanned page is split into MRC layers only when its grey levels fall into two
+# well separated groups, dark ink on light paper; photos and gradients are left alone
+MRC_MIN_SEPARATION = 0.85  # share of the grey-level variance explained by the ink/paper split
+MRC_MIN_CONTRAST = 96      # grey levels between the mean ink and the mean paper
+MRC_MAX_INK = 0.35         # largest fraction of the page that may be ink
+# Ink whose colour stays this close (per channel) to its mean is painted in that one colour
+MRC_FLAT_COLOR_TOLERANCE = 24
 
 class PDFCompressor:
-    def __init__(self):
-        pass
+    def __init__(self, cache=None):
+        # Optional ResultCache serving repeat compressions of the same input
+        self.cache = cache
 
-    def compress_pdf(self, input_path, output_path):
+    def compress_pdf(self, input_path, output_path, object_streams=False, linearize=False,
+                     dedupe_images=True, mrc=False, optimize_content=False, workers=None):
         """
         Compress PDF by rewriting the document with garbage collection and object deflation.
         This reduces file size for many PDFs with unused objects or uncompressed streams.
+
+        object_streams packs objects into compressed object streams with an xref stream.
+        linearize writes "fast web view" output so viewers can show page 1 before the
+        whole file has downloaded (requires pikepdf).
+        dedupe_images collapses images with identical decoded pixels into one XObject.
+        mrc splits scanned text pages into a lossless text mask, the colours of the
+        text and a low-resolution background (requires numpy); pages are segmented
+        in `workers` processes.
+        optimize_content minifies page content streams and drops no-op operators,
+        also spread over `workers` processes.
         """
         try:
+            if linearize and not LINEARIZE_AVAILABLE:
+                raise ImportError("Linearized output needs the optional pikepdf package. Install with: pip install pikepdf")
+            if mrc and not MRC_AVAILABLE:
+                raise ImportError("MRC compression requires numpy. Install with: pip install numpy")
+
+            cache_key = None
+            if self.cache:
+                options = dict(object_streams=object_streams, linearize=linearize,
+                               dedupe_images=dedupe_images, mrc=mrc, optimize_content=optimize_content)
+                cache_key = self.cache.make_key(input_path, "compress_pdf", options)
+                if self.cache.fetch(cache_key, output_path):
+                    return True, f"✅ PDF compressed and saved to: {output_path} (cached result)"
+
             doc = fitz.open(input_path)
-            doc.save(output_path, garbage=4, deflate=True, clean=True)
-            doc.close()
-            return True, f"✅ PDF compressed and saved to: {output_path}"
+            mrc_pages = self.apply_mrc(doc, input_path, workers=workers) if mrc else 0
+            merged_images = self.collapse_duplicate_images(doc) if dedupe_images else 0
+            saved_content = self.optimize_content_streams(doc, workers=workers) if optimize_content else 0
+            save_options = dict(garbage=4, deflate=True, clean=True, use_objstms=int(object_streams))
+
+            if linearize:
+                # MuPDF can no longer linearize, so hand the compressed bytes to qpdf
+                data = doc.tobytes(**save_options)
+                doc.close()
+                self._save_linearized(data, output_path, object_streams)
+            else:
+                doc.save(output_path, **save_options)
+                doc.close()
+
+            if cache_key:
+                self.cache.store(cache_key, output_path)
+
+            message = f"✅ PDF compressed and saved to: {output_path}"
+            if mrc_pages:
+                message += f"\n🗂️ MRC applied to {mrc_pages} scanned page(s)"
+            if merged_images:
+                message += f"\n🖼️ Merged {merged_images} duplicate image(s)"
+            if saved_content:
+                message += f"\n✂️ Content streams reduced by {saved_content / 1024:.1f} KB"
+            return True, message
         except Exception as e:
             return False, f"❌ Compression failed: {str(e)}"
 
+    def compress_document(self, doc, object_streams=False, dedupe_images=True, optimize_content=False, workers=None):
+        """
+        Compress an already open document and return the resulting PDF bytes,
+        for callers (such as conversion pipelines) that never touch the disk.
+        Options match compress_pdf; MRC and linearization need a file and are
+        only available there.
+        """
+        if dedupe_images:
+            self.collapse_duplicate_images(doc)
+        if optimize_content:
+            self.optimize_content_streams(doc, workers=workers)
+        return doc.tobytes(garbage=4, deflate=True, clean=True, use_objstms=int(object_streams))
+
+    def _save_linearized(self, data, output_path, object_streams):
+        """Write already compressed PDF bytes as a linearized file"""
+        stream_mode = pikepdf.ObjectStreamMode.generate if object_streams else pikepdf.ObjectStreamMode.disable
+        with pikepdf.open(io.BytesIO(data)) as pdf:
+            pdf.save(output_path, linearize=True, object_stream_mode=stream_mode)
+
+    def apply_mrc(self, doc, input_path, dpi=300, background_scale=3, foreground_scale=6,
+                  jpeg_quality=50, workers=None):
+        """
+        Convert the scanned text pages of doc to mixed raster content (MRC) in place.
+
+        Scanned pages (images but no extractable text) are rendered at dpi; those
+        that look like ink on paper are split into a 1-bit text mask kept at full
+        resolution, the text colours downsampled by foreground_scale and a colour
+        background downsampled by background_scale, both stored as JPEG. Only the
+        page contents and resources are replaced, so metadata, outlines, links and
+        annotations stay. Photos, gradients and other pages are left unchanged.
+        Returns the number of pages converted.
+        """
+        # Placement of a full-page image, taken before any page is modified
+        placements = []
+        for page in doc:
+            rect = page.rect
+            to_content = ~(page.transformation_matrix * page.rotation_matrix)
+            placements.append((page.xref, fitz.Matrix(rect.width, 0, 0, -rect.height, rect.x0, rect.y1) * to_content))
+
+        tasks = [(i, dpi, background_scale, foreground_scale, jpeg_quality) for i in range(len(doc))]
+        layers = imap_ordered(_segment_mrc_page, tasks, workers, open_worker_document, (input_path,))
+
+        converted = 0
+        for (page_xref, matrix), layer in zip(placements, layers):
+            if layer is not None:
+                self._replace_with_mrc_layers(doc, page_xref, matrix, layer)
+                converted += 1
+        return converted
+
+    def _replace_with_mrc_layers(self, doc, page_xref, matrix, layer):
+        """Make a page paint the background and then the text mask, in the text colours, over it"""
+        bg_width, bg_height = layer["background_size"]
+        background = add_image_xobject(doc, layer["background"], bg_width, bg_height,
+                                       "/DCTDecode", "/DeviceRGB")
+        mask_width, mask_height = layer["mask_size"]
+        mask = add_image_mask(doc, layer["mask"], mask_width, mask_height, layer["mask_filter"],
+                              layer["mask_parms"], layer["mask_paint_ones"])
+
+        placement = " ".join(f"{value:.4f}" for value in matrix) + " cm"
+        if layer["foreground"] is None:
+            r, g, b = layer["text_color"]
+            xobjects = f"/MRCBg {background} 0 R/MRCMask {mask} 0 R"
+            text = f"{r:.3f} {g:.3f} {b:.3f} rg {placement} /MRCMask Do"
+        else:
+            # The colour layer is painted through the text mask
+            fg_width, fg_height = layer["foreground_size"]
+            foreground = add_image_xobject(doc, layer["foreground"], fg_width, fg_height,
+                                           "/DCTDecode", "/DeviceRGB", extra=f"/Mask {mask} 0 R")
+            xobjects = f"/MRCBg {background} 0 R/MRCFg {foreground} 0 R"
+            text = f"{placement} /MRCFg Do"
+
+        contents = add_stream_object(doc, "", b"")
+        doc.update_stream(contents, f"q {placement} /MRCBg Do Q\nq {text} Q\n".encode())
+        doc.xref_set_key(page_xref, "Resources", f"<</XObject<<{xobjects}>>>>")
+        doc.xref_set_key(page_xref, "Contents", f"{contents} 0 R")
+
+    def optimize_content_streams(self, doc, precision=3, workers=None):
+        """
+        Rewrite every page's content streams through optimize_content_stream in a
+        worker pool. Pages sharing the same streams are rewritten once. The file
+        stores streams deflated, so a rewrite is only kept when its deflated size
+        is smaller than that of the original streams; a shorter stream can still
+        compress worse. Returns the number of deflated bytes saved.
+        """
+        pages_by_contents = defaultdict(list)
+        for page in doc:
+            contents = tuple(page.get_contents())
+            if contents:
+                pages_by_contents[contents].append(page.number)
+
+        groups = list(pages_by_contents.items())
+        tasks = [([doc.xref_stream(xref) for xref in contents], precision) for contents, _ in groups]
+        optimized = imap_ordered(_optimize_content_task, tasks, workers)
+
+        saved = 0
+        for (_, page_numbers), (data, original_size, optimized_size) in zip(groups, optimized):
+            if optimized_size >= original_size:
+                continue
+            xref = add_stream_object(doc, "", b"")
+            doc.update_stream(xref, data)
+            for page_number in page_numbers:
+                doc.xref_set_key(doc[page_number].xref, "Contents", f"{xref} 0 R")
+            saved += original_size - optimized_size
+        return saved
+
+    def collapse_duplicate_images(self, doc):
+        """
+        Repoint every reference to a duplicated image at one surviving XObject.
+
+        garbage=4 only merges byte-identical streams; this pass also merges the
+        same logo stored with different filters. Images are grouped by their
+        dictionary header, and within a group compared by their raw stream bytes
+        when they are all encoded the same way (the usual case for scans, where
+        every page image has the same size and filter). Pixels are decoded and
+        hashed only in groups mixing encodings, so the pass stays cheap enough
+        to run by default. Returns the number of images that were merged away.
+        """
+        candidates = defaultdict(list)
+        for xref in range(1, doc.xref_length()):
+            if doc.xref_get_key(xref, "Subtype") != ("name", "/Image"):
+                continue
+            header = tuple(doc.xref_get_key(xref, key)[1] for key in
+                           ("Width", "Height", "BitsPerComponent", "ColorSpace", "ImageMask", "Decode", "Mask"))
+            candidates[header].append(xref)
+
+        digests = {}
+
+        def encoding(xref):
+            return doc.xref_get_key(xref, "Filter")[1], doc.xref_get_key(xref, "DecodeParms")[1]
+
+        def raw_digest(xref):
+            if xref not in digests:
+                digest = hashlib.blake2b(doc.xref_stream_raw(xref) or b"", digest_size=20)
+                digest.update(repr(encoding(xref)).encode())
+                digests[xref] = digest.digest()
+            return digests[xref]
+
+        def pixel_digest(xref):
+            if xref not in digests:
+                try:
+                    pix = fitz.Pixmap(doc, xref)
+                    digest = hashlib.blake2b(pix.samples_mv, digest_size=20)
+                    digest.update(f"{pix.width}x{pix.height}x{pix.n}".encode())
+                    digests[xref] = digest.digest()
+                except Exception:
+                    # Undecodable images are never merged
+                    digests[xref] = ("unique", xref)
+            return digests[xref]
+
+        replacements = {}
+        for xrefs in candidates.values():
+            if len(xrefs) < 2:
+                continue
+            # Identically encoded images hold the same pixels exactly when their bytes match
+            image_digest = pixel_digest if len({encoding(xref) for xref in xrefs}) > 1 else raw_digest
+            survivors = {}
+            for xref in xrefs:
+                smask_type, smask = doc.xref_get_key(xref, "SMask")
+                smask_digest = image_digest(int(smask.split()[0])) if smask_type == "xref" else None
+                key = (image_digest(xref), smask_digest)
+                if key in survivors:
+                    replacements[xref] = survivors[key]
+                else:
+                    survivors[key] = xref
+
+        if replacements:
+            self._repoint_references(doc, replacements)
+        return len(replacements)
+
+    def _repoint_references(self, doc, replacements):
+        """
+        Rewrite indirect references in every object according to replacements.
+        Only the top-level keys holding such a reference are set again, so the
+        data of stream objects (forms, appearance streams) is left untouched.
+        """
+        reference = re.compile(r"\b(\d+) 0 R\b")
+
+        def substitute(match):
+            xref = int(match.group(1))
+            return f"{replacements.get(xref, xref)} 0 R"
+
+        for xref in range(1, doc.xref_length()):
+            if xref in replacements:
+                continue
+            source = doc.xref_object(xref, compressed=True)
+            if reference.sub(substitute, source) == source:
+                continue
+            if not source.startswith("<<"):
+                doc.update_object(xref, reference.sub(substitute, source))  # a bare array or reference
+                continue
+            for key in doc.xref_get_keys(xref):
+                kind, value = doc.xref_get_key(xref, key)
+                if kind in ("xref", "dict", "array"):
+                    updated = reference.sub(substitute, value)
+                    if updated != value:
+                        doc.xref_set_key(xref, key, updated)
+
+    def first_page_bytes(self, pdf_path):
+        """
+        Number of bytes a viewer must download before it can display page 1.
+        For linearized files this is the end of the first-page section (/E);
+        otherwise the xref sits at the end, so the whole file is needed.
+        """
+        file_size = os.path.getsize(pdf_path)
+        with open(pdf_path, "rb") as f:
+            head = f.read(1024)
+
+        if b"/Linearized" in head:
+            match = re.search(rb"/E\s+(\d+)", head)
+            if match:
+                return min(int(match.group(1)), file_size)
+        return file_size
+
+    def benchmark_compression(self, input_path, output_dir, bandwidth=125000):
+        """
+        Compress input_path with every packing/linearization combination and report
+        output size, save time and estimated first-page latency at the given
+        bandwidth (bytes per second, default ~1 Mbit/s).
+        """
+        base_name = os.path.splitext(os.path.basename(input_path))[0]
+        variants = [
+            ("plain", False, False),
+            ("object streams", True, False),
+        ]
+        if LINEARIZE_AVAILABLE:
+            variants += [
+                ("linearized", False, True),
+                ("object streams + linearized", True, True),
+            ]
+
+        results = []
+        for label, object_streams, linearize in variants:
+            suffix = label.replace(" + ", "_").replace(" ", "_")
+            output_path = os.path.join(output_dir, f"{base_name}_{suffix}.pdf")
+
+            start = time.perf_counter()
+            success, message = self.compress_pdf(input_path, output_path, object_streams, linearize)
+            elapsed = time.perf_counter() - start
+            if not success:
+                results.append({"variant": label, "error": message})
+                continue
+
+            first_page = self.first_page_bytes(output_path)
+            results.append({
+                "variant": label,
+                "size": os.path.getsize(output_path),
+                "save_seconds": elapsed,
+                "first_page_bytes": first_page,
+                "first_page_seconds": first_page / bandwidth,
+            })
+
+        return results
+
+
+def _optimize_content_task(task):
+    """Worker: return (optimized stream, deflated size of the originals, deflated size of the rewrite)"""
+    streams, precision = task
+    # Streams are joined with a newline so tokens at the boundaries stay apart
+    data = optimize_content_stream(b"\n".join(streams), precision)
+    original_size = sum(len(zlib.compress(stream)) for stream in streams)
+    return data, original_size, len(zlib.compress(data))
+
+
+def _segment_mrc_page(task):
+    """Worker: render one page and split it into MRC layers, or None to keep it as is"""
+    page_index, dpi, background_scale, foreground_scale, jpeg_quality = task
+    page = worker_document()[page_index]
+
+    # Vector and text pages gain nothing from being rasterised
+    if page.get_text("text").strip() or not page.get_images():
+        return None
+
+    # Annotations stay on the page, so they must not be burnt into the layers
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csRGB, alpha=False, annots=False)
+    rgb = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.stride)
+    rgb = rgb[:, :pix.width * 3].reshape(pix.height, pix.width, 3)
+
+    text_mask = _text_mask(rgb)
+    if text_mask is None:
+        return None
+    background = _background_layer(rgb, text_mask, background_scale)
+    foreground, text_color = _foreground_layer(rgb, text_mask, foreground_scale)
+
+    mask_filter, mask_parms, mask_data, paint_ones = _encode_bilevel(text_mask)
+
+    return {
+        "background": _encode_jpeg(background, jpeg_quality),
+        "background_size": (background.shape[1], background.shape[0]),
+        "foreground": None if foreground is None else _encode_jpeg(foreground, jpeg_quality),
+        "foreground_size": None if foreground is None else (foreground.shape[1], foreground.shape[0]),
+        "text_color": text_color,
+        "mask": mask_data,
+        "mask_size": (pix.width, pix.height),
+        "mask_filter": mask_filter,
+        "mask_parms": mask_parms,
+        "mask_paint_ones": paint_ones,
+    }
+
+
+def _text_mask(rgb):
+    """
+    Foreground (text) pixels: luminance below the page's Otsu threshold. None
+    when the page is not ink on paper, i.e. the threshold does not split the
+    grey levels into two well separated groups with little ink.
+    """
+    gray = (rgb @ np.array([77, 150, 29], dtype=np.uint16)) >> 8
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    levels = np.arange(256)
+
+    weight_low = np.cumsum(hist)
+    weight_high = weight_low[-1] - weight_low
+    cumulative = np.cumsum(hist * levels)
+    mean_low = cumulative / np.maximum(weight_low, 1)
+    mean_high = (cumulative[-1] - cumulative) / np.maximum(weight_high, 1)
+    between = weight_low * weight_high * (mean_low - mean_high) ** 2
+    threshold = int(np.argmax(between))
+
+    # between is the between-class variance scaled by the pixel count squared
+    total = gray.size ** 2 * gray.var()
+    separation = between[threshold] / total if total else 0.0
+    ink = weight_low[threshold] / gray.size
+    if (separation < MRC_MIN_SEPARATION or ink > MRC_MAX_INK
+            or mean_high[threshold] - mean_low[threshold] < MRC_MIN_CONTRAST):
+        return None
+    return gray <= threshold
+
+
+def _dilate(mask):
+    grown = mask.copy()
+    grown[1:] |= mask[:-1]
+    grown[:-1] |= mask[1:]
+    grown[:, 1:] |= mask[:, :-1]
+    grown[:, :-1] |= mask[:, 1:]
+    return grown
+
+
+def _block_means(rgb, keep, scale):
+    """Mean colour of the kept pixels in each scale x scale block, with the kept pixel counts"""
+    height, width = keep.shape
+    rows, cols = -(-height // scale), -(-width // scale)
+    pad = ((0, rows * scale - height), (0, cols * scale - width))
+
+    keep = np.pad(keep, pad)
+    pixels = np.where(keep[..., None], np.pad(rgb, pad + ((0, 0),), mode="edge"), 0)
+    sums = pixels.reshape(rows, scale, cols, scale, 3).sum(axis=(1, 3), dtype=np.uint32)
+    counts = keep.reshape(rows, scale, cols, scale).sum(axis=(1, 3))
+    return sums / np.maximum(counts, 1)[..., None], counts
+
+
+def _background_layer(rgb, text_mask, scale):
+    """
+    Downsample the page by scale, averaging only non-text pixels in each block
+    so text does not bleed into the background. The mask is grown by one pixel
+    to also drop anti-aliased text edges.
+    """
+    means, counts = _block_means(rgb, ~_dilate(text_mask), scale)
+    fill = (means * counts[..., None]).sum(axis=(0, 1)) / counts.sum() if counts.any() else np.full(3, 255.0)
+
+    background = np.where(counts[..., None] > 0, means, fill)
+    return np.ascontiguousarray(background.round().astype(np.uint8))
+
+
+def _foreground_layer(rgb, text_mask, scale):
+    """
+    Colours of the text, as (layer, None) with the mean colour of the text in
+    each scale x scale block, or (None, colour) when all text has about one
+    colour and can be painted flat. Blocks mostly covered by text decide;
+    anti-aliased edges alone would make black text look grey. Blocks without
+    text take the colour of the text nearby so JPEG ringing stays out of it.
+    """
+    means, counts = _block_means(rgb, text_mask, scale)
+    if not counts.any():
+        return None, (0.0, 0.0, 0.0)
+
+    solid = counts >= scale * scale // 4
+    if not solid.any():
+        solid = counts > 0
+    weights = counts * solid
+    color = (means * weights[..., None]).sum(axis=(0, 1)) / weights.sum()
+    if np.abs(means[solid] - color).max() <= MRC_FLAT_COLOR_TOLERANCE:
+        return None, tuple(float(c) / 255 for c in color)
+
+    layer = _fill_empty_blocks(means, solid)
+    return np.ascontiguousarray(layer.round().astype(np.uint8)), None
+
+
+def _fill_empty_blocks(colors, known):
+    """
+    Keep colors where known and give every other block the mean colour of
+    the known blocks nearby, by averaging down a 2x2 pyramid until every cell
+    has a known block and filling the gaps back up from the coarser levels.
+    Linear in the number of blocks, however far a block is from the text.
+    """
+    sums = np.where(known[..., None], colors, 0.0)
+    counts = known.astype(np.float64)
+    levels = [(sums, counts)]
+    while not counts.all() and counts.size > 1:
+        rows, cols = counts.shape
+        pad = ((0, rows % 2), (0, cols % 2))
+        counts = np.pad(counts, pad).reshape(-(-rows // 2), 2, -(-cols // 2), 2).sum(axis=(1, 3))
+        sums = np.pad(sums, pad + ((0, 0),)).reshape(counts.shape[0], 2, counts.shape[1], 2, 3).sum(axis=(1, 3))
+        levels.append((sums, counts))
+
+    filled = sums / np.maximum(counts, 1e-9)[..., None]
+    for sums, counts in reversed(levels[:-1]):
+        rows, cols = counts.shape
+        coarse = filled.repeat(2, axis=0).repeat(2, axis=1)[:rows, :cols]
+        filled = np.where(counts[..., None] > 0, sums / np.maximum(counts, 1e-9)[..., None], coarse)
+    return filled
+
+
+def _encode_jpeg(pixels, quality):
+    height, width = pixels.shape[:2]
+    pix = fitz.Pixmap(fitz.csRGB, width, height, pixels.tobytes(), False)
+    return pix.tobytes("jpg", jpg_quality=quality)
+
+
+def _encode_bilevel(mask):
+    """
+    Losslessly encode a boolean text mask as (filter, decode_parms, data, paint_ones).
+    CCITT G4 via Pillow/libtiff when available, otherwise packed 1-bit rows with Flate.
+    """
+    height, width = mask.shape
+    if G4_AVAILABLE:
+        try:
+            buffer = io.BytesIO()
+            # Mode "1": text is 0 (black); one strip so the G4 data is a single stream
+            Image.fromarray(~mask).save(buffer, "TIFF", compression="group4", tiffinfo={278: height})
+            with Image.open(io.BytesIO(buffer.getvalue())) as tiff:
+                offsets, counts = tiff.tag_v2[273], tiff.tag_v2[279]
+                photometric = tiff.tag_v2.get(262)
+            if len(offsets) == 1 and photometric == 1:
+                data = buffer.getvalue()[offsets[0]:offsets[0] + counts[0]]
+                parms = f"/K -1/Columns {width}/Rows {height}/BlackIs1 true"
+                return "/CCITTFaxDecode", parms, data, False
+        except Exception:
+            pass  # e.g. Pillow built without libtiff
+
+    data = zlib.compress(np.packbits(mask, axis=1).tobytes(), 9)
+    return "/FlateDecode", None, data, True
+
 
 def get_input_file():
     while True:
@@ -51,6 +577,10 @@ def get_output_filename():
     return f"{name}.pdf" if name else "compressed_output.pdf"
 
 
+def ask_yes_no(prompt):
+    return input(f"{prompt} (y/n): ").strip().lower() in ("y", "yes")
+
+
 def main():
     compressor = PDFCompressor()
     input_file = get_input_file()
@@ -58,10 +588,16 @@ def main():
     output_filename = get_output_filename()
     output_path = os.path.join(output_dir, output_filename)
 
+    object_streams = ask_yes_no("Pack objects into compressed object streams?")
+    linearize = LINEARIZE_AVAILABLE and ask_yes_no("Linearize for fast web view?")
+    mrc = MRC_AVAILABLE and ask_yes_no("Use MRC compression for scanned pages?")
+    optimize_content = ask_yes_no("Optimize page content streams?")
+
     print(f"\n🔄 Compressing: {input_file}")
     print(f"📁 Saving to: {output_path}")
 
-    success, message = compressor.compress_pdf(input_file, output_path)
+    success, message = compressor.compress_pdf(input_file, output_path, object_streams, linearize,
+                                             mrc=mrc, optimize_content=optimize_content)
     print(message)
 
 
@@ -1,27 +1,101 @@
+import io
+import logging
 import os
-import sys
+import queue
+import re
+import tempfile
+import time
+import zlib
+from collections import Counter, defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import Manager
 
-# Import conversion libraries with error handling
-try:
-    from pdf2docx import Converter
-    from docx import Document
-    from docx2pdf import convert as docx_to_pdf
-    PDF_WORD_AVAILABLE = True
-except ImportError:
-    PDF_WORD_AVAILABLE = False
-
-try:
-    from PIL import Image
-    IMAGE_CONVERSION_AVAILABLE = True
-except ImportError:
-    IMAGE_CONVERSION_AVAILABLE = False
+from lazy_import import is_available, lazy_module
+from page_selector import resolve_pages
+from pdf_objects import add_image_xobject, append_page_content, set_page_resource
+from word_backends import WordConversionPool, default_backend
+from worker_pool import imap_ordered, imap_unordered, open_worker_document, resolve_workers, worker_document
+
+# Conversion libraries are only checked for here and imported on first use,
+# so loading this module stays cheap
+PDF_WORD_AVAILABLE = is_available('pdf2docx', 'docx')  # Word->PDF goes through word_backends instead
+IMAGE_CONVERSION_AVAILABLE = is_available('PIL')
+PYMUPDF_AVAILABLE = is_available('fitz')
+
+Image = lazy_module('PIL.Image')
+fitz = lazy_module('fitz')  # PyMuPDF
+
+# Compressed image formats PDF can embed as-is (DCTDecode / JPXDecode)
+PASSTHROUGH_IMAGE_FORMATS = ('.jpg', '.jpeg', '.jp2', '.jpx')
+
+# TIFF compression codes and the PDF filter their bilevel strips are copied under
+TIFF_RAW_FILTERS = {
+    1: '/FlateDecode',  # uncompressed, deflated on the way in
+    2: '/CCITTFaxDecode',  # CCITT modified Huffman RLE
+    3: '/CCITTFaxDecode',  # CCITT T.4 (Group 3)
+    4: '/CCITTFaxDecode',  # CCITT T.6 (Group 4)
+    5: '/LZWDecode'
+}
+
+# Byte table reversing the bit order, for TIFF FillOrder 2 data
+REVERSED_BITS = bytes(int(f"{i:08b}"[::-1], 2) for i in range(256))
+
+# Output formats for pdf_to_images and the file extension each one gets
+IMAGE_EXPORT_FORMATS = {
+    'png': 'png',
+    'jpg': 'jpg',
+    'jpeg': 'jpg',
+    'webp': 'webp'
+}
+
+# Line prefixes treated as list items by pdf_to_text
+LIST_BULLETS = ('•', '·', '◦', '▪', '‣', '●', '○', '■', '–', '-', '*')
+NUMBERED_ITEM = re.compile(r'^\(?(\d{1,3})[.)]\s+')
+
+# Page sizes in points for images_to_pdf
+PAGE_SIZES = {
+    'a4': (595, 842),
+    'letter': (612, 792),
+    'legal': (612, 1008)
+}
+
+# Default limit on simultaneous conversions of each type in batch_convert_files.
+# PDF->Word parsing is CPU heavy; Word->PDF jobs go to the warm backend pool,
+# which has word_workers workers (one by default).
+BATCH_CONCURRENCY = {
+    'pdf_to_word': max(1, (os.cpu_count() or 1) // 2),
+    'word_to_pdf': 1,
+    'image_to_pdf': os.cpu_count() or 1
+}
 
 class FileConverter:
-    def __init__(self):
+    def __init__(self, cache=None, word_backend=None, word_workers=1):
         self.supported_formats = {
             'pdf_to_word': ['.pdf'],
             'word_to_pdf': ['.docx', '.doc'],
-            'image_to_pdf': ['.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif']
+            'image_to_pdf': ['.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif', '.jp2', '.jpx'],
+            'pdf_to_images': ['.pdf'],
+            'pdf_to_text': ['.pdf']
+        }
+        self.output_extensions = {
+            'pdf_to_word': '.docx',
+            'word_to_pdf': '.pdf',
+            'image_to_pdf': '.pdf'
+        }
+        # Optional ResultCache serving repeat conversions of the same input
+        self.cache = cache
+        # Word->PDF backend class or factory (default: best installed one, see word_backends)
+        self.word_backend = word_backend
+        self.word_workers = word_workers
+        self._word_pool = None
+        # Steps available to conversion pipelines: name -> handler(data, **options)
+        self.pipeline_steps = {
+            'open_pdf': self._step_open_pdf,
+            'image_to_pdf': self._step_image_to_pdf,
+            'compress': self._step_compress,
+            'sign_text': self._step_sign_text,
+            'sign_image': self._step_sign_image
         }
     
     def get_file_info(self, file_path):
@@ -38,7 +112,7 @@ class FileConverter:
                     return f"{filename} ({pages} pages, {file_size:.1f} MB)"
                 except ImportError:
                     return f"{filename} (PDF, {file_size:.1f} MB)"
-            elif file_path.lower().endswith(('.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif')):
+            elif file_path.lower().endswith(tuple(self.supported_formats['image_to_pdf'])):
                 if IMAGE_CONVERSION_AVAILABLE:
                     with Image.open(file_path) as img:
                         width, height = img.size
@@ -62,43 +136,70 @@ class FileConverter:
             return 'pdf_to_word', "PDF → Word conversion"
         elif ext in ['.docx', '.doc']:
             return 'word_to_pdf', "Word → PDF conversion"
-        elif ext in ['.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif']:
+        elif ext in self.supported_formats['image_to_pdf']:
             return 'image_to_pdf', "Image → PDF conversion"
         else:
             return None, f"Unsupported file type: {ext}"
     
     def check_dependencies(self, conversion_type):
         """Check if required dependencies are available"""
-        if conversion_type in ['pdf_to_word', 'word_to_pdf']:
+        if conversion_type == 'pdf_to_word':
             if not PDF_WORD_AVAILABLE:
-                return False, "Required libraries missing. Install with: pip install pdf2docx python-docx docx2pdf"
+                return False, "Required libraries missing. Install with: pip install pdf2docx python-docx"
+        elif conversion_type == 'word_to_pdf':
+            if not (self.word_backend or default_backend()):
+                return False, "No Word to PDF backend found. Install Microsoft Word with pywin32, LibreOffice, or docx2pdf"
         elif conversion_type == 'image_to_pdf':
             if not IMAGE_CONVERSION_AVAILABLE:
                 return False, "Required library missing. Install with: pip install pillow"
+        elif conversion_type in ['pdf_to_images', 'pdf_to_text']:
+            if not PYMUPDF_AVAILABLE:
+                return False, "Required library missing. Install with: pip install pymupdf"
         
         return True, "Dependencies available"
     
-    def pdf_to_word(self, pdf_path, output_dir, output_filename=None):
-        """Convert PDF to Word document"""
+    def _prepare_output_path(self, input_path, output_dir, output_filename, extension):
+        """Create output_dir if needed and build the output file path"""
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        
+        if not output_filename:
+            base_name = os.path.splitext(os.path.basename(input_path))[0]
+            output_filename = f"{base_name}_converted{extension}"
+        
+        if not output_filename.endswith(extension):
+            output_filename += extension
+        
+        return os.path.join(output_dir, output_filename)
+    
+    def pdf_to_word(self, pdf_path, output_dir, output_filename=None, workers=1, progress_callback=None):
+        """
+        Convert PDF to Word document
+        
+        With workers > 1 contiguous page ranges are parsed in worker processes and
+        assembled into one .docx, the same way pdf2docx's own multi-processing mode
+        does, so the output matches the sequential conversion.
+        progress_callback(pages_done, total_pages) is called after every parsed page.
+        """
         try:
             if not PDF_WORD_AVAILABLE:
                 raise ImportError("Required libraries not installed. Please install: pip install pdf2docx python-docx")
             
-            if not os.path.exists(output_dir):
-                os.makedirs(output_dir)
-            
-            if not output_filename:
-                base_name = os.path.splitext(os.path.basename(pdf_path))[0]
-                output_filename = f"{base_name}_converted.docx"
-            
-            if not output_filename.endswith('.docx'):
-                output_filename += '.docx'
-            
-            output_path = os.path.join(output_dir, output_filename)
+            output_path = self._prepare_output_path(pdf_path, output_dir, output_filename, '.docx')
             
             # Convert PDF to Word
+            from pdf2docx import Converter
             cv = Converter(pdf_path)
-            cv.convert(output_path, start=0, end=None)
+            if workers > 1:
+                self._parse_pdf_in_parallel(cv, pdf_path, workers, progress_callback)
+            elif progress_callback:
+                cv.load_pages()
+                _parse_pages_with_progress(cv, cv.default_settings, progress_callback)
+            else:
+                cv.convert(output_path, start=0, end=None)
+            
+            if workers > 1 or progress_callback:
+                cv.make_docx(output_path, **cv.default_settings)
             cv.close()
             
             return True, f"PDF converted to Word successfully!\nSaved as: {output_path}"
@@ -106,49 +207,110 @@ class FileConverter:
         except Exception as e:
             return False, f"PDF to Word conversion failed: {str(e)}"
     
+    def _parse_pdf_in_parallel(self, cv, pdf_path, workers, progress_callback=None):
+        """Parse page ranges in worker processes and restore the results into cv"""
+        total_pages = len(cv.fitz_doc)
+        workers = max(1, min(workers, total_pages))
+        chunk_size = -(-total_pages // workers)
+        chunks = [list(range(start, min(start + chunk_size, total_pages)))
+                  for start in range(0, total_pages, chunk_size)]
+        
+        with tempfile.TemporaryDirectory() as temp_dir, Manager() as manager:
+            progress_queue = manager.Queue()
+            json_paths = [os.path.join(temp_dir, f"pages-{i}.json") for i in range(len(chunks))]
+            
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_parse_pdf_chunk, pdf_path, chunk, json_path, progress_queue)
+                           for chunk, json_path in zip(chunks, json_paths)]
+                
+                # Relay per-page progress from the workers until every chunk is parsed
+                pages_done = 0
+                while True:
+                    try:
+                        progress_queue.get(timeout=0.1)
+                    except queue.Empty:
+                        if all(future.done() for future in futures):
+                            break
+                        continue
+                    pages_done += 1
+                    if progress_callback:
+                        progress_callback(pages_done, total_pages)
+                
+                wait(futures)
+                for future in futures:
+                    future.result()  # re-raise worker errors
+            
+            # Restore parsed pages in page order for make_docx
+            for json_path in json_paths:
+                cv.deserialize(json_path)
+    
+    def get_word_pool(self):
+        """The warm Word->PDF worker pool, started on first use"""
+        if self._word_pool is None:
+            backend = self.word_backend or default_backend()
+            if backend is None:
+                raise ImportError("No Word to PDF backend found. Install Microsoft Word with pywin32, LibreOffice, or docx2pdf")
+            self._word_pool = WordConversionPool(backend, self.word_workers)
+        return self._word_pool
+    
+    def close(self):
+        """Shut down the Word->PDF backend processes, if any were started"""
+        if self._word_pool is not None:
+            self._word_pool.close()
+            self._word_pool = None
+    
     def word_to_pdf(self, word_path, output_dir, output_filename=None):
         """Convert Word document to PDF"""
         try:
-            if not PDF_WORD_AVAILABLE:
-                raise ImportError("Required libraries not installed. Please install: pip install python-docx docx2pdf")
-            
-            if not os.path.exists(output_dir):
-                os.makedirs(output_dir)
-            
-            if not output_filename:
-                base_name = os.path.splitext(os.path.basename(word_path))[0]
-                output_filename = f"{base_name}_converted.pdf"
-            
-            if not output_filename.endswith('.pdf'):
-                output_filename += '.pdf'
+            output_path = self._prepare_output_path(word_path, output_dir, output_filename, '.pdf')
             
-            output_path = os.path.join(output_dir, output_filename)
-            
-            # Convert Word to PDF
-            docx_to_pdf(word_path, output_path)
+            # Convert Word to PDF on an already running backend
+            self.get_word_pool().convert(word_path, output_path)
             
             return True, f"Word document converted to PDF successfully!\nSaved as: {output_path}"
             
         except Exception as e:
             return False, f"Word to PDF conversion failed: {str(e)}"
     
-    def image_to_pdf(self, image_path, output_dir, output_filename=None):
-        """Convert image to PDF"""
+    def _submit_word_to_pdf(self, word_path, output_dir):
+        """Queue word_to_pdf on the backend pool; the Future resolves to (success, message)"""
+        output_path = self._prepare_output_path(word_path, output_dir, None, '.pdf')
+        result = Future()
+        
+        def on_done(future):
+            try:
+                future.result()
+                result.set_result((True, f"Word document converted to PDF successfully!\nSaved as: {output_path}"))
+            except Exception as e:
+                result.set_result((False, f"Word to PDF conversion failed: {str(e)}"))
+        
+        self.get_word_pool().submit(word_path, output_path).add_done_callback(on_done)
+        return result
+    
+    def image_to_pdf(self, image_path, output_dir, output_filename=None, passthrough=True):
+        """
+        Convert image to PDF
+        
+        JPEG and JPEG 2000 files are embedded as their original compressed bytes
+        (DCTDecode/JPXDecode) when PyMuPDF is available, skipping the decode and
+        re-encode; passthrough=False forces the Pillow path for every format.
+        """
         try:
             if not IMAGE_CONVERSION_AVAILABLE:
                 raise ImportError("Required library not installed. Please install: pip install pillow")
             
-            if not os.path.exists(output_dir):
-                os.makedirs(output_dir)
-            
-            if not output_filename:
-                base_name = os.path.splitext(os.path.basename(image_path))[0]
-                output_filename = f"{base_name}_converted.pdf"
+            output_path = self._prepare_output_path(image_path, output_dir, output_filename, '.pdf')
             
-            if not output_filename.endswith('.pdf'):
-                output_filename += '.pdf'
+            ext = os.path.splitext(image_path)[1].lower()
+            if ext in ('.tif', '.tiff') and PYMUPDF_AVAILABLE:
+                return self.tiff_to_pdf(image_path, output_dir, output_filename)
             
-            output_path = os.path.join(output_dir, output_filename)
+            if passthrough and PYMUPDF_AVAILABLE and ext in PASSTHROUGH_IMAGE_FORMATS:
+                doc = fitz.open()
+                self._add_image_page(doc, image_path)
+                doc.save(output_path, garbage=3, deflate=True)
+                doc.close()
+                return True, f"Image converted to PDF successfully!\nSaved as: {output_path}"
             
             # Open and convert image to PDF
             with Image.open(image_path) as img:
@@ -164,8 +326,328 @@ class FileConverter:
         except Exception as e:
             return False, f"Image to PDF conversion failed: {str(e)}"
     
-    def convert_file(self, input_path, output_dir, output_filename=None):
-        """Universal conversion method"""
+    def tiff_to_pdf(self, tiff_path, output_dir, output_filename=None):
+        """
+        Convert a (multi-page) TIFF to PDF, one page per frame
+        
+        Frames are processed one at a time. Bilevel frames stored as CCITT G3/G4,
+        LZW or uncompressed strips are copied into the PDF without decoding;
+        other frames are decoded individually and embedded losslessly.
+        """
+        try:
+            if not (IMAGE_CONVERSION_AVAILABLE and PYMUPDF_AVAILABLE):
+                raise ImportError("Required libraries not installed. Please install: pip install pillow pymupdf")
+            
+            output_path = self._prepare_output_path(tiff_path, output_dir, output_filename, '.pdf')
+            
+            doc = fitz.open()
+            frames, copied = self._add_tiff_pages(doc, tiff_path)
+            
+            # Nothing above leaves unused objects, so the (slow on large files) garbage pass is skipped
+            doc.save(output_path, deflate=True)
+            doc.close()
+            
+            return True, (f"TIFF converted to PDF successfully! ({frames} page(s), {copied} copied without decoding)"
+                          f"\nSaved as: {output_path}")
+            
+        except Exception as e:
+            return False, f"TIFF to PDF conversion failed: {str(e)}"
+    
+    def _add_tiff_pages(self, doc, tiff_path):
+        """Append every frame of a TIFF as a page. Returns (frames, frames copied without decoding)."""
+        copied = 0
+        with open(tiff_path, 'rb') as raw, Image.open(tiff_path) as img:
+            frames = getattr(img, 'n_frames', 1)
+            for index in range(frames):
+                img.seek(index)
+                if self._add_raw_tiff_page(doc, img, raw):
+                    copied += 1
+                else:
+                    self._add_decoded_tiff_page(doc, img)
+        return frames, copied
+    
+    def _add_raw_tiff_page(self, doc, img, raw):
+        """
+        Append the current bilevel frame by copying its strips into image XObjects.
+        Returns False, adding nothing, if the frame cannot be embedded as stored.
+        """
+        tags = img.tag_v2
+        compression = tags.get(259, 1)
+        photometric = tags.get(262, 0)
+        fill_order = tags.get(266, 1)
+        t4_options = tags.get(292, 0)
+        
+        if (img.mode != '1' or compression not in TIFF_RAW_FILTERS or photometric not in (0, 1)
+                or 322 in tags or tags.get(317, 1) != 1):
+            return False  # colour/greyscale, tiled, predictor or unsupported codec
+        if compression == 5 and fill_order != 1:
+            return False
+        if compression == 3 and t4_options & 2:
+            return False  # T.4 uncompressed mode
+        
+        width, height = img.size
+        if compression in (2, 3, 4):
+            k = -1 if compression == 4 else (1 if compression == 3 and t4_options & 1 else 0)
+            parms = f"/K {k}/Columns {width}"
+            if compression == 2 or t4_options & 4:
+                parms += "/EncodedByteAlign true"
+            # CCITT codes white and black runs; TIFF photometric says which bit value they decode to
+            if photometric == 1:
+                parms += "/BlackIs1 true"
+            decode = ""
+        else:
+            parms = None
+            # Raw samples: DeviceGray paints 0 as black, TIFF WhiteIsZero means the opposite
+            decode = "/Decode[1 0]" if photometric == 0 else ""
+        
+        x_dpi, y_dpi = _tiff_dpi(img)
+        x_scale, y_scale = 72 / x_dpi, 72 / y_dpi
+        page_width, page_height = width * x_scale, height * y_scale
+        
+        rows_per_strip = min(tags.get(278, height), height)
+        strips = []
+        for number, (offset, count) in enumerate(zip(tags[273], tags[279])):
+            top = number * rows_per_strip
+            rows = min(rows_per_strip, height - top)
+            raw.seek(offset)
+            data = raw.read(count)
+            if fill_order == 2:
+                data = data.translate(REVERSED_BITS)
+            if compression == 1:
+                data = zlib.compress(data)
+            strip_parms = f"{parms}/Rows {rows}" if parms else None
+            xref = add_image_xobject(doc, data, width, rows, TIFF_RAW_FILTERS[compression], "/DeviceGray", 1,
+                                     strip_parms, decode)
+            strips.append((xref, top, rows))
+        
+        page = doc.new_page(width=page_width, height=page_height)
+        content = []
+        for number, (xref, top, rows) in enumerate(strips):
+            set_page_resource(doc, page, "XObject", f"Strip{number}", f"{xref} 0 R")
+            strip_y = page_height - (top + rows) * y_scale
+            content.append(f"q {page_width:g} 0 0 {rows * y_scale:g} 0 {strip_y:g} cm /Strip{number} Do Q")
+        append_page_content(doc, page, "\n".join(content).encode())
+        return True
+    
+    def _add_decoded_tiff_page(self, doc, img):
+        """Append the current frame decoded with Pillow and re-encoded losslessly"""
+        frame = img
+        if img.mode.startswith('I') or img.mode == 'F':
+            frame = img.convert('L')
+        elif img.mode not in ('1', 'L', 'RGB'):
+            frame = img.convert('RGB')
+        
+        buffer = io.BytesIO()
+        frame.save(buffer, 'PNG')
+        
+        x_dpi, y_dpi = _tiff_dpi(img)
+        width, height = img.size
+        page = doc.new_page(width=width * 72 / x_dpi, height=height * 72 / y_dpi)
+        page.insert_image(page.rect, stream=buffer.getvalue())
+    
+    def pdf_to_images(self, pdf_path, output_dir, fmt='png', dpi=150, pages=None, colorspace='rgb',
+                      jpeg_quality=90, workers=None, progress_callback=None):
+        """
+        Export PDF pages as PNG, JPEG or WebP images
+        
+        Pages are rendered in a process pool (one document handle per worker) and
+        each image is written to disk by the worker as soon as it is rendered.
+        
+        pages: 0-based page indexes or a selection string like "1-5,odd" (default: all pages)
+        colorspace: 'rgb', 'gray' or 'cmyk' (CMYK is JPEG only)
+        progress_callback(pages_done, total_pages) is called as pages finish.
+        """
+        try:
+            if not PYMUPDF_AVAILABLE:
+                raise ImportError("Required library not installed. Please install: pip install pymupdf")
+            
+            fmt = fmt.lower()
+            if fmt not in IMAGE_EXPORT_FORMATS:
+                raise ValueError(f"Unsupported image format: {fmt}")
+            extension = IMAGE_EXPORT_FORMATS[fmt]
+            
+            colorspace = colorspace.lower()
+            if colorspace not in ('rgb', 'gray', 'cmyk'):
+                raise ValueError(f"Unsupported colorspace: {colorspace}")
+            if colorspace == 'cmyk' and extension != 'jpg':
+                raise ValueError("CMYK output is only supported for JPEG")
+            if extension == 'webp' and not IMAGE_CONVERSION_AVAILABLE:
+                raise ImportError("WebP output requires Pillow. Please install: pip install pillow")
+            
+            with fitz.open(pdf_path) as doc:
+                total_pages = len(doc)
+            
+            page_indexes = sorted(set(resolve_pages(pages, total_pages))) if pages is not None else list(range(total_pages))
+            if not page_indexes or any(i < 0 or i >= total_pages for i in page_indexes):
+                raise ValueError(f"Page numbers must be between 1 and {total_pages}")
+            
+            if not os.path.exists(output_dir):
+                os.makedirs(output_dir)
+            
+            base_name = os.path.splitext(os.path.basename(pdf_path))[0]
+            digits = len(str(total_pages))
+            tasks = [(i, os.path.join(output_dir, f"{base_name}_page_{i + 1:0{digits}d}.{extension}"),
+                      dpi, extension, colorspace, jpeg_quality) for i in page_indexes]
+            
+            done = 0
+            for _ in imap_unordered(_render_page_image, tasks, workers, open_worker_document, (pdf_path,)):
+                done += 1
+                if progress_callback:
+                    progress_callback(done, len(tasks))
+            
+            return True, f"{done} page(s) exported as {extension.upper()} images!\nSaved in: {output_dir}"
+            
+        except Exception as e:
+            return False, f"PDF to images conversion failed: {str(e)}"
+    
+    def pdf_to_text(self, pdf_path, output_dir, output_filename=None, fmt='txt', workers=None, chunk_size=16):
+        """
+        Extract text from a PDF as plain text or Markdown
+        
+        Pages are extracted in chunks of chunk_size by a process pool and written
+        to the output file in page order as they come in; only a few chunks are
+        held in memory at once, however long the document. Headings, paragraphs
+        and list items are kept (as Markdown syntax when fmt='md').
+        """
+        try:
+            if not PYMUPDF_AVAILABLE:
+                raise ImportError("Required library not installed. Please install: pip install pymupdf")
+            
+            fmt = fmt.lower()
+            if fmt not in ('txt', 'md'):
+                raise ValueError(f"Unsupported text format: {fmt}")
+            
+            output_path = self._prepare_output_path(pdf_path, output_dir, output_filename, f'.{fmt}')
+            
+            with fitz.open(pdf_path) as doc:
+                total_pages = len(doc)
+            
+            chunks = [(start, min(start + chunk_size, total_pages), fmt == 'md')
+                      for start in range(0, total_pages, chunk_size)]
+            
+            with open(output_path, 'w', encoding='utf-8') as f:
+                for text in imap_ordered(_extract_text_chunk, chunks, workers, open_worker_document, (pdf_path,)):
+                    f.write(text)
+            
+            return True, f"Text extracted from {total_pages} page(s) successfully!\nSaved as: {output_path}"
+            
+        except Exception as e:
+            return False, f"PDF to text extraction failed: {str(e)}"
+    
+    def benchmark_image_to_pdf(self, image_paths, output_dir):
+        """
+        Convert every image twice, with and without JPEG pass-through, and report
+        total time and output size for each mode.
+        """
+        results = {}
+        for label, passthrough in (('passthrough', True), ('re-encode', False)):
+            mode_dir = os.path.join(output_dir, label)
+            total_bytes = 0
+            failures = 0
+            start = time.perf_counter()
+            for image_path in image_paths:
+                success, _ = self.image_to_pdf(image_path, mode_dir, passthrough=passthrough)
+                if not success:
+                    failures += 1
+                    continue
+                base_name = os.path.splitext(os.path.basename(image_path))[0]
+                total_bytes += os.path.getsize(os.path.join(mode_dir, f"{base_name}_converted.pdf"))
+            results[label] = {
+                'seconds': time.perf_counter() - start,
+                'total_bytes': total_bytes,
+                'failures': failures
+            }
+        return results
+    
+    def images_to_pdf(self, image_paths, output_dir, output_filename=None, page_size=None,
+                      order='name', margin=0):
+        """
+        Combine many images into one PDF, one page per image
+        
+        Images are added one at a time: Pillow only reads each header for the
+        size, and PyMuPDF embeds the file, so decoded bitmaps are never kept
+        around and memory does not grow with the number of pages.
+        
+        page_size: None gives each page its image's size (at 100 dpi, like
+            image_to_pdf); 'a4', 'letter' or 'legal' fit each image centred on
+            that paper, turned to landscape for landscape images.
+        order: 'name' (natural sort), 'mtime' (oldest first) or 'given'.
+        margin: blank border in points around fitted images.
+        """
+        try:
+            if not (IMAGE_CONVERSION_AVAILABLE and PYMUPDF_AVAILABLE):
+                raise ImportError("Required libraries not installed. Please install: pip install pillow pymupdf")
+            
+            if not image_paths:
+                raise ValueError("No images provided")
+            
+            if page_size and page_size.lower() not in PAGE_SIZES:
+                raise ValueError(f"Unknown page size: {page_size}")
+            
+            output_path = self._prepare_output_path(
+                image_paths[0], output_dir, output_filename or 'images_combined.pdf', '.pdf')
+            
+            doc = fitz.open()
+            for image_path in self._order_images(image_paths, order):
+                self._add_image_page(doc, image_path, page_size, margin)
+            
+            doc.save(output_path, garbage=3, deflate=True)
+            page_count = len(doc)
+            doc.close()
+            
+            return True, f"{page_count} images combined into PDF successfully!\nSaved as: {output_path}"
+            
+        except Exception as e:
+            return False, f"Images to PDF conversion failed: {str(e)}"
+    
+    def _order_images(self, image_paths, order):
+        """Sort image paths according to an images_to_pdf ordering rule"""
+        if order == 'given':
+            return list(image_paths)
+        elif order == 'mtime':
+            return sorted(image_paths, key=os.path.getmtime)
+        elif order == 'name':
+            def natural_key(path):
+                parts = re.split(r'(\d+)', os.path.basename(path).lower())
+                return [int(part) if part.isdigit() else part for part in parts]
+            return sorted(image_paths, key=natural_key)
+        else:
+            raise ValueError(f"Unknown image order: {order}")
+    
+    def _add_image_page(self, doc, image_path, page_size=None, margin=0):
+        """Append one page showing image_path to an open PyMuPDF document"""
+        # Image.open only parses the header; pixels are not decoded here
+        with Image.open(image_path) as img:
+            width, height = img.size
+        
+        if page_size:
+            page_width, page_height = PAGE_SIZES[page_size.lower()]
+            if width > height:
+                page_width, page_height = page_height, page_width
+        else:
+            page_width, page_height = width * 72 / 100, height * 72 / 100
+        
+        page = doc.new_page(width=page_width, height=page_height)
+        area = fitz.Rect(0, 0, page_width, page_height)
+        if page_size:
+            area = fitz.Rect(margin, margin, page_width - margin, page_height - margin)
+        
+        try:
+            page.insert_image(area, filename=image_path)
+        except Exception:
+            # Formats MuPDF cannot read directly go through Pillow, one image at a time
+            with Image.open(image_path) as img:
+                buffer = io.BytesIO()
+                img.convert('RGB').save(buffer, 'PNG')
+            page.insert_image(area, stream=buffer.getvalue())
+    
+    def convert_file(self, input_path, output_dir, output_filename=None, **options):
+        """
+        Universal conversion method
+        
+        options are passed on to the conversion method (e.g. passthrough=False
+        for image_to_pdf) and are part of the cache key.
+        """
         conversion_type, type_desc = self.get_conversion_type(input_path)
         
         if not conversion_type:
@@ -176,16 +658,557 @@ class FileConverter:
         if not deps_ok:
             return False, deps_msg
         
-        # Perform conversion
+        # Serve repeat conversions of identical input from the cache
+        cache_key = None
+        if self.cache:
+            output_path = self._prepare_output_path(
+                input_path, output_dir, output_filename, self.output_extensions[conversion_type])
+            cache_key = self._cache_key(input_path, conversion_type, options)
+            if self.cache.fetch(cache_key, output_path):
+                return True, f"Conversion served from cache!\nSaved as: {output_path}"
+        
+        success, message = self._run_conversion(conversion_type, input_path, output_dir, output_filename, **options)
+        
+        if success and cache_key:
+            self.cache.store(cache_key, output_path)
+        
+        return success, message
+    
+    def batch_convert_files(self, file_paths, output_dir, workers=None, type_limits=None, retries=1,
+                            progress_callback=None):
+        """
+        Convert many files in a process pool
+        
+        Each conversion type has its own concurrency limit (BATCH_CONCURRENCY,
+        overridable with type_limits) so a few heavy PDF->Word jobs cannot starve
+        cheap image conversions. Failed files are retried up to `retries` times.
+        progress_callback(result, done, total) is called as each file finishes.
+        
+        Returns a summary dict with per-file results (see print_batch_summary).
+        Limits below 1 raise ValueError, as jobs of that type could never start.
+        """
+        start_time = time.time()
+        limits = dict(BATCH_CONCURRENCY)
+        limits.update(type_limits or {})
+        invalid = {conversion_type: limit for conversion_type, limit in limits.items() if limit < 1}
+        if invalid:
+            raise ValueError(f"Concurrency limits must be at least 1: {invalid}")
+        workers = resolve_workers(workers, len(file_paths))
+        
+        results = []
+        jobs = deque()
+        
+        def finish(job, success, message):
+            job['success'] = success
+            job['message'] = message
+            if success and job.get('cache_key'):
+                self.cache.store(job['cache_key'], job['output_path'])
+            results.append(job)
+            if progress_callback:
+                progress_callback(job, len(results), len(file_paths))
+        
+        # Type detection, dependency checks and cache lookups stay in this process
+        for path in file_paths:
+            job = {'input': path, 'conversion_type': None, 'attempts': 0}
+            conversion_type, type_desc = self.get_conversion_type(path)
+            if not conversion_type:
+                finish(job, False, type_desc)
+                continue
+            job['conversion_type'] = conversion_type
+            
+            deps_ok, deps_msg = self.check_dependencies(conversion_type)
+            if not deps_ok:
+                finish(job, False, deps_msg)
+                continue
+            
+            if self.cache:
+                job['output_path'] = self._prepare_output_path(
+                    path, output_dir, None, self.output_extensions[conversion_type])
+                job['cache_key'] = self._cache_key(path, conversion_type, {})
+                if self.cache.fetch(job['cache_key'], job['output_path']):
+                    job['cache_key'] = None
+                    finish(job, True, f"Conversion served from cache!\nSaved as: {job['output_path']}")
+                    continue
+            jobs.append(job)
+        
+        if workers == 1:
+            for job in jobs:
+                while True:
+                    job['attempts'] += 1
+                    try:
+                        success, message = self._run_conversion(job['conversion_type'], job['input'], output_dir, None)
+                    except Exception as e:
+                        success, message = False, f"Conversion failed: {str(e)}"
+                    if success or job['attempts'] > retries:
+                        break
+                finish(job, success, message)
+        else:
+            self._run_batch_pool(jobs, output_dir, workers, limits, retries, finish)
+        
+        successful = sum(1 for job in results if job['success'])
+        return {
+            'total': len(results),
+            'successful': successful,
+            'failed': len(results) - successful,
+            'retried': sum(1 for job in results if job['attempts'] > 1),
+            'elapsed': time.time() - start_time,
+            'results': results
+        }
+    
+    def _run_batch_pool(self, jobs, output_dir, workers, limits, retries, finish):
+        """Schedule jobs onto a process pool, honouring the per-type limits"""
+        running = {}
+        active = defaultdict(int)
+        pool = ProcessPoolExecutor(max_workers=workers)
+        try:
+            while jobs or running:
+                # Start every queued job whose type still has a free slot
+                for job in list(jobs):
+                    if len(running) >= workers:
+                        break
+                    conversion_type = job['conversion_type']
+                    if active[conversion_type] >= limits.get(conversion_type, workers):
+                        continue
+                    jobs.remove(job)
+                    job['attempts'] += 1
+                    active[conversion_type] += 1
+                    if conversion_type == 'word_to_pdf':
+                        # Word documents go to the already running backend instead of a fresh process
+                        future = self._submit_word_to_pdf(job['input'], output_dir)
+                    else:
+                        future = pool.submit(_batch_convert_task, conversion_type, job['input'], output_dir)
+                    running[future] = job
+                
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                pool_broken = False
+                for future in done:
+                    job = running.pop(future)
+                    active[job['conversion_type']] -= 1
+                    try:
+                        success, message = future.result()
+                    except BrokenProcessPool:
+                        pool_broken = True
+                        success, message = False, "Conversion failed: worker process crashed"
+                    except Exception as e:
+                        success, message = False, f"Conversion failed: {str(e)}"
+                    
+                    if not success and job['attempts'] <= retries:
+                        jobs.append(job)
+                    else:
+                        finish(job, success, message)
+                
+                if pool_broken:
+                    # A crashed worker takes the whole pool down; start a fresh one
+                    pool.shutdown(wait=False)
+                    pool = ProcessPoolExecutor(max_workers=workers)
+        finally:
+            pool.shutdown()
+    
+    def register_step(self, name, handler):
+        """
+        Make handler(data, **options) available to pipelines as `name`. data is
+        the previous step's output: the input path for the first step, then a
+        PyMuPDF Document or PDF bytes.
+        """
+        self.pipeline_steps[name] = handler
+    
+    def pipeline(self, steps):
+        """
+        Build a ConversionPipeline from step names or (name, options) pairs, e.g.
+        ['image_to_pdf', ('compress', {'optimize_content': True}), ('sign_text', {...})]
+        """
+        return ConversionPipeline(self, steps)
+    
+    def _step_open_pdf(self, data):
+        return _as_document(data)
+    
+    def _step_image_to_pdf(self, data, page_size=None, margin=0):
+        """Image path, or list of paths, to a document with one page per image (TIFF: per frame)"""
+        image_paths = [data] if isinstance(data, str) else list(data)
+        doc = fitz.open()
+        for image_path in image_paths:
+            if image_path.lower().endswith(('.tif', '.tiff')) and not page_size:
+                self._add_tiff_pages(doc, image_path)
+            else:
+                self._add_image_page(doc, image_path, page_size, margin)
+        return doc
+    
+    def _step_compress(self, data, **options):
+        from file_compression import PDFCompressor
+        if isinstance(data, fitz.Document):
+            return PDFCompressor().compress_document(data, **options)
+        # Opened here from a path or bytes, and closed here since only the bytes are handed on
+        with _as_document(data) as doc:
+            return PDFCompressor().compress_document(doc, **options)
+    
+    def _step_sign_text(self, data, page, text, x, y, size=12):
+        from pdf_sign import PDFESignTool
+        doc = _as_document(data)
+        PDFESignTool().sign_text(doc, page, text, x, y, size)
+        return doc
+    
+    def _step_sign_image(self, data, page, image_path, x, y, width=100, height=50):
+        from pdf_sign import PDFESignTool
+        doc = _as_document(data)
+        PDFESignTool().sign_image(doc, page, image_path, x, y, width, height)
+        return doc
+    
+    def _cache_key(self, input_path, conversion_type, options):
+        """Cache key for everything that shapes the output: input, conversion, options and Word backend"""
+        key_options = dict(options)
+        if conversion_type == 'word_to_pdf':
+            backend = self.word_backend or default_backend()
+            key_options['backend'] = getattr(backend, 'name', None) or getattr(backend, '__name__', None) or repr(backend)
+        return self.cache.make_key(input_path, conversion_type, key_options)
+    
+    def _run_conversion(self, conversion_type, input_path, output_dir, output_filename, **options):
+        """Dispatch to the conversion method for conversion_type"""
         if conversion_type == 'pdf_to_word':
-            return self.pdf_to_word(input_path, output_dir, output_filename)
+            return self.pdf_to_word(input_path, output_dir, output_filename, **options)
         elif conversion_type == 'word_to_pdf':
-            return self.word_to_pdf(input_path, output_dir, output_filename)
+            return self.word_to_pdf(input_path, output_dir, output_filename, **options)
         elif conversion_type == 'image_to_pdf':
-            return self.image_to_pdf(input_path, output_dir, output_filename)
+            return self.image_to_pdf(input_path, output_dir, output_filename, **options)
         else:
             return False, f"Conversion type '{conversion_type}' not implemented"
 
+class ConversionPipeline:
+    """
+    A chain of registered FileConverter steps. Each step hands its result to
+    the next in memory (a PyMuPDF Document or PDF bytes) and only the final
+    result is written: as PDF, or as Word when output_path ends in .docx.
+    Per-step wall-clock times are kept in `timings` after each run.
+    """
+    
+    def __init__(self, converter, steps):
+        self.converter = converter
+        self.steps = [(step, {}) if isinstance(step, str) else (step[0], dict(step[1])) for step in steps]
+        self.timings = []
+        
+        unknown = [name for name, _ in self.steps if name not in converter.pipeline_steps]
+        if unknown:
+            raise ValueError(f"Unknown pipeline step(s): {', '.join(unknown)}")
+    
+    def run(self, input_path, output_path):
+        """Run every step on input_path and save the result to output_path"""
+        self.timings = []
+        data = input_path
+        name = None
+        try:
+            for name, options in self.steps:
+                start = time.perf_counter()
+                result = self.converter.pipeline_steps[name](data, **options)
+                self.timings.append((name, time.perf_counter() - start))
+                if data is not result and isinstance(data, fitz.Document):
+                    data.close()  # the step produced a new document
+                data = result
+            
+            name = 'save'
+            start = time.perf_counter()
+            _save_pipeline_result(data, output_path)
+            self.timings.append((name, time.perf_counter() - start))
+            
+            steps = ", ".join(f"{step} {seconds:.2f}s" for step, seconds in self.timings)
+            return True, f"Pipeline completed successfully!\nSaved as: {output_path}\nSteps: {steps}"
+        
+        except Exception as e:
+            return False, f"Pipeline failed at step '{name}': {str(e)}"
+        finally:
+            if isinstance(data, fitz.Document):
+                data.close()
+
+def _as_document(data):
+    """Open pipeline data (path, PDF bytes or Document) as a PyMuPDF Document"""
+    if isinstance(data, fitz.Document):
+        return data
+    if isinstance(data, (bytes, bytearray)):
+        return fitz.open(stream=bytes(data), filetype='pdf')
+    return fitz.open(data)
+
+def _save_pipeline_result(data, output_path):
+    output_dir = os.path.dirname(output_path)
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    
+    if output_path.lower().endswith('.docx'):
+        from pdf2docx import Converter
+        pdf_bytes = data.tobytes() if isinstance(data, fitz.Document) else bytes(data)
+        cv = Converter(stream=pdf_bytes)
+        cv.convert(output_path)
+        cv.close()
+    elif isinstance(data, fitz.Document):
+        data.save(output_path, garbage=3, deflate=True)
+    else:
+        with open(output_path, 'wb') as f:
+            f.write(data)
+
+def _batch_convert_task(conversion_type, input_path, output_dir):
+    """Worker: run a single conversion for batch_convert_files"""
+    return FileConverter()._run_conversion(conversion_type, input_path, output_dir, None)
+
+def print_batch_summary(summary):
+    """Print the summary returned by FileConverter.batch_convert_files"""
+    print("\n" + "=" * 60)
+    print("BATCH CONVERSION COMPLETE")
+    print(f"Successful: {summary['successful']}")
+    print(f"Failed: {summary['failed']}")
+    print(f"Retried: {summary['retried']}")
+    print(f"Total: {summary['total']}")
+    print(f"Time: {summary['elapsed']:.1f}s")
+    print("=" * 60)
+    
+    failures = [result for result in summary['results'] if not result['success']]
+    if failures:
+        print("\nFailed files:")
+        for result in failures:
+            print(f"❌ {os.path.basename(result['input'])}: {result['message']}")
+
+def _tiff_dpi(img):
+    """Resolution of the current TIFF frame, defaulting to 100 dpi when it is missing or unitless"""
+    dpi = img.info.get('dpi')
+    if not dpi or min(dpi) < 10:
+        return 100, 100
+    return float(dpi[0]), float(dpi[1])
+
+def _render_page_image(task):
+    """Worker: render one page and write it straight to its output file"""
+    page_index, output_path, dpi, extension, colorspace, jpeg_quality = task
+    colorspaces = {'rgb': fitz.csRGB, 'gray': fitz.csGRAY, 'cmyk': fitz.csCMYK}
+    pix = worker_document()[page_index].get_pixmap(dpi=dpi, colorspace=colorspaces[colorspace], alpha=False)
+    
+    if extension == 'webp':
+        # MuPDF has no WebP writer, so hand the pixels to Pillow
+        mode = 'L' if colorspace == 'gray' else 'RGB'
+        img = Image.frombytes(mode, (pix.width, pix.height), pix.samples)
+        img.save(output_path, 'WEBP', quality=jpeg_quality)
+    elif extension == 'jpg':
+        pix.save(output_path, jpg_quality=jpeg_quality)
+    else:
+        pix.save(output_path)
+    return output_path
+
+def _extract_text_chunk(task):
+    """Worker: extract pages [start, end) as text or Markdown"""
+    start, end, markdown = task
+    doc = worker_document()
+    pages = [_page_blocks(doc[i]) for i in range(start, end)]
+    
+    # Headings are judged against the most common font size in the chunk
+    sizes = Counter()
+    for blocks in pages:
+        for lines in blocks:
+            for text, size, bold in lines:
+                sizes[round(size)] += len(text)
+    body_size = sizes.most_common(1)[0][0] if sizes else 10
+    
+    output = []
+    for page_number, blocks in enumerate(pages, start + 1):
+        output.append(f"<!-- Page {page_number} -->\n\n" if markdown else ("\f" if page_number > 1 else ""))
+        for block_number, lines in enumerate(blocks):
+            previous_kind = None
+            for kind, marker, text in _block_elements(lines, body_size):
+                # Items of one list stay on consecutive lines; everything else is a paragraph
+                if (block_number or previous_kind) and not (kind == 'list' and previous_kind == 'list'):
+                    output.append("\n")
+                output.append(_format_element(kind, marker, text, markdown) + "\n")
+                previous_kind = kind
+        output.append("\n")
+    return "".join(output)
+
+def _page_blocks(page):
+    """Text blocks of a page in reading order, each a list of (text, size, bold) lines"""
+    blocks = []
+    for block in page.get_text('dict', sort=True)['blocks']:
+        if block['type'] != 0:
+            continue
+        lines = []
+        for line in block['lines']:
+            spans = [span for span in line['spans'] if span['text'].strip()]
+            if not spans:
+                continue
+            text = "".join(span['text'] for span in line['spans']).strip()
+            size = max(span['size'] for span in spans)
+            bold = all(span['flags'] & 16 for span in spans)
+            lines.append((text, size, bold))
+        if lines:
+            blocks.append(lines)
+    return blocks
+
+def _block_elements(lines, body_size):
+    """Split a text block into (kind, list marker, text) elements"""
+    text = _join_lines([line[0] for line in lines])
+    size = max(line[1] for line in lines)
+    
+    # Short blocks in a larger or bold font are headings
+    if len(lines) <= 3 and len(text) < 200:
+        if size >= body_size * 1.6:
+            return [('heading', 1, text)]
+        if size >= body_size * 1.3:
+            return [('heading', 2, text)]
+        if size >= body_size * 1.15 or (all(line[2] for line in lines) and not text.endswith(('.', ':', ','))):
+            return [('heading', 3, text)]
+    
+    elements = []
+    current = None
+    for line_text, _, _ in lines:
+        item = _list_item(line_text)
+        if item:
+            current = ['list', item[0], [item[1]]]
+            elements.append(current)
+        elif current is None:
+            current = ['paragraph', None, [line_text]]
+            elements.append(current)
+        else:
+            current[2].append(line_text)  # wrapped line of the current paragraph or item
+    return [(kind, marker, _join_lines(parts)) for kind, marker, parts in elements]
+
+def _list_item(text):
+    """(marker, rest) if the line starts a list item, else None; marker is None for bullets"""
+    if len(text) > 1 and text[0] in LIST_BULLETS and (text[1].isspace() or text[0] not in '-*'):
+        return None, text[1:].strip()
+    match = NUMBERED_ITEM.match(text)
+    if match:
+        return match.group(1), text[match.end():]
+    return None
+
+def _join_lines(parts):
+    """Join wrapped lines, undoing end-of-line hyphenation"""
+    text = ""
+    for part in parts:
+        if text.endswith('-') and part[:1].islower():
+            text = text[:-1] + part
+        elif text:
+            text += " " + part
+        else:
+            text = part
+    return text
+
+def _format_element(kind, marker, text, markdown):
+    if kind == 'heading':
+        return f"{'#' * marker} {text}" if markdown else text
+    if kind == 'list':
+        if marker is not None:
+            return f"{marker}. {text}"
+        return f"- {text}" if markdown else f"• {text}"
+    return text
+
+def _parse_pages_with_progress(cv, settings, on_page):
+    """Run pdf2docx's document and page parsing steps, reporting each parsed page"""
+    cv.parse_document(**settings)
+    
+    pages = [page for page in cv.pages if not page.skip_parsing]
+    for i, page in enumerate(pages, start=1):
+        try:
+            page.parse(**settings)
+        except Exception as e:
+            if settings['debug'] or not settings['ignore_page_error']:
+                raise
+            logging.error('Ignore page %d due to parsing page error: %s', page.id + 1, e)
+        on_page(i, len(pages))
+
+def _parse_pdf_chunk(pdf_path, page_indexes, json_path, progress_queue):
+    """Worker: parse one page range with pdf2docx and serialize the result to JSON"""
+    from pdf2docx import Converter
+    cv = Converter(pdf_path)
+    cv.load_pages(pages=page_indexes)
+    _parse_pages_with_progress(cv, cv.default_settings, lambda done, total: progress_queue.put(done))
+    cv.serialize(json_path)
+    cv.close()
+
+def combine_images():
+    """Combine multiple images into a single PDF"""
+    converter = FileConverter()
+    
+    print("\n" + "=" * 60)
+    print("           COMBINE IMAGES INTO ONE PDF")
+    print("=" * 60)
+    
+    source = input("\nEnter a folder of images or comma-separated image paths: ").strip().strip('"').strip("'")
+    image_extensions = tuple(converter.supported_formats['image_to_pdf'])
+    if os.path.isdir(source):
+        image_paths = [os.path.join(source, name) for name in os.listdir(source)
+                       if name.lower().endswith(image_extensions)]
+    else:
+        image_paths = [path.strip().strip('"').strip("'") for path in source.split(',') if path.strip()]
+    
+    image_paths = [path for path in image_paths if os.path.isfile(path)]
+    if not image_paths:
+        print("❌ No images found.")
+        return
+    print(f"✅ Found {len(image_paths)} image(s)")
+    
+    page_size = input("Page size (a4, letter, legal or Enter for image size): ").strip().lower() or None
+    order = input("Order (name, mtime, given) [name]: ").strip().lower() or 'name'
+    
+    output_dir = get_output_location()
+    if not output_dir:
+        return
+    output_filename = get_output_filename()
+    
+    print(f"\n🔄 Combining {len(image_paths)} image(s)...")
+    success, message = converter.images_to_pdf(image_paths, output_dir, output_filename, page_size, order)
+    print(f"\n{'✅' if success else '❌'} {message}")
+
+def export_pdf_images():
+    """Export the pages of a PDF as image files"""
+    converter = FileConverter()
+    
+    print("\n" + "=" * 60)
+    print("           EXPORT PDF PAGES AS IMAGES")
+    print("=" * 60)
+    
+    pdf_path = input("\nEnter PDF file path: ").strip().strip('"').strip("'")
+    if not os.path.isfile(pdf_path) or not pdf_path.lower().endswith('.pdf'):
+        print("❌ Please enter an existing PDF file.")
+        return
+    
+    fmt = input("Image format (png, jpg, webp) [png]: ").strip().lower() or 'png'
+    dpi_text = input("Resolution in DPI [150]: ").strip()
+    colorspace = input("Colorspace (rgb, gray, cmyk) [rgb]: ").strip().lower() or 'rgb'
+    pages = input("Pages (e.g. 1-5, odd, -1 = last, or Enter for all): ").strip() or None
+    
+    try:
+        dpi = int(dpi_text) if dpi_text else 150
+    except ValueError:
+        print("❌ Invalid number.")
+        return
+    
+    output_dir = get_output_location()
+    if not output_dir:
+        return
+    
+    def show_progress(done, total):
+        print(f"\r   Rendered {done}/{total} page(s)", end="", flush=True)
+    
+    print("\n🔄 Rendering pages...")
+    success, message = converter.pdf_to_images(pdf_path, output_dir, fmt, dpi, pages, colorspace,
+                                               progress_callback=show_progress)
+    print(f"\n{'✅' if success else '❌'} {message}")
+
+def extract_pdf_text():
+    """Extract the text of a PDF to a .txt or .md file"""
+    converter = FileConverter()
+    
+    print("\n" + "=" * 60)
+    print("           EXTRACT TEXT FROM PDF")
+    print("=" * 60)
+    
+    pdf_path = input("\nEnter PDF file path: ").strip().strip('"').strip("'")
+    if not os.path.isfile(pdf_path) or not pdf_path.lower().endswith('.pdf'):
+        print("❌ Please enter an existing PDF file.")
+        return
+    
+    fmt = input("Output format (txt, md) [txt]: ").strip().lower() or 'txt'
+    
+    output_dir = get_output_location()
+    if not output_dir:
+        return
+    output_filename = get_output_filename()
+    
+    print("\n🔄 Extracting text...")
+    success, message = converter.pdf_to_text(pdf_path, output_dir, output_filename, fmt)
+    print(f"\n{'✅' if success else '❌'} {message}")
+
 def get_user_input():
     """Get input file path from user with validation"""
     print("=" * 60)
@@ -194,7 +1217,7 @@ def get_user_input():
     print("Supported conversions:")
     print("• PDF → Word (.docx)")
     print("• Word (.docx/.doc) → PDF")
-    print("• Image (jpg, png, bmp, tiff) → PDF")
+    print("• Image (jpg, png, bmp, tiff, jp2) → PDF")
     print("=" * 60)
     
     while True:
@@ -301,7 +1324,7 @@ def main():
         output_filename = get_output_filename()
         
         # Perform conversion
-        print(f"\n🔄 Converting file...")
+        print("\n🔄 Converting file...")
         print(f"   Input: {input_file}")
         print(f"   Output Directory: {output_dir}")
         if output_filename:
@@ -318,19 +1341,25 @@ def main():
         print("\n\nOperation cancelled by user.")
     except Exception as e:
         print(f"\n❌ Unexpected error: {str(e)}")
+    finally:
+        # Stop the Word backend, if the conversion started one
+        converter.close()
 
-def batch_convert():
-    """Batch conversion for multiple files"""
-    converter = FileConverter()
+def batch_convert(file_paths=None, output_dir=None, workers=None, retries=1):
+    """
+    Batch conversion for multiple files
     
+    Prompts for the files and output directory unless they are passed in, so
+    it can also be called from scripts.
+    """
     print("\n" + "=" * 60)
     print("           BATCH CONVERSION MODE")
     print("=" * 60)
     
-    files_to_convert = []
+    files_to_convert = list(file_paths or [])
     
     # Get multiple files
-    while True:
+    while file_paths is None:
         file_path = input(f"\nEnter file path #{len(files_to_convert) + 1} (or press Enter to finish): ").strip()
         
         if not file_path:
@@ -350,37 +1379,30 @@ def batch_convert():
     
     if not files_to_convert:
         print("No files to convert.")
-        return
+        return None
     
     # Get output directory
-    output_dir = get_output_location()
-    if not output_dir:
-        return
+    if output_dir is None:
+        output_dir = get_output_location()
+        if not output_dir:
+            return None
     
     # Convert all files
     print(f"\n🔄 Converting {len(files_to_convert)} file(s)...")
     
-    successful = 0
-    failed = 0
+    def show_result(result, done, total):
+        icon = "✅" if result['success'] else "❌"
+        print(f"\n[{done}/{total}] {os.path.basename(result['input'])}")
+        print(f"{icon} {result['message']}")
     
-    for i, file_path in enumerate(files_to_convert, 1):
-        print(f"\n[{i}/{len(files_to_convert)}] Converting {os.path.basename(file_path)}...")
-        
-        success, message = converter.convert_file(file_path, output_dir)
-        
-        if success:
-            print(f"✅ {message}")
-            successful += 1
-        else:
-            print(f"❌ {message}")
-            failed += 1
-    
-    print(f"\n" + "=" * 60)
-    print(f"BATCH CONVERSION COMPLETE")
-    print(f"Successful: {successful}")
-    print(f"Failed: {failed}")
-    print(f"Total: {len(files_to_convert)}")
-    print("=" * 60)
+    converter = FileConverter()
+    try:
+        summary = converter.batch_convert_files(files_to_convert, output_dir, workers=workers, retries=retries,
+                                                progress_callback=show_result)
+    finally:
+        converter.close()
+    print_batch_summary(summary)
+    return summary
 
 if __name__ == "__main__":
     while True:
@@ -389,23 +1411,32 @@ if __name__ == "__main__":
         print("=" * 60)
         print("1. Convert single file")
         print("2. Batch convert multiple files")
-        print("3. Exit")
+        print("3. Combine images into one PDF")
+        print("4. Export PDF pages as images")
+        print("5. Extract text from PDF")
+        print("6. Exit")
         print("=" * 60)
         
-        choice = input("Select option (1-3): ").strip()
+        choice = input("Select option (1-6): ").strip()
         
         if choice == '1':
             main()
         elif choice == '2':
             batch_convert()
         elif choice == '3':
+            combine_images()
+        elif choice == '4':
+            export_pdf_images()
+        elif choice == '5':
+            extract_pdf_text()
+        elif choice == '6':
             print("Goodbye!")
             break
         else:
-            print("❌ Please enter 1, 2, or 3")
+            print("❌ Please enter a number from 1 to 6")
         
         # Ask if user wants to continue
-        if choice in ['1', '2']:
+        if choice in ['1', '2', '3', '4', '5']:
             continue_choice = input("\nPerform another conversion? (y/n): ").lower().strip()
             if continue_choice != 'y':
                 print("Goodbye!")
@@ -0,0 +1,65 @@
+import importlib
+import os
+import subprocess
+import sys
+import time
+from importlib.util import find_spec
+
+
+class LazyObject:
+    """
+    Stand-in that builds its target on first attribute access, so heavy
+    modules (and the tools built on them) are only imported when used.
+    """
+
+    def __init__(self, loader):
+        self._loader = loader
+        self._target = None
+
+    def __getattr__(self, name):
+        if self._target is None:
+            self._target = self._loader()
+        return getattr(self._target, name)
+
+
+def lazy_module(name):
+    """Module proxy: lazy_module("fitz").open(...) imports fitz on that first call"""
+    return LazyObject(lambda: importlib.import_module(name))
+
+
+def lazy_instance(module_name, class_name, *args, **kwargs):
+    """Proxy for class_name(*args, **kwargs) from module_name, created on first use"""
+    return LazyObject(lambda: getattr(importlib.import_module(module_name), class_name)(*args, **kwargs))
+
+
+def is_available(*module_names):
+    """True if every module is installed. Nothing is imported."""
+    try:
+        return all(find_spec(name) is not None for name in module_names)
+    except (ImportError, ValueError):
+        return False
+
+
+def check_import_budget(module_name, budget_seconds=0.5, runs=3):
+    """
+    Time `import module_name` in fresh interpreters and compare the best run
+    against budget_seconds. Returns (within_budget, message).
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", f"import {module_name}"], cwd=here,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if result.returncode != 0:
+            return False, f"import {module_name} failed"
+        timings.append(time.perf_counter() - start)
+
+    # Subtract bare interpreter startup so only the module's own cost is measured
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True, cwd=here)
+    baseline = time.perf_counter() - start
+
+    import_time = max(0.0, min(timings) - baseline)
+    within_budget = import_time <= budget_seconds
+    return within_budget, f"import {module_name}: {import_time:.3f}s (budget {budget_seconds:.3f}s)"
@@ -1,26 +1,26 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, simpledialog, Canvas, Toplevel, ttk
 import os
-import fitz
-from PIL import Image, ImageTk, ImageDraw
 import tempfile
 import io  # Add this import
 
-# Import your modules (make sure these files exist in the same directory)
-from pdf_splitter import PDFSplitter
-from pdf_merger import PDFMerger
-from file_compression import PDFCompressor
-from file_converter import FileConverter
-from pdf_editor import PDFEditor
-from pdf_sign import PDFESignTool  # Using the simplified version
-
-# Initialize feature classes
-splitter = PDFSplitter()
-merger = PDFMerger()
-compressor = PDFCompressor()
-converter = FileConverter()
-editor = PDFEditor()
-signer = PDFESignTool()
+from lazy_import import lazy_instance, lazy_module
+from page_selector import PageSelectionError, parse_pages
+
+# PyMuPDF and Pillow are imported the first time a window needs them
+fitz = lazy_module("fitz")
+Image = lazy_module("PIL.Image")
+ImageTk = lazy_module("PIL.ImageTk")
+ImageDraw = lazy_module("PIL.ImageDraw")
+
+# Feature classes (make sure these files exist in the same directory) are
+# imported and created when their button is first used, not at startup
+splitter = lazy_instance("pdf_splitter", "PDFSplitter")
+merger = lazy_instance("pdf_merger", "PDFMerger")
+compressor = lazy_instance("file_compression", "PDFCompressor")
+converter = lazy_instance("file_converter", "FileConverter")
+editor = lazy_instance("pdf_editor", "PDFEditor")
+signer = lazy_instance("pdf_sign", "PDFESignTool")  # Using the simplified version
 
 # Modern Color Palette
 COLORS = {
@@ -111,11 +111,13 @@ def draw_signature_window(temp_path, callback):
 def pdf_text_position_selector(pdf_path, page_num, text, font_size):
     """
     Opens a visual PDF page viewer where user can click to select text position
+    pdf_path may also be an already open document (e.g. an edit session's)
     Returns the selected x, y coordinates or None if cancelled
     """
     try:
         # Open PDF and get the specified page
-        doc = fitz.open(pdf_path)
+        owns_doc = isinstance(pdf_path, str)
+        doc = fitz.open(pdf_path) if owns_doc else pdf_path
         page = doc[page_num - 1]  # Convert to 0-based index
         
         # Convert page to image
@@ -141,7 +143,8 @@ def pdf_text_position_selector(pdf_path, page_num, text, font_size):
         # Resize image for display
         display_image = pil_image.resize((display_width, display_height), Image.Resampling.LANCZOS)
         
-        doc.close()
+        if owns_doc:
+            doc.close()
         
     except Exception as e:
         messagebox.showerror("Error", f"Failed to load PDF page: {str(e)}")
@@ -397,6 +400,7 @@ def handle_convert_file():
         messagebox.showerror("Error", f"Failed to convert file: {str(e)}")
 
 def handle_edit_pdf():
+    session = None
     try:
         pdf_path = ask_file([("PDF Files", "*.pdf")])
         if not pdf_path: return
@@ -404,90 +408,99 @@ def handle_edit_pdf():
         output_dir = ask_folder()
         if not output_dir: return
         
-        choice = simpledialog.askinteger(
-            "Edit Options",
-            "Choose edit type:\n\n1. Delete Pages\n2. Rotate Pages\n3. Extract Pages\n4. Add Text",
-            minvalue=1, maxvalue=4
-        )
-        
-        if not choice: return
-
-        if choice in [1, 2, 3]:
-            page_input = simpledialog.askstring("Page Numbers", 
-                                              "Enter page numbers (comma-separated, 1-based)\nExample: 1,3,5 or 2-5:")
-            if not page_input: return
-            
-            try:
-                pages = []
-                for part in page_input.split(','):
-                    part = part.strip()
-                    if '-' in part:
-                        start, end = map(int, part.split('-'))
-                        pages.extend(range(start-1, end))
-                    else:
-                        pages.append(int(part) - 1)
-                pages = sorted(set(pages))
-            except ValueError:
-                messagebox.showerror("Error", "Invalid page number format")
-                return
-
-        if choice == 1:
-            output_file = os.path.join(output_dir, "pages_deleted.pdf")
-            success, msg = editor.delete_pages(pdf_path, output_file, pages)
-        elif choice == 2:
-            degrees = simpledialog.askinteger("Rotation", "Enter rotation degrees:", 
-                                            initialvalue=90, minvalue=0, maxvalue=360)
-            output_file = os.path.join(output_dir, "pages_rotated.pdf")
-            success, msg = editor.rotate_pages(pdf_path, output_file, pages, degrees)
-        elif choice == 3:
-            output_file = os.path.join(output_dir, "pages_extracted.pdf")
-            success, msg = editor.extract_pages(pdf_path, output_file, pages)
-        elif choice == 4:
-            # Enhanced Add Text functionality with visual positioning
-            text = simpledialog.askstring("Text", "Enter text to add:")
-            if not text: return
-            
-            # Get page number
-            doc = fitz.open(pdf_path)
-            total_pages = len(doc)
-            doc.close()
-            
-            page = simpledialog.askinteger("Page", f"Page number (1-{total_pages}):", 
-                                         minvalue=1, maxvalue=total_pages)
-            if not page: return
-            
-            # Get font size
-            size = simpledialog.askinteger("Font Size", "Font size:", 
-                                         initialvalue=12, minvalue=6, maxvalue=72)
-            if not size: return
-            
-            # Ask user for positioning method
-            position_choice = messagebox.askquestion(
-                "Position Method",
-                "How would you like to position the text?\n\n" +
-                "Yes = Click on PDF (Visual)\n" +
-                "No = Enter coordinates manually"
+        # Edits stay in memory, with undo/redo, until they are saved
+        session = editor.open_session(pdf_path)
+        status = f"Opened {os.path.basename(pdf_path)} ({session.page_count} pages)"
+        
+        while True:
+            choice = simpledialog.askinteger(
+                "Edit Options",
+                f"{status}\nApplied: {', '.join(session.history()) or 'nothing yet'}\n\n"
+                "Choose edit type:\n\n1. Delete Pages\n2. Rotate Pages\n3. Extract Pages\n4. Add Text\n"
+                "5. Undo\n6. Redo\n7. Save and Finish",
+                minvalue=1, maxvalue=7
             )
             
-            if position_choice == 'yes':
-                # Use visual position selector
-                position = pdf_text_position_selector(pdf_path, page, text, size)
-                if position is None:
-                    messagebox.showinfo("Cancelled", "Text addition cancelled")
+            if not choice:
+                if not session.history() or messagebox.askyesno(
+                        "Discard Edits", f"Close without saving {len(session.history())} edit(s)?"):
                     return
-                x, y = position
-            else:
-                # Manual coordinate entry (original method)
-                x = simpledialog.askfloat("X Position", "X position:", minvalue=0)
-                y = simpledialog.askfloat("Y Position", "Y position:", minvalue=0)
-                if None in [x, y]: return
+                continue
             
-            output_file = os.path.join(output_dir, "text_added.pdf")
-            success, msg = editor.add_text_to_pdf(pdf_path, output_file, page, text, x, y, size)
-        
-        messagebox.showinfo("Edit Result", msg)
+            if choice in [1, 2, 3]:
+                page_input = simpledialog.askstring("Page Numbers", 
+                                                  "Enter pages (1-based)\nExamples: 1,3,5  2-5  odd  even  -1 (last)  1-20:2  !4 (exclude)")
+                if not page_input: continue
+                
+                try:
+                    pages = parse_pages(page_input, session.page_count)
+                except PageSelectionError as e:
+                    messagebox.showerror("Error", f"Invalid page selection: {e}")
+                    continue
+            
+            if choice == 1:
+                success, msg = session.apply("delete", pages_to_delete=pages)
+            elif choice == 2:
+                degrees = simpledialog.askinteger("Rotation", "Enter rotation degrees:", 
+                                                initialvalue=90, minvalue=0, maxvalue=360)
+                if degrees is None: continue
+                success, msg = session.apply("rotate", rotate_pages=pages, rotation=degrees)
+            elif choice == 3:
+                success, msg = session.apply("extract", pages_to_extract=pages)
+            elif choice == 4:
+                # Enhanced Add Text functionality with visual positioning
+                text = simpledialog.askstring("Text", "Enter text to add:")
+                if not text: continue
+                
+                total_pages = session.page_count
+                page = simpledialog.askinteger("Page", f"Page number (1-{total_pages}):", 
+                                             minvalue=1, maxvalue=total_pages)
+                if not page: continue
+                
+                # Get font size
+                size = simpledialog.askinteger("Font Size", "Font size:", 
+                                             initialvalue=12, minvalue=6, maxvalue=72)
+                if not size: continue
+                
+                # Ask user for positioning method
+                position_choice = messagebox.askquestion(
+                    "Position Method",
+                    "How would you like to position the text?\n\n" +
+                    "Yes = Click on PDF (Visual)\n" +
+                    "No = Enter coordinates manually"
+                )
+                
+                if position_choice == 'yes':
+                    # Show the page as edited so far
+                    position = pdf_text_position_selector(session.doc, page, text, size)
+                    if position is None:
+                        continue
+                    x, y = position
+                else:
+                    # Manual coordinate entry (original method)
+                    x = simpledialog.askfloat("X Position", "X position:", minvalue=0)
+                    y = simpledialog.askfloat("Y Position", "Y position:", minvalue=0)
+                    if None in [x, y]: continue
+                
+                success, msg = session.apply("add_text", page_number=page, text=text, x=x, y=y, font_size=size)
+            elif choice == 5:
+                success, msg = session.undo()
+            elif choice == 6:
+                success, msg = session.redo()
+            elif choice == 7:
+                output_file = os.path.join(output_dir, "edited_" + os.path.basename(pdf_path))
+                success, msg = session.commit(output_file)
+                messagebox.showinfo("Edit Result", msg)
+                return
+            
+            if not success:
+                messagebox.showerror("Edit Failed", msg)
+            status = msg
     except Exception as e:
         messagebox.showerror("Error", f"Failed to edit PDF: {str(e)}")
+    finally:
+        if session:
+            session.close()
 
 def handle_sign_pdf():
     try:
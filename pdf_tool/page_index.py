@@ -0,0 +1,454 @@
+import hashlib
+import io
+import json
+import mmap
+import os
+import re
+import struct
+import zlib
+
+import fitz  # PyMuPDF
+
+from pdf_objects import inherited_attributes
+
+INDEX_VERSION = 3
+INDEX_SUFFIX = ".pageindex"
+HASH_CHUNK_BYTES = 1024 * 1024
+
+# References that lead back up the page tree (/Parent) or to the page an
+# annotation or structure element sits on (/P) are not followed
+UPWARD_RE = re.compile(rb"/(?:Parent|P)\s*\d+\s+\d+\s+R")
+REFERENCE_RE = re.compile(rb"(\d+)\s+\d+\s+R\b")
+
+OBJECT_HEADER_RE = re.compile(rb"\s*\d+\s+\d+\s+obj\b")
+STREAM_START_RE = re.compile(rb"\bstream(?:\r\n|\n|\r)")
+STREAM_END_RE = re.compile(rb"\s*endstream\s*endobj")
+PARENT_RE = re.compile(rb"/Parent\s*\d+\s+\d+\s+R")
+FIRST_RE = re.compile(rb"/First\s+(\d+)")
+STREAM_RE = re.compile(rb"stream\r?\n")
+FILTER_RE = re.compile(rb"/Filter\s*(\[[^\]]*\]|/\w+)")
+
+# Index tables: a page record is (offset, length) of its entry in the page
+# records; an object record is (kind, generation, first, second), where first
+# and second are the byte offset and length of a SPAN or the object stream
+# number and position of a COMPRESSED object
+PAGE_RECORD = struct.Struct("<QI")
+OBJECT_RECORD = struct.Struct("<BxHQI")
+FREE, SPAN, COMPRESSED = 0, 1, 2
+
+
+class PageIndexError(ValueError):
+    pass
+
+
+def file_fingerprint(pdf_path):
+    """SHA-256 of the whole file"""
+    digest = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_stamp(pdf_path):
+    """[size, modification time in ns]: while it is unchanged, the fingerprint is not recomputed"""
+    stat = os.stat(pdf_path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def default_index_dir():
+    """Per-user cache directory the page indexes are kept in unless another index_dir is given"""
+    base = os.environ.get("LOCALAPPDATA") if os.name == "nt" else os.environ.get("XDG_CACHE_HOME")
+    return os.path.join(base or os.path.join(os.path.expanduser("~"), ".cache"), "pdf_tool", "page_index")
+
+
+def index_path_for(pdf_path, index_dir=None):
+    """The index file for pdf_path in index_dir (default: default_index_dir()), named by the PDF's path"""
+    name = hashlib.sha256(os.path.normcase(os.path.abspath(pdf_path)).encode("utf-8", "surrogatepass"))
+    return os.path.join(index_dir or default_index_dir(), name.hexdigest()[:32] + INDEX_SUFFIX)
+
+
+class PageIndex:
+    """
+    Random-access index of a PDF for copying out single pages.
+
+    For every page it records the page object and its resource closure (every
+    object reachable from the page, not following /Parent or /P and not
+    entering other pages), and for every object where it sits in the file: a
+    byte span, or a slot in an object stream. Building it parses the whole
+    file once; write_pages() then copies the objects of the pages asked for
+    byte for byte into a new file.
+
+    The index file is a one-line JSON header followed by fixed-size binary
+    tables, so a lookup is a seek: a page table of (offset, length) records
+    pointing into the per-page records, and an object table with one
+    OBJECT_RECORD per object number. Nothing is read for pages not extracted.
+
+    An index is tied to the content it was built from by the SHA-256 of the
+    whole file, checked again whenever the file's size or modification time
+    differ from when it was indexed.
+    """
+
+    def __init__(self, index_path, header):
+        self.index_path = index_path
+        self.header = header
+        self.fingerprint = header["fingerprint"]
+        self.page_count = header["pages"]
+
+    @classmethod
+    def open(cls, pdf_path, index_dir=None):
+        """Load the stored index if it matches the file, otherwise build and store a new one"""
+        index_path = index_path_for(pdf_path, index_dir)
+        return cls.load(index_path, pdf_path) or cls.build(pdf_path, index_path)
+
+    @classmethod
+    def load(cls, index_path, pdf_path):
+        """The index stored at index_path, or None if it is missing, outdated or for other content than pdf_path"""
+        try:
+            with open(index_path, "rb") as f:
+                header = json.loads(f.readline())
+        except (OSError, ValueError):
+            return None
+        if header.get("version") != INDEX_VERSION:
+            return None
+        index = cls(index_path, header)
+        if header.get("stamp") == file_stamp(pdf_path):
+            return index
+        # Touched or copied, but possibly the same content
+        if header.get("fingerprint") != file_fingerprint(pdf_path):
+            return None
+        index._restamp(pdf_path)
+        return index
+
+    def matches(self, pdf_path):
+        """True if pdf_path still holds the content this index was built from"""
+        return file_stamp(pdf_path) == self.header["stamp"] or file_fingerprint(pdf_path) == self.fingerprint
+
+    def _restamp(self, pdf_path):
+        """Store the file's current stamp, so the next load skips hashing again"""
+        self.header["stamp"] = file_stamp(pdf_path)
+        try:
+            with open(self.index_path, "rb") as f:
+                f.readline()
+                tables = f.read()
+            _write_index(self.index_path, self.header, [tables])
+        except (OSError, PageIndexError):
+            pass  # the index stays usable, it is only hashed again next time
+
+    @classmethod
+    def build(cls, pdf_path, index_path):
+        try:
+            doc = fitz.open(pdf_path)
+        except RuntimeError as e:
+            raise PageIndexError(f"Cannot open {pdf_path}: {e}")
+        try:
+            # Files with an empty user password open decrypted, so check the trailer
+            if not doc.is_pdf or doc.xref_get_key(-1, "Encrypt")[0] != "null":
+                raise PageIndexError("Only unencrypted PDF files can be indexed")
+            pdf = fitz.mupdf.pdf_document_from_fz_document(doc.this)
+            page_numbers = [doc.page_xref(i) for i in range(len(doc))]
+            if not page_numbers:
+                raise PageIndexError("The document has no pages")
+            page_set = set(page_numbers)
+            reachable = {}
+            inherited = {}
+
+            pages = []
+            needed = set(page_set)
+            for num in page_numbers:
+                closure = set()
+                inherit = ""
+                for key, value in inherited_attributes(doc, num, inherited).items():
+                    if doc.xref_get_key(num, key)[0] == "null":
+                        inherit += f"/{key} {value} "
+                        _collect(doc, value, closure, reachable, page_set)
+                _collect(doc, doc.xref_object(num, compressed=True), closure, reachable, page_set)
+
+                closure.discard(num)
+                needed.update(closure)
+                pages.append((num, _xref_entry(pdf, num).gen, closure, inherit))
+
+            objects = _locate_objects(doc, pdf, pdf_path, needed)
+            xref_length = doc.xref_length()
+        finally:
+            doc.close()
+        if not page_set <= objects.keys():
+            raise PageIndexError("Page objects missing from the cross-reference table")
+        # References to objects missing from the file are null, so they are left out
+        page_records = [json.dumps([num, generation, sorted(closure & objects.keys()), inherit],
+                                   separators=(",", ":")).encode()
+                        for num, generation, closure, inherit in pages]
+        with open(pdf_path, "rb") as f:
+            pdf_header = f.readline().strip()[:8].decode("latin-1")
+
+        object_table = bytearray(OBJECT_RECORD.size * (max(objects) + 1))
+        for num, record in objects.items():
+            OBJECT_RECORD.pack_into(object_table, num * OBJECT_RECORD.size, *record)
+        page_table = io.BytesIO()
+        position = 0
+        for record in page_records:
+            page_table.write(PAGE_RECORD.pack(position, len(record)))
+            position += len(record)
+
+        header = {
+            "version": INDEX_VERSION,
+            "fingerprint": file_fingerprint(pdf_path),
+            "stamp": file_stamp(pdf_path),
+            "pdf_header": pdf_header if pdf_header.startswith("%PDF-") else "%PDF-1.7",
+            "pages": len(page_records),
+            "objects": max(objects) + 1,
+            # Copied objects keep references to objects not copied (a field's
+            # /Parent, say), so new objects are numbered past all of the source's
+            "xref_length": xref_length,
+        }
+        tables = [page_table.getvalue(), bytes(object_table)]
+        # Section offsets are counted from the end of the header line
+        header["page_table"], header["object_table"] = 0, len(tables[0])
+        header["page_records"] = len(tables[0]) + len(tables[1])
+
+        _write_index(index_path, header, tables + page_records)
+        return cls(index_path, header)
+
+    def write_pages(self, pdf_path, page_indexes, output_path):
+        """Copy the pages at the given 0-based indexes, in that order, into a new PDF"""
+        invalid = [index for index in page_indexes if not 0 <= index < self.page_count]
+        if invalid:
+            raise PageIndexError(f"Page index(es) {invalid} outside the document (0-{self.page_count - 1})")
+        if len(set(page_indexes)) != len(page_indexes):
+            raise PageIndexError("Repeated pages need a full rewrite")
+        if not self.matches(pdf_path):
+            raise PageIndexError("The file changed since it was indexed")
+
+        with open(self.index_path, "rb") as index_file:
+            base = len(index_file.readline())
+            pages = [self._page_record(index_file, base, index) for index in page_indexes]
+            page_objects = {page[0]: page for page in pages}
+            needed = {num for page in pages for num in page[2]} | page_objects.keys()
+            locations = {num: self._object_record(index_file, base, num) for num in needed}
+            for kind, _, stream_num, _ in list(locations.values()):
+                if kind == COMPRESSED and stream_num not in locations:
+                    locations[stream_num] = self._object_record(index_file, base, stream_num)
+
+        objects = sorted(needed - page_objects.keys())
+        pages_num = self.header["xref_length"]
+        catalog_num = pages_num + 1
+        offsets = {}
+
+        with open(pdf_path, "rb") as source, open(output_path, "wb") as out:
+            out.write(self.header["pdf_header"].encode("latin-1") + b"\n%\xe2\xe3\xcf\xd3\n")
+            object_streams = {}
+
+            def read_compressed(stream_num, position):
+                # Each object stream is decoded once
+                if stream_num not in object_streams:
+                    kind, _, offset, length = locations[stream_num]
+                    if kind != SPAN:
+                        raise PageIndexError(f"Object stream {stream_num} is not in the index")
+                    object_streams[stream_num] = _decode_object_stream(_read_span(source, offset, length))
+                return object_streams[stream_num][position]
+
+            for num in objects:
+                kind, generation, first, second = locations[num]
+                offsets[num] = (out.tell(), generation)
+                if kind == SPAN:
+                    out.write(_read_span(source, first, second))
+                else:
+                    out.write(f"{num} 0 obj\n".encode() + read_compressed(first, second) + b"\nendobj\n")
+
+            for num, generation, _, inherit in pages:
+                kind, _, first, second = locations[num]
+                if kind == SPAN:
+                    raw = _read_span(source, first, second)
+                    body = raw[OBJECT_HEADER_RE.match(raw).end():raw.rindex(b"endobj")]
+                else:
+                    body = read_compressed(first, second)
+                body = body.strip()
+                if not (body.startswith(b"<<") and body.endswith(b">>")):
+                    raise PageIndexError(f"Page object {num} is not a dictionary")
+                body = PARENT_RE.sub(b"", body, count=1)
+                # Added last, so they also replace keys the page sets to null
+                extra = f"/Parent {pages_num} 0 R {inherit}".encode("latin-1")
+                offsets[num] = (out.tell(), generation)
+                out.write(f"{num} {generation} obj\n".encode() + body[:-2] + extra + b">>\nendobj\n")
+
+            kids = " ".join(f"{num} {generation} R" for num, generation, _, _ in pages)
+            offsets[pages_num] = (out.tell(), 0)
+            out.write(f"{pages_num} 0 obj\n<</Type/Pages/Kids[{kids}]/Count {len(pages)}>>\nendobj\n".encode())
+            offsets[catalog_num] = (out.tell(), 0)
+            out.write(f"{catalog_num} 0 obj\n<</Type/Catalog/Pages {pages_num} 0 R>>\nendobj\n".encode())
+
+            xref_offset = out.tell()
+            out.write(_xref_table(offsets))
+            out.write(f"trailer\n<</Size {catalog_num + 1}/Root {catalog_num} 0 R>>\n"
+                      f"startxref\n{xref_offset}\n%%EOF\n".encode())
+
+    def _page_record(self, index_file, base, index):
+        """[object number, generation, closure, inherited attributes] of page index"""
+        index_file.seek(base + self.header["page_table"] + index * PAGE_RECORD.size)
+        position, length = PAGE_RECORD.unpack(index_file.read(PAGE_RECORD.size))
+        index_file.seek(base + self.header["page_records"] + position)
+        return json.loads(index_file.read(length))
+
+    def _object_record(self, index_file, base, num):
+        if num >= self.header["objects"]:
+            raise PageIndexError(f"Object {num} is not in the index")
+        index_file.seek(base + self.header["object_table"] + num * OBJECT_RECORD.size)
+        record = OBJECT_RECORD.unpack(index_file.read(OBJECT_RECORD.size))
+        if record[0] == FREE:
+            raise PageIndexError(f"Object {num} is not in the index")
+        return record
+
+
+def _write_index(index_path, header, sections):
+    """Write the header line and sections to index_path atomically, creating its directory"""
+    temp_path = index_path + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+        with open(temp_path, "wb") as f:
+            f.write(json.dumps(header).encode() + b"\n")
+            f.writelines(sections)
+        os.replace(temp_path, index_path)
+    except OSError as e:
+        raise PageIndexError(f"Cannot store the page index: {e}")
+
+
+def _xref_entry(pdf, num):
+    """
+    MuPDF's cross-reference entry for object num: type "n" is at byte offset
+    ofs, type "o" is in slot gen of object stream ofs. pdf is the document's
+    fitz.mupdf.PdfDocument.
+    """
+    return fitz.mupdf.ll_pdf_get_xref_entry_no_null(pdf.m_internal, num)
+
+
+def _references(text):
+    """Object numbers referenced in PDF object syntax, except through UPWARD_KEYS"""
+    return [int(num) for num in REFERENCE_RE.findall(UPWARD_RE.sub(b"", text.encode("latin-1")))]
+
+
+def _collect(doc, text, closure, reachable, page_set):
+    """Add the objects reachable from object syntax text to closure, caching per referenced object"""
+    for num in _references(text):
+        if num in page_set or num in closure:
+            continue
+        if num not in reachable:
+            reachable[num] = _reachable_from(doc, num, page_set)
+        closure.update(reachable[num])
+
+
+def _reachable_from(doc, start, page_set):
+    """Object numbers reachable from object start (itself included), not entering pages or page tree nodes"""
+    found = set()
+    stack = [start]
+    last = doc.xref_length()
+    while stack:
+        num = stack.pop()
+        if num in page_set or num in found or not 0 < num < last:
+            continue
+        if doc.xref_get_key(num, "Type") == ("name", "/Pages"):
+            continue
+        found.add(num)
+        stack.extend(_references(doc.xref_object(num, compressed=True)))
+    return found
+
+
+def _locate_objects(doc, pdf, pdf_path, needed):
+    """
+    Object records (see OBJECT_RECORD) for the objects in needed that exist in
+    the file and the object streams holding them
+    """
+    records = {}
+    for num in needed:
+        entry = _xref_entry(pdf, num)
+        if entry.type == "n":
+            records[num] = [SPAN, entry.gen, entry.ofs, 0]
+        elif entry.type == "o":
+            records[num] = [COMPRESSED, 0, entry.ofs, entry.gen]
+    streams = {stream_num for kind, _, stream_num, _ in records.values() if kind == COMPRESSED}
+    for num in streams - records.keys():
+        entry = _xref_entry(pdf, num)
+        if entry.type != "n":
+            raise PageIndexError(f"Object stream {num} is not in the file")
+        records[num] = [SPAN, entry.gen, entry.ofs, 0]
+
+    with open(pdf_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        for num, record in records.items():
+            if record[0] == SPAN:
+                record[3] = _object_length(doc, data, num, record[2])
+    return records
+
+
+def _object_length(doc, data, num, offset):
+    """
+    Length of object num at offset, up to its own "endobj". Streams are
+    skipped by their /Length, so neither stream data nor older copies of
+    objects left behind by incremental updates end up in the span.
+    """
+    header = OBJECT_HEADER_RE.match(data, offset)
+    if not header:
+        raise PageIndexError(f"Object {num} is not where the cross-reference table says")
+    end = header.end()
+    if doc.xref_is_stream(num):
+        stream = STREAM_START_RE.search(data, end)
+        stream_end = STREAM_END_RE.match(data, stream.end() + _stream_length(doc, num)) if stream else None
+        if not stream_end:
+            raise PageIndexError(f"Stream {num} does not end where its /Length says")
+        return stream_end.end() - offset
+    end = data.find(b"endobj", end)
+    if end < 0:
+        raise PageIndexError(f"Object {num} has no endobj")
+    return end + len(b"endobj") - offset
+
+
+def _stream_length(doc, num):
+    kind, value = doc.xref_get_key(num, "Length")
+    if kind == "xref":
+        value = doc.xref_object(int(value.split()[0]), compressed=True)
+    try:
+        return int(value)
+    except ValueError:
+        raise PageIndexError(f"Stream {num} has no valid /Length")
+
+
+def _read_span(source, offset, length):
+    source.seek(offset)
+    return source.read(length).rstrip() + b"\n"
+
+
+def _decode_object_stream(raw):
+    """Split a Flate-compressed object stream into the texts of the objects it holds"""
+    stream = STREAM_RE.search(raw)
+    first = FIRST_RE.search(raw[:stream.start()]) if stream else None
+    if first is None:
+        raise PageIndexError("Malformed object stream")
+    dictionary = raw[:stream.start()]
+    filter_entry = FILTER_RE.search(dictionary)
+    filters = re.findall(rb"/(\w+)", filter_entry.group(1)) if filter_entry else []
+    if filters not in ([], [b"FlateDecode"]) or b"/DecodeParms" in dictionary:
+        raise PageIndexError("Unsupported object stream filter")
+
+    data = raw[stream.end():raw.rindex(b"endstream")]
+    if filters:
+        data = zlib.decompressobj().decompress(data)
+    first = int(first.group(1))
+    header = data[:first].split()
+    positions = [int(value) for value in header[1::2]]
+    ends = positions[1:] + [len(data) - first]
+    return [data[first + start:first + end].strip() for start, end in zip(positions, ends)]
+
+
+def _xref_table(offsets):
+    """Cross-reference table with one subsection per run of consecutive object numbers"""
+    lines = [b"xref\n0 1\n0000000000 65535 f \n"]
+    numbers = sorted(offsets)
+    start = 0
+    while start < len(numbers):
+        end = start
+        while end + 1 < len(numbers) and numbers[end + 1] == numbers[end] + 1:
+            end += 1
+        lines.append(f"{numbers[start]} {end - start + 1}\n".encode())
+        for num in numbers[start:end + 1]:
+            offset, generation = offsets[num]
+            lines.append(f"{offset:010d} {generation:05d} n \n".encode())
+        start = end + 1
+    return b"".join(lines)
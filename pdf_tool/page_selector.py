@@ -0,0 +1,182 @@
+import re
+from itertools import compress
+
+# One page reference: 1-based number, negative number counted from the end, or "end"
+INDEX = r"(-?\d+|end)"
+SINGLE_RE = re.compile(rf"^{INDEX}$")
+RANGE_RE = re.compile(rf"^{INDEX}\s*-\s*{INDEX}?$")
+
+
+class PageSelectionError(ValueError):
+    pass
+
+
+class PageSelection:
+    """
+    A compiled page selection such as "1-10:2, -1, odd, !5".
+
+    Comma-separated terms, all 1-based:
+        7          a single page
+        -1, end    counting from the end (-1 and end are the last page)
+        3-9, 4-    an inclusive range; an open end runs to the last page
+        1-20:3     a range with a step (1, 4, 7, ...)
+        1-20:odd   odd or even pages within a range
+        odd, even, all
+        !term      exclude the pages matched by term
+    If only exclusions are given, they are taken away from all pages.
+
+    The spec is parsed once; mask() then evaluates it for a page count with
+    slice assignments on a bytearray, linear in the number of pages.
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.terms = [_compile_term(term.strip()) for term in spec.split(",") if term.strip()]
+        if not self.terms:
+            raise PageSelectionError("Empty page selection")
+
+    def mask(self, total_pages):
+        """bytearray with 1 at every selected 0-based page index"""
+        has_includes = any(not exclude for exclude, *_ in self.terms)
+        selected = bytearray(total_pages) if has_includes else bytearray(b"\x01" * total_pages)
+        # Exclusions win regardless of their position in the spec
+        for exclude_pass in (False, True):
+            fill = 0 if exclude_pass else 1
+            for exclude, start, stop, step, parity in self.terms:
+                if exclude != exclude_pass:
+                    continue
+                first, last = _resolve(start, total_pages), _resolve(stop, total_pages)
+                if first > last:
+                    first, last = last, first
+                if parity is not None:
+                    # Odd pages (1-based) are the even 0-based indexes
+                    if first % 2 != parity:
+                        first += 1
+                    step = 2
+                count = len(range(first, last + 1, step))
+                selected[first:last + 1:step] = bytes([fill]) * count
+        return selected
+
+    def indexes(self, total_pages):
+        """Sorted 0-based indexes of the selected pages"""
+        return list(compress(range(total_pages), self.mask(total_pages)))
+
+
+def _compile_term(term):
+    exclude = term.startswith("!")
+    body = term[1:].strip() if exclude else term
+    body, _, modifier = body.partition(":")
+    body, modifier = body.strip().lower(), modifier.strip().lower()
+
+    if body in ("odd", "even", "all"):
+        if modifier:
+            raise PageSelectionError(f"'{body}' takes no modifier: {term}")
+        parity = {"odd": 0, "even": 1, "all": None}[body]
+        return exclude, 1, "end", 1, parity
+
+    single = SINGLE_RE.match(body)
+    if single:
+        if modifier:
+            raise PageSelectionError(f"A single page takes no modifier: {term}")
+        return exclude, _parse_index(single.group(1)), _parse_index(single.group(1)), 1, None
+
+    match = RANGE_RE.match(body)
+    if not match:
+        raise PageSelectionError(f"Invalid page selection: {term}")
+    start = _parse_index(match.group(1))
+    stop = _parse_index(match.group(2)) if match.group(2) else "end"
+
+    step, parity = 1, None
+    if modifier in ("odd", "even"):
+        parity = 0 if modifier == "odd" else 1
+    elif modifier:
+        if not modifier.isdigit() or int(modifier) < 1:
+            raise PageSelectionError(f"Invalid step in: {term}")
+        step = int(modifier)
+    return exclude, start, stop, step, parity
+
+
+def _parse_index(text):
+    if text == "end":
+        return text
+    value = int(text)
+    if value == 0:
+        raise PageSelectionError("Page numbers start at 1")
+    return value
+
+
+def _resolve(index, total_pages):
+    """Turn a 1-based, negative or 'end' page reference into a 0-based index"""
+    if index == "end":
+        position = total_pages - 1
+    elif index < 0:
+        position = total_pages + index
+    else:
+        position = index - 1
+    if position < 0 or position >= total_pages:
+        raise PageSelectionError(f"Page {index} is outside the document (1-{total_pages})")
+    return position
+
+
+def parse_pages(spec, total_pages):
+    """Sorted 0-based page indexes selected by spec"""
+    return PageSelection(spec).indexes(total_pages)
+
+
+def parse_page_order(spec, total_pages):
+    """
+    0-based indexes in the order spec lists them, for reordering pages. Unlike
+    a selection, repeats are kept and a range whose start lies after its end
+    runs backwards ("end-1" reverses the document). Exclusions are not allowed.
+    """
+    order = []
+    for term in (term.strip() for term in spec.split(",")):
+        if not term:
+            continue
+        exclude, start, stop, step, parity = _compile_term(term)
+        if exclude:
+            raise PageSelectionError(f"A page order cannot exclude pages: {term}")
+        first, last = _resolve(start, total_pages), _resolve(stop, total_pages)
+        direction = 1 if last >= first else -1
+        indexes = range(first, last + direction, direction)
+        if parity is not None:
+            order.extend(index for index in indexes if index % 2 == parity)
+        else:
+            order.extend(indexes[::step])
+    if not order:
+        raise PageSelectionError("Empty page order")
+    return order
+
+
+def resolve_pages(pages, total_pages):
+    """
+    Accept either a selection string or an iterable of 0-based indexes.
+    Indexes outside the document raise PageSelectionError, as pages in a
+    selection string do.
+    """
+    if isinstance(pages, str):
+        return parse_pages(pages, total_pages)
+    return _check_indexes(list(pages), total_pages)
+
+
+def page_mask(indexes, total_pages):
+    """bytearray membership mask for a list of 0-based indexes (O(1) lookups)"""
+    mask = bytearray(total_pages)
+    for index in indexes:
+        if 0 <= index < total_pages:
+            mask[index] = 1
+    return mask
+
+
+def resolve_page_order(order, total_pages):
+    """Like resolve_pages, but keeps the order and repeats of a page order"""
+    if isinstance(order, str):
+        return parse_page_order(order, total_pages)
+    return _check_indexes(list(order), total_pages)
+
+
+def _check_indexes(indexes, total_pages):
+    invalid = [index for index in indexes if not 0 <= index < total_pages]
+    if invalid:
+        raise PageSelectionError(f"Page index(es) {invalid} outside the document (0-{total_pages - 1})")
+    return indexes
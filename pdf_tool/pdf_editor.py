@@ -1,19 +1,56 @@
 import os
+import re
+import shutil
+import unicodedata
+import zlib
+from datetime import datetime
+
 import fitz  # PyMuPDF
 from pypdf import PdfReader, PdfWriter
 
+from content_stream import paints_anything
+from page_index import PageIndex, PageIndexError, index_path_for
+from page_selector import PageSelectionError, page_mask, parse_pages, resolve_page_order, resolve_pages
+from pdf_objects import add_stream_object, append_page_content, set_page_order, set_page_resource
+from worker_pool import imap_ordered, imap_unordered, open_worker_document, worker_document
+
+# NumPy is only needed to score rendered pages in remove_blank_pages
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Text extraction for redact_pdf: MuPDF's defaults without TEXT_PRESERVE_LIGATURES,
+# so a ligature glyph such as "\ufb01" comes out as its letters and plain terms match
+REDACT_TEXT_FLAGS = fitz.TEXT_PRESERVE_WHITESPACE | fitz.TEXT_MEDIABOX_CLIP
+# extract_pages builds a page index by default from this file size on
+INDEX_MIN_BYTES = 32 * 1024 * 1024
+STAMP_FONT = "FStamp"
+WATERMARK_NAME = "FWatermark"
+WATERMARK_STATE = "FWatermarkGS"
+# Anchor of the watermark within the page margins, as fractions of the free space
+WATERMARK_POSITIONS = {
+    "center": (0.5, 0.5), "top": (0.5, 0), "bottom": (0.5, 1), "left": (0, 0.5), "right": (1, 0.5),
+    "top-left": (0, 0), "top-right": (1, 0), "bottom-left": (0, 1), "bottom-right": (1, 1),
+}
+
 
 class PDFEditor:
     def __init__(self):
         pass
 
+    # Page arguments are lists of 0-based indexes or page selection strings ("1-5, !3, -1")
+
     def delete_pages(self, input_pdf, output_pdf, pages_to_delete):
         reader = PdfReader(input_pdf)
         writer = PdfWriter()
         total_pages = len(reader.pages)
+        pages_to_delete = resolve_pages(pages_to_delete, total_pages)
+        deleted = page_mask(pages_to_delete, total_pages)
 
         for i in range(total_pages):
-            if i not in pages_to_delete:
+            if not deleted[i]:
                 writer.add_page(reader.pages[i])
 
         with open(output_pdf, "wb") as f:
@@ -21,23 +58,99 @@ class PDFEditor:
 
         return True, f"Deleted pages {pages_to_delete} and saved to: {output_pdf}"
 
-    def rotate_pages(self, input_pdf, output_pdf, rotate_pages, rotation=90):
+    def rotate_pages(self, input_pdf, output_pdf, rotate_pages, rotation=90, incremental=False):
+        """
+        incremental=True appends an update holding only the changed page
+        dictionaries instead of rewriting the file, so the cost does not depend
+        on document size. That holds when output_pdf is input_pdf (rotate in
+        place); for any other output the whole input is byte-copied first, which
+        is still cheaper than a rewrite but reads and writes every byte. A file
+        with other hard links (such as a hardlinked ResultCache entry) is
+        replaced by its own copy before the update, so the linked files keep
+        their content. Files that cannot take an incremental update (damaged
+        ones MuPDF had to repair) are rewritten in full instead.
+        """
+        if incremental:
+            return self._rotate_incrementally(input_pdf, output_pdf, rotate_pages, rotation)
+
         reader = PdfReader(input_pdf)
         writer = PdfWriter()
+        rotate_pages = resolve_pages(rotate_pages, len(reader.pages))
+        rotated = page_mask(rotate_pages, len(reader.pages))
 
         for i, page in enumerate(reader.pages):
-            if i in rotate_pages:
+            if rotated[i]:
                 page.rotate(rotation)
             writer.add_page(page)
 
+        # PdfReader has the input in memory, so the output may replace it
         with open(output_pdf, "wb") as f:
             writer.write(f)
 
         return True, f"Rotated pages {rotate_pages} by {rotation} degrees and saved to: {output_pdf}"
 
-    def extract_pages(self, input_pdf, output_pdf, pages_to_extract):
+    def _rotate_incrementally(self, input_pdf, output_pdf, rotate_pages, rotation):
+        if rotation % 90:
+            raise ValueError("Rotation must be a multiple of 90 degrees")
+        same_file = os.path.abspath(input_pdf) == os.path.abspath(output_pdf)
+
+        doc = fitz.open(input_pdf)
+        try:
+            rotate_pages = resolve_pages(rotate_pages, len(doc))
+            in_place = doc.can_save_incrementally()
+            if in_place and (not same_file or os.stat(input_pdf).st_nlink > 1):
+                # Rotate a byte copy instead of the original or a file shared through hard links
+                doc.close()
+                _replace_with_copy(input_pdf, output_pdf)
+                doc = fitz.open(output_pdf)
+
+            for i in set(rotate_pages):
+                page = doc[i]
+                page.set_rotation((page.rotation + rotation) % 360)
+
+            size_before = os.path.getsize(output_pdf) if in_place else 0
+            if in_place:
+                doc.save(output_pdf, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP)
+            else:
+                # MuPDF repaired this file while opening it, so write a clean one
+                temp_path = output_pdf + ".tmp"
+                doc.save(temp_path, garbage=1)
+        finally:
+            doc.close()
+
+        if not in_place:
+            os.replace(temp_path, output_pdf)
+            return True, f"Rotated pages {rotate_pages} by {rotation} degrees (file rewritten) and saved to: {output_pdf}"
+
+        appended = os.path.getsize(output_pdf) - size_before
+        return True, (f"Rotated pages {rotate_pages} by {rotation} degrees in place "
+                      f"({appended} bytes appended) and saved to: {output_pdf}")
+
+    def extract_pages(self, input_pdf, output_pdf, pages_to_extract, use_index=None, index_dir=None):
+        """
+        use_index copies the pages through a PageIndex (see page_index.py), which
+        reads only the objects the pages need. The index is built on first use
+        and stored in a per-user cache directory (or in index_dir), so repeated
+        extractions from a large file cost time in proportion to the pages
+        extracted. None uses it for files of INDEX_MIN_BYTES or more and
+        whenever an index exists.
+        Anything the index cannot handle falls back to a full rewrite.
+        """
+        if use_index is None:
+            use_index = (os.path.getsize(input_pdf) >= INDEX_MIN_BYTES
+                         or os.path.exists(index_path_for(input_pdf, index_dir)))
+        if use_index and os.path.abspath(input_pdf) != os.path.abspath(output_pdf):
+            try:
+                index = PageIndex.open(input_pdf, index_dir)
+                pages = resolve_pages(pages_to_extract, index.page_count)
+                index.write_pages(input_pdf, pages, output_pdf)
+                return True, f"Extracted pages {pages} (via page index) to: {output_pdf}"
+            except PageIndexError:
+                pass
+
         reader = PdfReader(input_pdf)
         writer = PdfWriter()
+        pages_to_extract = resolve_pages(pages_to_extract, len(reader.pages))
 
         for i in pages_to_extract:
             writer.add_page(reader.pages[i])
@@ -47,6 +160,43 @@ class PDFEditor:
 
         return True, f"Extracted pages {pages_to_extract} to: {output_pdf}"
 
+    # Reordering only rewrites the page tree (see pdf_objects.set_page_order):
+    # no page content is copied and the file is saved once.
+
+    def reorder_pages(self, input_pdf, output_pdf, order):
+        """Save the pages in a new order such as "3,1,2,4-end" or [2, 0, 1]; pages may repeat or be left out"""
+        return self._save_page_order(input_pdf, output_pdf, "Reordered", self._reorder_pages_in, order=order)
+
+    def reverse_pages(self, input_pdf, output_pdf):
+        return self._save_page_order(input_pdf, output_pdf, "Reversed", self._reverse_pages_in)
+
+    def interleave_pages(self, input_pdf, output_pdf, backs_pdf=None, reverse_backs=True):
+        """
+        Merge duplex scans into front 1, back 1, front 2, back 2, ...
+        Without backs_pdf the first half of input_pdf is the fronts and the second
+        half the backs. reverse_backs is for backs scanned by turning the whole
+        stack over, which feeds them last page first.
+        """
+        return self._save_page_order(input_pdf, output_pdf, "Interleaved", self._interleave_pages_in,
+                                     backs_pdf=backs_pdf, reverse_backs=reverse_backs)
+
+    def duplicate_pages(self, input_pdf, output_pdf, pages, copies=2):
+        """Repeat each selected page copies times in a row"""
+        return self._save_page_order(input_pdf, output_pdf, "Duplicated", self._duplicate_pages_in,
+                                     pages=pages, copies=copies)
+
+    def _save_page_order(self, input_pdf, output_pdf, action, handler, **options):
+        doc = fitz.open(input_pdf)
+        try:
+            handler(doc, **options)
+            page_count = len(doc)
+            # garbage=1 drops pages left out of the new order
+            doc.save(output_pdf, garbage=1, deflate=True)
+        finally:
+            doc.close()
+
+        return True, f"{action} pages ({page_count} in the output) and saved to: {output_pdf}"
+
     def add_text_to_pdf(self, input_pdf, output_pdf, page_number, text, x, y, font_size=12):
         try:
             doc = fitz.open(input_pdf)
@@ -63,6 +213,651 @@ class PDFEditor:
         except Exception as e:
             return False, f"Failed to add text: {str(e)}"
 
+    def stamp_pages(self, input_pdf, output_pdf, header=None, footer=None, pages=None, font_size=10,
+                    margin=36, align="center", bates_prefix="", bates_start=1, bates_digits=6,
+                    date_format="%Y-%m-%d", fontfile=None, color=(0, 0, 0)):
+        """
+        Stamp a header and/or footer on many pages in one pass (e.g. Bates numbering).
+
+        header and footer are templates with {page}, {total}, {filename}, {date}
+        and {bates} (bates_prefix + bates_start counted up over the stamped pages,
+        zero-padded to bates_digits), e.g. footer="{bates}", align="right".
+        align is "left", "center" or "right". The font (Helvetica, or the TrueType
+        fontfile) is added to the file once and shared by every page, stamps stay
+        upright on rotated pages, and the document is saved once.
+        """
+        try:
+            if not header and not footer:
+                return False, "Nothing to stamp: give a header and/or footer template"
+            if align not in ("left", "center", "right"):
+                return False, f"Invalid alignment: {align}"
+
+            doc = fitz.open(input_pdf)
+            try:
+                total = len(doc)
+                indexes = resolve_pages(pages, total) if pages is not None else range(total)
+                values = {
+                    "total": total,
+                    "filename": os.path.basename(input_pdf),
+                    "date": datetime.now().strftime(date_format),
+                }
+                font = fitz.Font(fontfile=fontfile) if fontfile else fitz.Font("helv")
+                font_ref = None
+                r, g, b = color
+                # One q stream wrapping each page's own content, shared by all pages
+                shared_streams = {}
+
+                # Look up every page and its xref before the first change: once the
+                # document is modified, each lookup walks the page tree again
+                stamped = [(doc[index], doc.page_xref(index)) for index in indexes]
+
+                for number, (page, page_xref) in enumerate(stamped):
+                    index = page.number
+                    values["page"] = index + 1
+                    values["bates"] = f"{bates_prefix}{bates_start + number:0{bates_digits}d}"
+
+                    if font_ref is None:
+                        font_ref = self._add_stamp_font(doc, page, fontfile)
+                    else:
+                        set_page_resource(doc, page, "Font", STAMP_FONT, font_ref, page_xref)
+
+                    content = []
+                    for template, at_top in ((header, True), (footer, False)):
+                        if template:
+                            text = template.format_map(values)
+                            content.append(self._stamp_operators(page, font, text, font_size, margin,
+                                                                 align, at_top, fontfile is not None))
+                    fill = " ".join(_pdf_number(c) for c in (r, g, b))
+                    stream = f"q {fill} rg BT " + " ".join(content) + " ET Q"
+                    append_page_content(doc, page, stream.encode("latin-1"), page_xref=page_xref,
+                                        shared=shared_streams)
+
+                doc.save(output_pdf, deflate=True)
+            finally:
+                doc.close()
+
+            return True, f"Stamped {len(indexes)} page(s) and saved to: {output_pdf}"
+        except KeyError as e:
+            return False, f"Unknown template field: {e}"
+        except Exception as e:
+            return False, f"Failed to stamp pages: {str(e)}"
+
+    def _add_stamp_font(self, doc, page, fontfile):
+        """Create the shared stamp font on the first stamped page; returns its reference"""
+        if fontfile:
+            xref = page.insert_font(fontname=STAMP_FONT, fontfile=fontfile)
+        else:
+            xref = doc.get_new_xref()
+            doc.update_object(xref, "<</Type/Font/Subtype/Type1/BaseFont/Helvetica/Encoding/WinAnsiEncoding>>")
+            set_page_resource(doc, page, "Font", STAMP_FONT, f"{xref} 0 R")
+        return f"{xref} 0 R"
+
+    def _stamp_operators(self, page, font, text, font_size, margin, align, at_top, glyph_ids):
+        """Text operators placing one line of text at the top or bottom of the page as displayed"""
+        width = font.text_length(text, fontsize=font_size)
+        view = page.rect  # page as displayed: rotated, y pointing down
+        if align == "left":
+            x = view.x0 + margin
+        elif align == "right":
+            x = view.x1 - margin - width
+        else:
+            x = (view.x0 + view.x1 - width) / 2
+        y = view.y0 + margin + font_size if at_top else view.y1 - margin
+
+        # Map the display position and direction back into PDF user space
+        to_pdf = ~(page.transformation_matrix * page.rotation_matrix)
+        origin = fitz.Point(x, y) * to_pdf
+        right = fitz.Point(x + 1, y) * to_pdf - origin
+        up = fitz.Point(x, y - 1) * to_pdf - origin
+
+        if glyph_ids:
+            # insert_font embeds TrueType fonts with Identity-H: two-byte glyph ids
+            encoded = "<" + "".join(f"{font.has_glyph(ord(c)):04x}" for c in text) + ">"
+        else:
+            raw = text.encode("cp1252", errors="replace")
+            encoded = "(" + "".join(
+                "\\" + chr(c) if c in b"()\\" else chr(c) if 32 <= c < 127 else f"\\{c:03o}" for c in raw) + ")"
+        matrix = " ".join(_pdf_number(v) for v in (right.x, right.y, up.x, up.y, origin.x, origin.y))
+        return f"/{STAMP_FONT} {_pdf_number(font_size)} Tf {matrix} Tm {encoded} Tj"
+
+    def watermark_pages(self, input_pdf, output_pdf, watermark, pages=None, opacity=0.3, rotation=0,
+                        position="center", scale=0.5, margin=36, behind=False, watermark_page=1):
+        """
+        Put a logo or PDF page on many pages, stored once as a form XObject.
+
+        watermark is an image file or a PDF (its page watermark_page, 1-based).
+        The overlay is scaled to fit scale times the page size, turned by rotation
+        degrees counterclockwise, placed at position (see WATERMARK_POSITIONS)
+        inside margin points and drawn with opacity. behind=True draws it before
+        the page content instead of on top. Pages only refer to the shared overlay,
+        and pages of the same size and rotation share the stream drawing it, so
+        the file grows by the overlay once, whatever the page count.
+        """
+        try:
+            if position not in WATERMARK_POSITIONS:
+                return False, f"Invalid position: {position}"
+            if not 0 < opacity <= 1:
+                return False, f"Opacity must be between 0 and 1: {opacity}"
+            if not 0 < scale <= 1:
+                return False, f"Scale must be between 0 and 1: {scale}"
+
+            overlay = self._open_overlay(watermark)
+            doc = fitz.open(input_pdf)
+            try:
+                if not 1 <= watermark_page <= len(overlay):
+                    return False, f"Invalid watermark page: {watermark_page}"
+                total = len(doc)
+                indexes = resolve_pages(pages, total) if pages is not None else range(total)
+
+                form_ref, form_view, form_to_view = self._add_overlay_form(doc, overlay, watermark_page - 1)
+                state_xref = doc.get_new_xref()
+                doc.update_object(state_xref, f"<</Type/ExtGState/CA {_pdf_number(opacity)}"
+                                              f"/ca {_pdf_number(opacity)}>>")
+
+                # Look up every page and its xref before the first change (see stamp_pages)
+                marked = [(doc[index], doc.page_xref(index)) for index in indexes]
+                # Pages of the same size and rotation draw the overlay with the same stream
+                shared_streams = {}
+
+                for page, page_xref in marked:
+                    matrix = self._overlay_matrix(page, form_view, form_to_view, rotation,
+                                                  WATERMARK_POSITIONS[position], scale, margin)
+                    set_page_resource(doc, page, "XObject", WATERMARK_NAME, form_ref, page_xref)
+                    set_page_resource(doc, page, "ExtGState", WATERMARK_STATE, f"{state_xref} 0 R", page_xref)
+                    cm = " ".join(_pdf_number(v) for v in matrix)
+                    stream = f"q /{WATERMARK_STATE} gs {cm} cm /{WATERMARK_NAME} Do Q"
+                    append_page_content(doc, page, stream.encode(), prepend=behind, page_xref=page_xref,
+                                        shared=shared_streams)
+
+                # garbage=1 drops the page the overlay was copied in with
+                doc.save(output_pdf, garbage=1, deflate=True)
+            finally:
+                doc.close()
+                overlay.close()
+
+            return True, f"Watermarked {len(indexes)} page(s) and saved to: {output_pdf}"
+        except Exception as e:
+            return False, f"Failed to add watermark: {str(e)}"
+
+    def _open_overlay(self, watermark):
+        """The watermark as a PDF document; an image becomes a one-page PDF of its size"""
+        source = fitz.open(watermark)
+        if source.is_pdf:
+            return source
+        try:
+            rect = source[0].rect
+        finally:
+            source.close()
+        overlay = fitz.open()
+        overlay.new_page(width=rect.width, height=rect.height).insert_image(rect, filename=watermark)
+        return overlay
+
+    def _add_overlay_form(self, doc, overlay, page_index):
+        """
+        Copy an overlay page into doc as a form XObject. Returns its reference,
+        the page as displayed (rect) and the form space -> display matrix.
+        """
+        # insert_pdf copies the page and everything it uses; the page itself is
+        # removed again and only its content and resources are kept
+        doc.insert_pdf(overlay, from_page=page_index, to_page=page_index)
+        page = doc[-1]
+        to_view = page.transformation_matrix * page.rotation_matrix
+        view = page.rect
+        bbox = view * ~to_view
+        content = page.read_contents()
+        kind, resources = doc.xref_get_key(page.xref, "Resources")
+        doc.delete_page(-1)
+
+        if kind == "null":
+            resources = "<<>>"
+        data = zlib.compress(content)
+        box = " ".join(_pdf_number(v) for v in bbox)
+        xref = add_stream_object(doc, f"/Type/XObject/Subtype/Form/BBox[{box}]/Resources {resources}"
+                                      f"/Filter/FlateDecode", data)
+        return f"{xref} 0 R", view, to_view
+
+    def _overlay_matrix(self, page, form_view, form_to_view, rotation, anchor, scale, margin):
+        """cm operands drawing the overlay form on page as displayed"""
+        view = page.rect
+        factor = scale * min(view.width / form_view.width, view.height / form_view.height)
+        width, height = form_view.width * factor, form_view.height * factor
+        turn = fitz.Matrix(-rotation)  # counterclockwise as seen, with y pointing down
+        box_width = abs(width * turn.a) + abs(height * turn.c)
+        box_height = abs(width * turn.b) + abs(height * turn.d)
+
+        free_width = max(view.width - 2 * margin - box_width, 0)
+        free_height = max(view.height - 2 * margin - box_height, 0)
+        center_x = view.x0 + min(margin, view.width / 2) + box_width / 2 + anchor[0] * free_width
+        center_y = view.y0 + min(margin, view.height / 2) + box_height / 2 + anchor[1] * free_height
+
+        matrix = (form_to_view
+                  * fitz.Matrix(1, 0, 0, 1, -form_view.x0 - form_view.width / 2, -form_view.y0 - form_view.height / 2)
+                  * fitz.Matrix(factor, factor) * turn
+                  * fitz.Matrix(1, 0, 0, 1, center_x, center_y)
+                  * ~(page.transformation_matrix * page.rotation_matrix))
+        return tuple(matrix)
+
+    def redact_pdf(self, input_pdf, output_pdf, terms=(), patterns=(), pages=None, ignore_case=True,
+                   fill=(0, 0, 0), workers=None, chunk_size=64, progress_callback=None):
+        r"""
+        Find literal terms and regular expressions (e.g. r"\b\d{3}-\d{2}-\d{4}\b")
+        and redact every match: the text, and image pixels and drawings under it,
+        are removed from the page content, not just covered.
+
+        Page text is searched by a process pool in chunks of chunk_size pages;
+        the redactions are then applied in this process and the document saved
+        once. Text is compared in Unicode NFKC form, so ligatures and other
+        compatibility characters match their plain letters. Matches are found
+        within a block of text and may run across its lines, which are joined
+        with a space; each line part gets its own redaction. Returns
+        (success, message, counts) with counts mapping 1-based page numbers to
+        the number of matches redacted there.
+        progress_callback(pages_searched, total) is called as chunks finish.
+        """
+        try:
+            if not terms and not patterns:
+                return False, "Nothing to redact: give terms and/or patterns", {}
+            expression = "|".join([re.escape(term) for term in terms if term] +
+                                  [f"(?:{pattern})" for pattern in patterns])
+            flags = re.IGNORECASE if ignore_case else 0
+            try:
+                re.compile(expression, flags)
+            except re.error as e:
+                return False, f"Invalid pattern: {e}", {}
+
+            doc = fitz.open(input_pdf)
+            try:
+                selected = resolve_pages(pages, len(doc)) if pages is not None else range(len(doc))
+                chunks = [tuple(selected[start:start + chunk_size]) for start in range(0, len(selected), chunk_size)]
+
+                matches = {}
+                searched = 0
+                tasks = [(chunk, expression, flags) for chunk in chunks]
+                for task, found in imap_unordered(_find_matches, tasks, workers, open_worker_document, (input_pdf,)):
+                    matches.update(found)
+                    searched += len(task[0])
+                    if progress_callback:
+                        progress_callback(searched, len(selected))
+
+                # Look up the pages before the first change (see stamp_pages)
+                hits = [(doc[index], matches[index]) for index in sorted(matches)]
+                for page, page_matches in hits:
+                    for rect in (rect for rects in page_matches for rect in rects):
+                        page.add_redact_annot(rect, fill=fill)
+                    page.apply_redactions(images=fitz.PDF_REDACT_IMAGE_PIXELS)
+
+                # garbage=1 drops the content streams the redactions replaced
+                doc.save(output_pdf, garbage=1, deflate=True)
+            finally:
+                doc.close()
+
+            counts = {index + 1: len(matches[index]) for index in sorted(matches)}
+            return True, (f"Redacted {sum(counts.values())} match(es) on {len(counts)} page(s) "
+                          f"and saved to: {output_pdf}"), counts
+        except Exception as e:
+            return False, f"Failed to redact: {str(e)}", {}
+
+    def remove_blank_pages(self, input_pdf, output_pdf, threshold=0.0001, dpi=40, contrast=48, pages=None,
+                           dry_run=False, workers=None, chunk_size=32, progress_callback=None):
+        """
+        Delete blank and near-blank pages, such as the empty backs of duplex scans.
+
+        A page whose content stream draws nothing is blank without rendering.
+        Pages with text or visible annotations are kept. The rest (scans,
+        drawings) are rendered in grey at dpi and scored by their ink coverage:
+        the share of pixels, inside a 5% margin, darker than the paper by more
+        than contrast levels. Pages scoring at most threshold are blank. Noise,
+        dust and show-through from the other side stay below the default;
+        a lone page number does not.
+
+        Pages are checked by a process pool in chunks of chunk_size; only
+        pages in pages (a selection, default all) are considered. dry_run
+        reports without writing output_pdf. Returns (success, message, blank)
+        with blank mapping 1-based page numbers to their ink coverage.
+        """
+        try:
+            doc = fitz.open(input_pdf)
+            try:
+                total = len(doc)
+                selected = resolve_pages(pages, total) if pages is not None else list(range(total))
+                chunks = [(tuple(selected[start:start + chunk_size]), dpi, contrast)
+                          for start in range(0, len(selected), chunk_size)]
+
+                blank = {}
+                checked = 0
+                for scores in imap_ordered(_score_blank_pages, chunks, workers, open_worker_document, (input_pdf,)):
+                    for index, score in scores:
+                        if score is not None and score <= threshold:
+                            blank[index + 1] = score
+                    checked += len(scores)
+                    if progress_callback:
+                        progress_callback(checked, len(selected))
+
+                numbers = list(blank)
+                report = ", ".join(str(number) for number in numbers[:20]) or "none"
+                if len(numbers) > 20:
+                    report += f" ... ({len(numbers) - 20} more)"
+                note = "" if NUMPY_AVAILABLE else " (scanned pages not scored: install numpy)"
+                if dry_run:
+                    return True, f"{len(blank)} blank page(s) found: {report}{note}", blank
+                if len(blank) == total:
+                    return False, "Every page is blank; nothing was saved", blank
+
+                self._set_order_in(doc, [index for index in range(total) if index + 1 not in blank])
+                doc.save(output_pdf, garbage=1, deflate=True)
+            finally:
+                doc.close()
+
+            return True, (f"Removed {len(blank)} blank page(s): {report}{note}\n"
+                          f"Saved to: {output_pdf}"), blank
+        except Exception as e:
+            return False, f"Failed to remove blank pages: {str(e)}", {}
+
+    def apply_edits(self, input_pdf, output_pdf, operations):
+        """
+        Apply several edits to one open document and save once.
+
+        operations is a list of (name, options) pairs applied in order, with
+        options named like the single-operation methods:
+            ("delete", {"pages_to_delete": [0, 2]})
+            ("rotate", {"rotate_pages": [1], "rotation": 90})
+            ("extract", {"pages_to_extract": [0, 1]})
+            ("add_text", {"page_number": 1, "text": "Draft", "x": 72, "y": 72, "font_size": 12})
+            ("reorder", {"order": "end-1"})
+            ("reverse", {})
+            ("interleave", {"reverse_backs": True})
+            ("duplicate", {"pages": [0], "copies": 2})
+        Page numbers refer to the document as left by the previous operations;
+        selection strings such as "odd" or "-2-end" are resolved against it too.
+        """
+        handlers = self._edit_handlers()
+        try:
+            doc = fitz.open(input_pdf)
+            try:
+                for index, (name, options) in enumerate(operations, 1):
+                    if name not in handlers:
+                        return False, f"Unknown edit operation #{index}: {name}"
+                    try:
+                        handlers[name](doc, **options)
+                    except (ValueError, IndexError) as e:  # includes PageSelectionError
+                        return False, f"Edit #{index} ({name}) failed: {str(e)}"
+
+                doc.save(output_pdf, garbage=3, deflate=True)
+            finally:
+                doc.close()
+
+            return True, f"Applied {len(operations)} edit(s) and saved to: {output_pdf}"
+        except Exception as e:
+            return False, f"Failed to apply edits: {str(e)}"
+
+    def open_session(self, input_pdf):
+        """Open input_pdf for a series of edits with undo/redo; see EditSession"""
+        return EditSession(input_pdf, self)
+
+    def _edit_handlers(self):
+        """Operations for apply_edits and EditSession: name -> handler(doc, **options)"""
+        return {
+            "delete": self._delete_pages_in,
+            "rotate": self._rotate_pages_in,
+            "extract": self._extract_pages_in,
+            "add_text": self._add_text_in,
+            "reorder": self._reorder_pages_in,
+            "reverse": self._reverse_pages_in,
+            "interleave": self._interleave_pages_in,
+            "duplicate": self._duplicate_pages_in,
+        }
+
+    def _check_pages(self, doc, pages):
+        """Resolve a page argument against doc; pages outside it raise PageSelectionError"""
+        return resolve_pages(pages, len(doc))
+
+    def _delete_pages_in(self, doc, pages_to_delete):
+        pages_to_delete = self._check_pages(doc, pages_to_delete)
+        if len(set(pages_to_delete)) >= len(doc):
+            raise ValueError("Cannot delete every page")
+        doc.delete_pages(sorted(set(pages_to_delete)))
+
+    def _rotate_pages_in(self, doc, rotate_pages, rotation=90):
+        if rotation % 90:
+            raise ValueError("Rotation must be a multiple of 90 degrees")
+        for i in set(self._check_pages(doc, rotate_pages)):
+            page = doc[i]
+            page.set_rotation((page.rotation + rotation) % 360)
+
+    def _extract_pages_in(self, doc, pages_to_extract):
+        pages_to_extract = self._check_pages(doc, pages_to_extract)
+        if not pages_to_extract:
+            raise ValueError("No pages to extract")
+        doc.select(list(pages_to_extract))
+
+    def _add_text_in(self, doc, page_number, text, x, y, font_size=12):
+        if page_number < 1 or page_number > len(doc):
+            raise ValueError(f"Invalid page number: {page_number}")
+        doc[page_number - 1].insert_text((x, y), text, fontsize=font_size, fontname="helv", fill=(0, 0, 0))
+
+    def _set_order_in(self, doc, order):
+        page_xrefs = [doc.page_xref(i) for i in range(len(doc))]
+        set_page_order(doc, [page_xrefs[i] for i in order])
+
+    def _reorder_pages_in(self, doc, order):
+        self._set_order_in(doc, resolve_page_order(order, len(doc)))
+
+    def _reverse_pages_in(self, doc):
+        self._set_order_in(doc, range(len(doc) - 1, -1, -1))
+
+    def _interleave_pages_in(self, doc, backs_pdf=None, reverse_backs=True):
+        if backs_pdf:
+            fronts = len(doc)
+            with fitz.open(backs_pdf) as backs:
+                doc.insert_pdf(backs)
+        else:
+            fronts = (len(doc) + 1) // 2
+        backs = list(range(fronts, len(doc)))
+        if reverse_backs:
+            backs.reverse()
+
+        order = []
+        for index in range(max(fronts, len(backs))):
+            if index < fronts:
+                order.append(index)
+            if index < len(backs):
+                order.append(backs[index])
+        self._set_order_in(doc, order)
+
+    def _duplicate_pages_in(self, doc, pages, copies=2):
+        if copies < 1:
+            raise ValueError(f"Copies must be at least 1: {copies}")
+        repeated = page_mask(self._check_pages(doc, pages), len(doc))
+        order = []
+        for index in range(len(doc)):
+            order.extend([index] * (copies if repeated[index] else 1))
+        self._set_order_in(doc, order)
+
+
+class EditSession:
+    """
+    A document kept open in memory through a series of edits and saved once, on commit.
+
+    Each apply() is one MuPDF journal operation. The journal records only the
+    objects an edit changed, so undo() and redo() step between edits without
+    re-reading the file or keeping copies of the document. Operation names and
+    options are those of PDFEditor.apply_edits.
+    """
+
+    def __init__(self, input_pdf, editor=None):
+        self.input_pdf = input_pdf
+        self.doc = fitz.open(input_pdf)
+        if not self.doc.is_pdf:
+            self.doc.close()
+            raise ValueError(f"Not a PDF file: {input_pdf}")
+        self.doc.journal_enable()
+        self._handlers = (editor or PDFEditor())._edit_handlers()
+        # After a failed edit is rolled back, redo must not replay it
+        self._redo_limit = None
+
+    @property
+    def page_count(self):
+        return len(self.doc)
+
+    @property
+    def can_undo(self):
+        return self.doc.journal_position()[0] > 0
+
+    @property
+    def can_redo(self):
+        step, steps = self.doc.journal_position()
+        return step < (steps if self._redo_limit is None else self._redo_limit)
+
+    def history(self):
+        """Names of the edits currently applied, oldest first"""
+        step, _ = self.doc.journal_position()
+        return [self.doc.journal_op_name(i) for i in range(step)]
+
+    def apply(self, name, **options):
+        if name not in self._handlers:
+            return False, f"Unknown edit operation: {name}"
+        if name == "interleave" and options.get("backs_pdf"):
+            # insert_pdf cannot run inside a journalled operation
+            return False, "Interleaving with a separate backs file is not available in an edit session"
+
+        step = self.doc.journal_position()[0]
+        self.doc.journal_start_op(name)
+        try:
+            self._handlers[name](self.doc, **options)
+        except Exception as e:
+            self.doc.journal_stop_op()
+            # The journal keeps no step for an edit that failed before changing anything
+            if self.doc.journal_position()[0] > step:
+                self.doc.journal_undo()  # roll back what it changed before failing
+                self._redo_limit = step
+            return False, f"Edit ({name}) failed: {str(e)}"
+        self.doc.journal_stop_op()
+        self._redo_limit = None
+        return True, f"Applied {name} ({len(self.doc)} page(s))"
+
+    def undo(self):
+        if not self.can_undo:
+            return False, "Nothing to undo"
+        name = self.doc.journal_op_name(self.doc.journal_position()[0] - 1)
+        self.doc.journal_undo()
+        return True, f"Undid {name}"
+
+    def redo(self):
+        if not self.can_redo:
+            return False, "Nothing to redo"
+        name = self.doc.journal_op_name(self.doc.journal_position()[0])
+        self.doc.journal_redo()
+        return True, f"Redid {name}"
+
+    def commit(self, output_pdf):
+        """Save the edited document and close the session; output_pdf may be the input file"""
+        try:
+            if self.doc.is_closed:
+                return False, "The edit session is closed"
+            same_file = os.path.abspath(output_pdf) == os.path.abspath(self.input_pdf)
+            target = output_pdf + ".tmp" if same_file else output_pdf
+            # garbage=1 drops objects left behind by deleted pages and undone edits.
+            # MuPDF reports each object an undone edit had created as missing; that is expected.
+            show_errors = fitz.TOOLS.mupdf_display_errors()
+            fitz.TOOLS.mupdf_display_errors(False)
+            try:
+                self.doc.save(target, garbage=1, deflate=True)
+            finally:
+                fitz.TOOLS.mupdf_display_errors(show_errors)
+            edits = len(self.history())
+            self.close()
+            if same_file:
+                os.replace(target, output_pdf)
+            return True, f"Saved {edits} edit(s) to: {output_pdf}"
+        except Exception as e:
+            return False, f"Failed to save edits: {str(e)}"
+
+    def close(self):
+        """Close without saving"""
+        if not self.doc.is_closed:
+            self.doc.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _find_matches(task):
+    """Worker: {page index: [[rectangles of one match, one per line]]} for the pages of one chunk that have matches"""
+    page_indexes, expression, flags = task
+    regex = re.compile(expression, flags)
+    found = {}
+    for index in page_indexes:
+        textpage = worker_document()[index].get_textpage(flags=REDACT_TEXT_FLAGS)
+        # Character boxes are costly to build, so only for pages whose text matches.
+        # Lines joined by spaces, as below, so matches across lines are seen too
+        if not regex.search(_normalize_text(textpage.extractText()).replace("\n", " ")):
+            continue
+        matches = []
+        for block in textpage.extractRAWDICT()["blocks"]:
+            # One entry per character of the searched text: (line number, box)
+            text, boxes = [], []
+            for number, line in enumerate(block.get("lines", ())):
+                if number:
+                    text.append(" ")
+                    boxes.append(None)
+                for char in (char for span in line["spans"] for char in span["chars"]):
+                    normalized = _normalize_text(char["c"])
+                    text.append(normalized)
+                    boxes.extend([(number, char["bbox"])] * len(normalized))
+            for match in regex.finditer("".join(text)):
+                lines = {}
+                for box in boxes[match.start():match.end()]:
+                    if box is not None:
+                        number, bbox = box
+                        lines[number] = lines.get(number, fitz.EMPTY_RECT()) | bbox
+                if lines:
+                    matches.append([tuple(rect) for rect in lines.values()])
+        if matches:
+            found[index] = matches
+    return found
+
+
+def _normalize_text(text):
+    """NFKC form of text, character by character so its length stays tied to the character boxes"""
+    if text.isascii():
+        return text
+    return "".join(unicodedata.normalize("NFKC", char) for char in text)
+
+
+def _score_blank_pages(task):
+    """Worker: (page index, ink coverage or None for pages with content) for one chunk"""
+    page_indexes, dpi, contrast = task
+    doc = worker_document()
+    return [(index, _ink_coverage(doc[index], dpi, contrast)) for index in page_indexes]
+
+
+def _ink_coverage(page, dpi, contrast):
+    if any(annot.type[0] not in (fitz.PDF_ANNOT_LINK, fitz.PDF_ANNOT_POPUP) for annot in page.annots()):
+        return None
+    if not paints_anything(page.read_contents()):
+        return 0.0
+    if page.get_text("text").strip() or not NUMPY_AVAILABLE:
+        return None
+
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+    gray = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.stride)[:, :pix.width]
+    # Scanner shadows and punch holes sit at the edges
+    margin_y, margin_x = pix.height // 20, pix.width // 20
+    gray = gray[margin_y:pix.height - margin_y, margin_x:pix.width - margin_x]
+    if not gray.size:
+        return 0.0
+    paper = np.percentile(gray, 90)
+    return float(np.count_nonzero(gray < paper - contrast)) / gray.size
+
+
+def _pdf_number(value):
+    """Format a number for a content stream (PDF has no exponent notation)"""
+    text = f"{value:.4f}".rstrip("0").rstrip(".")
+    return "0" if text in ("", "-0") else text
+
 
 def get_pdf_path():
     while True:
@@ -90,11 +885,63 @@ def get_output_folder():
             print("❌ Not a valid directory.")
 
 
+def _replace_with_copy(source, target):
+    """
+    Copy source to target through a new file, so a target that is hardlinked
+    elsewhere is replaced instead of being written through
+    """
+    temp_path = target + ".tmp"
+    shutil.copyfile(source, temp_path)
+    os.replace(temp_path, target)
+
+
 def get_output_filename(default_name):
     name = input(f"Enter output filename (default: {default_name}): ").strip()
     return f"{name}.pdf" if name else default_name
 
 
+PAGE_SELECTION_HELP = "Enter pages (e.g. 1,3,5-9  odd  even  -1 = last  1-20:2  !4 to exclude): "
+
+
+def _ask_lines(prompt):
+    lines = []
+    while True:
+        line = input(prompt).strip()
+        if not line:
+            return lines
+        lines.append(line)
+
+
+def ask_edit_operations():
+    """Prompt for a list of edits to apply in one pass"""
+    operations = []
+    while True:
+        print(f"\nEdit #{len(operations) + 1}: d = delete, r = rotate, e = extract, t = add text, Enter = done")
+        kind = input("Choose edit: ").strip().lower()
+        if not kind:
+            return operations
+        if kind in ("d", "r", "e"):
+            # Kept as text: it is resolved against the document as it is at this step
+            pages = input(PAGE_SELECTION_HELP).strip()
+            if kind == "d":
+                operations.append(("delete", {"pages_to_delete": pages}))
+            elif kind == "r":
+                degrees = int(input("Enter rotation in degrees (90, 180, 270): ").strip())
+                operations.append(("rotate", {"rotate_pages": pages, "rotation": degrees}))
+            else:
+                operations.append(("extract", {"pages_to_extract": pages}))
+        elif kind == "t":
+            operations.append(("add_text", {
+                "page_number": int(input("Enter page number to add text (1-based): ").strip()),
+                "text": input("Enter the text to add: ").strip(),
+                "x": float(input("Enter X position (in points): ").strip()),
+                "y": float(input("Enter Y position (in points): ").strip()),
+                "font_size": int(input("Enter font size (default 12): ").strip() or "12"),
+            }))
+        else:
+            print("❌ Invalid choice.")
+
+
 def main():
     editor = PDFEditor()
     input_pdf = get_pdf_path()
@@ -105,9 +952,15 @@ def main():
     print("2. Rotate specific pages")
     print("3. Extract specific pages")
     print("4. Add text to a page")
-    choice = input("Select option (1-4): ").strip()
+    print("5. Apply several edits in one pass")
+    print("6. Stamp a header/footer or Bates numbers")
+    print("7. Add a watermark (image or PDF)")
+    print("8. Reorder, reverse, interleave or duplicate pages")
+    print("9. Redact text (terms or regular expressions)")
+    print("10. Remove blank pages")
+    choice = input("Select option (1-10): ").strip()
 
-    if choice not in ["1", "2", "3", "4"]:
+    if choice not in ["1", "2", "3", "4", "5", "6", "7", "8", "9", "10"]:
         print("❌ Invalid choice. Exiting.")
         return
 
@@ -116,11 +969,11 @@ def main():
             reader = PdfReader(input_pdf)
             total_pages = len(reader.pages)
             print(f"\nPDF has {total_pages} pages.")
-            page_input = input("Enter page numbers (1-based, comma separated): ")
-            pages = sorted(set(int(p) - 1 for p in page_input.split(",") if p.strip().isdigit()))
-
-            if any(p < 0 or p >= total_pages for p in pages):
-                print("❌ Invalid page numbers.")
+            page_input = input(PAGE_SELECTION_HELP)
+            try:
+                pages = parse_pages(page_input, total_pages)
+            except PageSelectionError as e:
+                print(f"❌ Invalid page numbers: {e}")
                 return
 
             if choice == "1":
@@ -128,8 +981,12 @@ def main():
                 success, message = editor.delete_pages(input_pdf, output_file, pages)
             elif choice == "2":
                 degrees = int(input("Enter rotation in degrees (90, 180, 270): ").strip())
-                output_file = os.path.join(output_dir, get_output_filename("rotated_pages.pdf"))
-                success, message = editor.rotate_pages(input_pdf, output_file, pages, degrees)
+                # Appending to the original skips copying the whole file
+                if input("Rotate in place, updating the original file? (y/n): ").strip().lower() == "y":
+                    output_file = input_pdf
+                else:
+                    output_file = os.path.join(output_dir, get_output_filename("rotated_pages.pdf"))
+                success, message = editor.rotate_pages(input_pdf, output_file, pages, degrees, incremental=True)
             elif choice == "3":
                 output_file = os.path.join(output_dir, get_output_filename("extracted_pages.pdf"))
                 success, message = editor.extract_pages(input_pdf, output_file, pages)
@@ -144,6 +1001,102 @@ def main():
             output_file = os.path.join(output_dir, get_output_filename("text_added.pdf"))
             success, message = editor.add_text_to_pdf(input_pdf, output_file, page_number, text, x, y, font_size)
 
+        elif choice == "5":
+            print("Page numbers refer to the document after the previous edits.")
+            operations = ask_edit_operations()
+            if not operations:
+                print("❌ No edits entered.")
+                return
+            output_file = os.path.join(output_dir, get_output_filename("edited.pdf"))
+            success, message = editor.apply_edits(input_pdf, output_file, operations)
+
+        elif choice == "6":
+            print("Templates may use {page}, {total}, {filename}, {date} and {bates}.")
+            header = input("Header template (blank for none): ").strip()
+            footer = input("Footer template (e.g. {bates}, blank for none): ").strip()
+            page_input = input("Pages to stamp (blank for all): ").strip()
+            align = input("Alignment - left, center or right (default center): ").strip().lower() or "center"
+            bates_prefix = ""
+            bates_start = 1
+            if "{bates}" in header + footer:
+                bates_prefix = input("Bates prefix (e.g. ABC): ").strip()
+                bates_start = int(input("First Bates number (default 1): ").strip() or "1")
+
+            output_file = os.path.join(output_dir, get_output_filename("stamped.pdf"))
+            success, message = editor.stamp_pages(input_pdf, output_file, header=header or None,
+                                                  footer=footer or None, pages=page_input or None,
+                                                  align=align, bates_prefix=bates_prefix,
+                                                  bates_start=bates_start)
+
+        elif choice == "7":
+            watermark = input("Enter the watermark image or PDF path: ").strip().strip('"')
+            if not os.path.exists(watermark):
+                print("❌ Watermark file not found.")
+                return
+            page_input = input("Pages to watermark (blank for all): ").strip()
+            opacity = float(input("Opacity 0-1 (default 0.3): ").strip() or "0.3")
+            rotation = float(input("Rotation in degrees (default 0): ").strip() or "0")
+            print("Positions: " + ", ".join(WATERMARK_POSITIONS))
+            position = input("Position (default center): ").strip().lower() or "center"
+            scale = float(input("Size as a fraction of the page 0-1 (default 0.5): ").strip() or "0.5")
+
+            output_file = os.path.join(output_dir, get_output_filename("watermarked.pdf"))
+            success, message = editor.watermark_pages(input_pdf, output_file, watermark, pages=page_input or None,
+                                                      opacity=opacity, rotation=rotation, position=position,
+                                                      scale=scale)
+
+        elif choice == "8":
+            print("a. Reorder pages (e.g. 3,1,2,4-end  or  end-1 for reverse)")
+            print("b. Reverse page order")
+            print("c. Interleave duplex scans (fronts then backs)")
+            print("d. Duplicate pages")
+            action = input("Select action (a-d): ").strip().lower()
+
+            if action == "a":
+                order = input("Enter the new page order: ").strip()
+                output_file = os.path.join(output_dir, get_output_filename("reordered.pdf"))
+                success, message = editor.reorder_pages(input_pdf, output_file, order)
+            elif action == "b":
+                output_file = os.path.join(output_dir, get_output_filename("reversed.pdf"))
+                success, message = editor.reverse_pages(input_pdf, output_file)
+            elif action == "c":
+                backs_pdf = input("Backs PDF (blank if the backs follow the fronts in this file): ").strip().strip('"')
+                reverse_backs = input("Were the backs scanned last page first? (y/n, default y): ").strip().lower() != "n"
+                output_file = os.path.join(output_dir, get_output_filename("interleaved.pdf"))
+                success, message = editor.interleave_pages(input_pdf, output_file, backs_pdf or None, reverse_backs)
+            elif action == "d":
+                pages = input(PAGE_SELECTION_HELP)
+                copies = int(input("Copies of each page (default 2): ").strip() or "2")
+                output_file = os.path.join(output_dir, get_output_filename("duplicated.pdf"))
+                success, message = editor.duplicate_pages(input_pdf, output_file, pages, copies)
+            else:
+                print("❌ Invalid action.")
+                return
+
+        elif choice == "9":
+            print("Enter one per line; finish with an empty line.")
+            terms = _ask_lines("Term to redact: ")
+            patterns = _ask_lines("Regular expression (e.g. \\b\\d{3}-\\d{2}-\\d{4}\\b for SSNs): ")
+            ignore_case = input("Ignore case? (y/n, default y): ").strip().lower() != "n"
+
+            output_file = os.path.join(output_dir, get_output_filename("redacted.pdf"))
+            success, message, counts = editor.redact_pdf(input_pdf, output_file, terms, patterns,
+                                                         ignore_case=ignore_case)
+            for page_number, count in list(counts.items())[:50]:
+                print(f"   Page {page_number}: {count} redaction(s)")
+            if len(counts) > 50:
+                print(f"   ... and {len(counts) - 50} more page(s)")
+
+        elif choice == "10":
+            threshold = float(input("Max ink coverage in % to count as blank (default 0.01): ").strip() or "0.01")
+            dry_run = input("Only report, without saving? (y/n, default n): ").strip().lower() == "y"
+
+            output_file = None if dry_run else os.path.join(output_dir, get_output_filename("no_blank_pages.pdf"))
+            success, message, blank = editor.remove_blank_pages(input_pdf, output_file, threshold=threshold / 100,
+                                                                dry_run=dry_run)
+            for page_number, score in list(blank.items())[:50]:
+                print(f"   Page {page_number}: {score * 100:.4f}% ink")
+
         print(message)
 
     except Exception as e:
@@ -0,0 +1,202 @@
+from lazy_import import lazy_module
+
+fitz = lazy_module("fitz")  # PyMuPDF
+
+
+def _xref_of(value):
+    return int(value.split()[0])
+
+
+def copy_object(doc, xref, drop=()):
+    """
+    Add a copy of dictionary object xref, without the keys in drop, and return
+    its xref. Direct values (a /Contents array, say) are copied; referenced
+    objects are shared, not copied. This goes to MuPDF directly because PyMuPDF's
+    get_new_xref() and update_object() refuse to run inside a journalled operation.
+    """
+    mupdf = fitz.mupdf
+    pdf = mupdf.pdf_document_from_fz_document(doc.this)
+    copy = mupdf.pdf_deep_copy_obj(mupdf.pdf_load_object(pdf, xref))
+    for key in drop:
+        mupdf.pdf_dict_dels(copy, key)
+    return mupdf.pdf_to_num(mupdf.pdf_add_object(pdf, copy))
+
+
+def add_stream_object(doc, dictionary, data):
+    """
+    Create a new stream object and return its xref. data is stored exactly as
+    given, so already encoded image data (CCITT, JPEG, ...) is never re-compressed.
+    """
+    xref = doc.get_new_xref()
+    doc.update_object(xref, "<<>>")
+    doc.update_stream(xref, data, compress=False)
+    # update_stream(compress=False) drops /Filter, so the dictionary goes on last
+    doc.update_object(xref, f"<<{dictionary}/Length {len(data)}>>")
+    return xref
+
+
+def add_image_xobject(doc, data, width, height, filter_name=None, colorspace="/DeviceGray",
+                      bits=8, decode_parms=None, extra=""):
+    """Embed already encoded image bytes as an image XObject and return its xref"""
+    dictionary = f"/Type/XObject/Subtype/Image/Width {width}/Height {height}"
+    if colorspace:
+        dictionary += f"/ColorSpace{colorspace}/BitsPerComponent {bits}"
+    if filter_name:
+        dictionary += f"/Filter{filter_name}"
+    if decode_parms:
+        dictionary += f"/DecodeParms<<{decode_parms}>>"
+    return add_stream_object(doc, dictionary + extra, data)
+
+
+def add_image_mask(doc, data, width, height, filter_name=None, decode_parms=None, paint_ones=False):
+    """
+    Embed a 1-bit stencil mask. By PDF default 0 samples are painted with the
+    current fill colour; paint_ones flips that with /Decode [1 0].
+    """
+    extra = "/ImageMask true"
+    if paint_ones:
+        extra += "/Decode[1 0]"
+    return add_image_xobject(doc, data, width, height, filter_name, colorspace=None,
+                             decode_parms=decode_parms, extra=extra)
+
+
+def set_page_resource(doc, page, category, name, value, page_xref=None):
+    """
+    Add name -> value to the page's /Resources/<category> dictionary, following
+    indirect Resources and category dictionaries and materialising inherited
+    Resources onto the page first.
+
+    page_xref may pass the page's xref when the caller already has it: after the
+    document is modified, page.xref walks the page tree again on every access.
+    """
+    page_xref = page_xref or page.xref
+    kind, resources = doc.xref_get_key(page_xref, "Resources")
+    if kind == "null":
+        inherited = _inherited_key(doc, page_xref, "Resources")
+        doc.xref_set_key(page_xref, "Resources", inherited or "<<>>")
+        kind, resources = doc.xref_get_key(page_xref, "Resources")
+
+    if kind == "xref":
+        holder, path = _xref_of(resources), category
+    else:
+        holder, path = page_xref, f"Resources/{category}"
+
+    kind, entries = doc.xref_get_key(holder, path)
+    if kind == "xref":
+        holder, path = _xref_of(entries), name
+    else:
+        path = f"{path}/{name}"
+    doc.xref_set_key(holder, path, value)
+
+
+def _inherited_key(doc, xref, key):
+    """Look up an inheritable page attribute on the /Parent chain"""
+    seen = set()
+    kind, parent = doc.xref_get_key(xref, "Parent")
+    while kind == "xref" and parent not in seen:
+        seen.add(parent)
+        parent_xref = _xref_of(parent)
+        value_kind, value = doc.xref_get_key(parent_xref, key)
+        if value_kind != "null":
+            return value
+        kind, parent = doc.xref_get_key(parent_xref, "Parent")
+    return None
+
+
+def append_page_content(doc, page, content, prepend=False, page_xref=None, shared=None):
+    """
+    Add a content stream to the page's /Contents, after (or before) existing ones.
+    Appended content runs outside a q/Q pair wrapped around the existing streams,
+    so their graphics state cannot leak into it. page_xref is as for
+    set_page_resource.
+
+    shared is a dict to pass to every call adding content to the pages of one
+    document: the stream opening the q/Q pair, and content streams with the
+    same bytes, are then stored once and referenced from each page.
+    """
+    existing = page.get_contents()
+    if existing and not prepend:
+        page.wrap_contents()
+        existing = [_content_object(doc, b"q\n", shared)] + page.get_contents()
+        content = b"Q\n" + content
+
+    xref = _content_object(doc, content, shared)
+    streams = [xref] + existing if prepend else existing + [xref]
+    doc.xref_set_key(page_xref or page.xref, "Contents", "[" + " ".join(f"{x} 0 R" for x in streams) + "]")
+    return xref
+
+
+def _content_object(doc, content, shared):
+    """A stream object holding content, the one already in shared if there is one"""
+    if shared is not None and content in shared:
+        return shared[content]
+    xref = add_stream_object(doc, "", b"")
+    doc.update_stream(xref, content)
+    if shared is not None:
+        shared[content] = xref
+    return xref
+
+
+INHERITABLE_PAGE_KEYS = ("Resources", "MediaBox", "CropBox", "Rotate")
+
+
+def set_page_order(doc, page_xrefs):
+    """
+    Make page_xrefs (repeats allowed) the document's pages, in that order, by
+    writing them as one flat /Kids array under the root page tree node.
+
+    No content is copied: a repeated page gets a new page dictionary sharing the
+    contents and resources of the original (but not its annotations). Attributes
+    pages inherited from intermediate tree nodes are moved onto the pages first,
+    as those nodes are dropped. Pages left out remain in the file until it is
+    saved with garbage collection.
+    """
+    root = _xref_of(doc.xref_get_key(doc.pdf_catalog(), "Pages")[1])
+    inherited = {}
+    placed = set()
+    kids = []
+    for xref in page_xrefs:
+        if xref in placed:
+            xref = copy_object(doc, xref, drop=("Annots",))
+        else:
+            placed.add(xref)
+            _materialise_inherited(doc, xref, inherited)
+            doc.xref_set_key(xref, "Parent", f"{root} 0 R")
+        kids.append(f"{xref} 0 R")
+
+    doc.xref_set_key(root, "Kids", "[" + " ".join(kids) + "]")
+    doc.xref_set_key(root, "Count", str(len(kids)))
+
+
+def inherited_attributes(doc, xref, inherited):
+    """
+    Inheritable attributes (INHERITABLE_PAGE_KEYS) page xref gets from its
+    ancestors, whether or not the page sets them itself. inherited is a dict
+    caching the values per page tree node across calls.
+    """
+    kind, parent = doc.xref_get_key(xref, "Parent")
+    if kind != "xref":
+        return {}
+    return _node_attributes(doc, _xref_of(parent), inherited)
+
+
+def _materialise_inherited(doc, xref, inherited):
+    """Copy inheritable attributes the page lacks from its ancestors onto it"""
+    for key, value in inherited_attributes(doc, xref, inherited).items():
+        if doc.xref_get_key(xref, key)[0] == "null":
+            doc.xref_set_key(xref, key, value)
+
+
+def _node_attributes(doc, node, inherited, depth=0):
+    """Inheritable attributes in effect at a page tree node, cached per node"""
+    if node not in inherited:
+        values = {}
+        kind, parent = doc.xref_get_key(node, "Parent")
+        if kind == "xref" and depth < 64:  # guards against cycles in broken trees
+            values.update(_node_attributes(doc, _xref_of(parent), inherited, depth + 1))
+        for key in INHERITABLE_PAGE_KEYS:
+            value_kind, value = doc.xref_get_key(node, key)
+            if value_kind != "null":
+                values[key] = value
+        inherited[node] = values
+    return inherited[node]
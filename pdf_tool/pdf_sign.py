@@ -6,19 +6,27 @@ from PIL import Image, ImageDraw, ImageFont
 class PDFESignTool:
     def add_text(self, pdf_path, output_path, page, text, x, y, size=12):
         doc = fitz.open(pdf_path)
-        page_obj = doc[page - 1]
-        rect = fitz.Rect(x, y, x + 200, y + 30)
-        page_obj.insert_textbox(rect, text, fontsize=size, color=(0, 0, 0))
+        self.sign_text(doc, page, text, x, y, size)
         doc.save(output_path)
         doc.close()
         
     def add_image(self, pdf_path, output_path, page, image_path, x, y, width=100, height=50):
         doc = fitz.open(pdf_path)
+        self.sign_image(doc, page, image_path, x, y, width, height)
+        doc.save(output_path)
+        doc.close()
+    
+    def sign_text(self, doc, page, text, x, y, size=12):
+        """Place a text signature on an open document"""
+        page_obj = doc[page - 1]
+        rect = fitz.Rect(x, y, x + 200, y + 30)
+        page_obj.insert_textbox(rect, text, fontsize=size, color=(0, 0, 0))
+        
+    def sign_image(self, doc, page, image_path, x, y, width=100, height=50):
+        """Place an image signature on an open document"""
         page_obj = doc[page - 1]
         rect = fitz.Rect(x, y, x + width, y + height)
         page_obj.insert_image(rect, filename=image_path)
-        doc.save(output_path)
-        doc.close()
         
     def create_signature_image(self, text, output_path):
         img = Image.new("RGB", (200, 60), "white")
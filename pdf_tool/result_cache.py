@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import shutil
+import stat
+import threading
+import time
+
+# Cached results are stored read-only; they are made writable again only to be replaced or removed
+READ_ONLY = stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH
+WRITABLE = READ_ONLY | stat.S_IWUSR
+
+
+class ResultCache:
+    """
+    On-disk cache of operation outputs keyed by input content hash, operation
+    name and options. Entries are evicted least-recently-used first once the
+    cache grows beyond max_bytes.
+
+    Results are copied out of the cache by default. With use_hardlinks the
+    output shares its storage with the cache entry; cached files are kept
+    read-only so such an output cannot be edited in place by mistake.
+    """
+
+    def __init__(self, cache_dir, max_bytes=1024 ** 3, use_hardlinks=False):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        # Hardlinked results share storage with the cache and are read-only
+        self.use_hardlinks = use_hardlinks
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._objects_dir = os.path.join(cache_dir, "objects")
+        self._index_path = os.path.join(cache_dir, "index.json")
+        os.makedirs(self._objects_dir, exist_ok=True)
+        self._index = self._load_index()
+
+    def make_key(self, input_path, operation, options=None):
+        """Hash the input file's content together with the operation and its options"""
+        digest = hashlib.sha256()
+        with open(input_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        digest.update(b"\0" + operation.encode() + b"\0")
+        digest.update(json.dumps(options or {}, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def fetch(self, key, output_path):
+        """Materialise a cached result at output_path. Returns True on a hit."""
+        with self._lock:
+            entry = self._index.get(key)
+            cached_path = self._object_path(key)
+            if entry is None or not os.path.isfile(cached_path):
+                self._index.pop(key, None)
+                self.misses += 1
+                return False
+
+            self._place(cached_path, output_path)
+            entry["last_used"] = time.time()
+            self.hits += 1
+            self._save_index()
+            return True
+
+    def store(self, key, result_path):
+        """Add a freshly produced result to the cache and evict old entries"""
+        size = os.path.getsize(result_path)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            cached_path = self._object_path(key)
+            temp_path = cached_path + ".tmp"
+            shutil.copyfile(result_path, temp_path)
+            os.chmod(temp_path, READ_ONLY)
+            if os.path.exists(cached_path):
+                os.chmod(cached_path, WRITABLE)  # Windows cannot replace read-only files
+            os.replace(temp_path, cached_path)
+
+            self._index[key] = {"size": size, "last_used": time.time()}
+            self._evict()
+            self._save_index()
+
+    def stats(self):
+        """Hit/miss counters and current cache size"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._index),
+                "size_bytes": sum(entry["size"] for entry in self._index.values()),
+            }
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._index):
+                self._remove(key)
+            self._save_index()
+
+    def _object_path(self, key):
+        return os.path.join(self._objects_dir, key)
+
+    def _place(self, cached_path, output_path):
+        """Hardlink (when enabled and possible) or copy a cached file to output_path"""
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        if os.path.exists(output_path):
+            if os.path.samefile(cached_path, output_path):
+                return  # already linked to this entry
+            os.remove(output_path)
+
+        if self.use_hardlinks:
+            try:
+                os.link(cached_path, output_path)
+                return
+            except OSError:
+                pass  # different filesystem or no hardlink support
+        shutil.copyfile(cached_path, output_path)
+
+    def _evict(self):
+        total = sum(entry["size"] for entry in self._index.values())
+        for key in sorted(self._index, key=lambda k: self._index[k]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            total -= self._index[key]["size"]
+            self._remove(key)
+
+    def _remove(self, key):
+        self._index.pop(key, None)
+        try:
+            os.chmod(self._object_path(key), WRITABLE)
+            os.remove(self._object_path(key))
+        except FileNotFoundError:
+            pass
+
+    def _load_index(self):
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_index(self):
+        temp_path = self._index_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(temp_path, self._index_path)
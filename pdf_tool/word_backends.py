@@ -0,0 +1,316 @@
+import atexit
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+
+from lazy_import import is_available
+
+
+class WordBackend:
+    """
+    A Word->PDF renderer that stays up between conversions: start() launches
+    it, convert() renders one document, close() shuts it down.
+    """
+
+    name = "base"
+
+    @classmethod
+    def is_available(cls):
+        return False
+
+    def start(self):
+        pass
+
+    def convert(self, input_path, output_path):
+        raise NotImplementedError
+
+    def is_alive(self):
+        """False once the backend has crashed and must be restarted"""
+        return True
+
+    def close(self):
+        pass
+
+
+class WordComBackend(WordBackend):
+    """Microsoft Word over COM (Windows). Each worker owns a separate Word instance."""
+
+    name = "word"
+    PDF_FORMAT = 17  # wdFormatPDF
+
+    def __init__(self):
+        self._word = None
+
+    @classmethod
+    def is_available(cls):
+        return sys.platform == "win32" and is_available("win32com", "pythoncom")
+
+    def start(self):
+        import pythoncom
+        import win32com.client
+
+        pythoncom.CoInitialize()
+        self._word = win32com.client.DispatchEx("Word.Application")
+        self._word.Visible = False
+        self._word.DisplayAlerts = 0
+
+    def convert(self, input_path, output_path):
+        document = self._word.Documents.Open(os.path.abspath(input_path), ReadOnly=True, AddToRecentFiles=False)
+        try:
+            document.SaveAs(os.path.abspath(output_path), FileFormat=self.PDF_FORMAT)
+        finally:
+            document.Close(0)
+
+    def is_alive(self):
+        try:
+            return self._word is not None and self._word.Visible is not None
+        except Exception:
+            return False
+
+    def close(self):
+        import pythoncom
+
+        try:
+            if self._word is not None:
+                self._word.Quit()
+        except Exception:
+            pass
+        finally:
+            self._word = None
+            pythoncom.CoUninitialize()
+
+
+class LibreOfficeBackend(WordBackend):
+    """
+    Headless LibreOffice driven over UNO. Each worker runs its own soffice
+    process with a private user profile, so workers convert in parallel.
+    """
+
+    name = "libreoffice"
+
+    def __init__(self, start_timeout=30):
+        self.start_timeout = start_timeout
+        self._process = None
+        self._desktop = None
+        self._profile_dir = None
+
+    @staticmethod
+    def soffice_path():
+        return shutil.which("soffice") or shutil.which("libreoffice")
+
+    @classmethod
+    def is_available(cls):
+        return bool(cls.soffice_path()) and is_available("uno")
+
+    def start(self):
+        import uno
+
+        self._profile_dir = tempfile.mkdtemp(prefix="pdf_tool_lo_")
+        connection = f"pipe,name={os.path.basename(self._profile_dir)};urp;StarOffice.ComponentContext"
+        self._process = subprocess.Popen(
+            [self.soffice_path(), "--headless", "--invisible", "--nologo", "--norestore", "--nodefault",
+             f"-env:UserInstallation={uno.systemPathToFileUrl(self._profile_dir)}",
+             f"--accept={connection}"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local_context)
+
+        # soffice takes a moment before it accepts connections
+        deadline = time.time() + self.start_timeout
+        while True:
+            try:
+                context = resolver.resolve(f"uno:{connection}")
+                break
+            except Exception:
+                if time.time() > deadline or self._process.poll() is not None:
+                    self.close()
+                    raise RuntimeError("LibreOffice did not start")
+                time.sleep(0.25)
+
+        self._desktop = context.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", context)
+
+    def convert(self, input_path, output_path):
+        import uno
+
+        document = self._desktop.loadComponentFromURL(
+            uno.systemPathToFileUrl(os.path.abspath(input_path)), "_blank", 0, (self._property("Hidden", True),))
+        if document is None:
+            raise RuntimeError(f"LibreOffice could not open {input_path}")
+        try:
+            document.storeToURL(uno.systemPathToFileUrl(os.path.abspath(output_path)),
+                                (self._property("FilterName", "writer_pdf_Export"),))
+        finally:
+            document.close(True)
+
+    @staticmethod
+    def _property(name, value):
+        from com.sun.star.beans import PropertyValue
+
+        prop = PropertyValue()
+        prop.Name = name
+        prop.Value = value
+        return prop
+
+    def is_alive(self):
+        return self._process is not None and self._process.poll() is None
+
+    def close(self):
+        try:
+            if self._desktop is not None:
+                self._desktop.terminate()
+        except Exception:
+            pass  # the connection drops as soffice exits
+        self._desktop = None
+
+        if self._process is not None:
+            try:
+                self._process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+                self._process.wait()
+            self._process = None
+
+        if self._profile_dir:
+            shutil.rmtree(self._profile_dir, ignore_errors=True)
+            self._profile_dir = None
+
+
+class Docx2PdfBackend(WordBackend):
+    """docx2pdf, which starts Word for every file. Used only when nothing better is installed."""
+
+    name = "docx2pdf"
+
+    @classmethod
+    def is_available(cls):
+        return sys.platform in ("win32", "darwin") and is_available("docx2pdf")
+
+    def convert(self, input_path, output_path):
+        from docx2pdf import convert
+
+        convert(input_path, output_path)
+
+
+class FunctionBackend(WordBackend):
+    """
+    Wraps a plain convert_func(input_path, output_path), such as a pure-Python
+    renderer or a local stand-in for tests.
+    """
+
+    name = "function"
+
+    def __init__(self, convert_func):
+        self.convert_func = convert_func
+
+    @classmethod
+    def is_available(cls):
+        return True
+
+    def convert(self, input_path, output_path):
+        self.convert_func(input_path, output_path)
+
+
+# Preferred first: warm, parallel-safe backends before the per-file fallback
+BACKENDS = [WordComBackend, LibreOfficeBackend, Docx2PdfBackend]
+
+
+def default_backend():
+    """The first installed backend class, or None"""
+    for backend in BACKENDS:
+        if backend.is_available():
+            return backend
+    return None
+
+
+class WordConversionPool:
+    """
+    Long-lived worker threads that each own one started backend and take jobs
+    from a shared queue, so each file pays for its conversion only.
+    Threads are enough because the rendering runs in Word or LibreOffice,
+    outside this process.
+    """
+
+    def __init__(self, backend_factory, workers=1):
+        self.backend_factory = backend_factory
+        self.workers = max(1, workers)
+        self._jobs = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._closed = False
+        atexit.register(self.close)
+
+    def submit(self, input_path, output_path):
+        """Queue a conversion and return a Future resolving to output_path"""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Conversion pool is closed")
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._run_worker, daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            self._jobs.put((future, input_path, output_path))
+        return future
+
+    def convert(self, input_path, output_path, timeout=None):
+        """Convert one file, waiting for the result"""
+        return self.submit(input_path, output_path).result(timeout)
+
+    def close(self):
+        """Finish queued jobs, then stop the workers and their backends"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            threads = list(self._threads)
+        for _ in threads:
+            self._jobs.put(None)
+        for thread in threads:
+            thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _run_worker(self):
+        backend = None
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            future, input_path, output_path = job
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                if backend is None:
+                    started = self.backend_factory()
+                    started.start()
+                    backend = started
+                backend.convert(input_path, output_path)
+                future.set_result(output_path)
+            except Exception as e:
+                future.set_exception(e)
+                # Restart the backend for the next job only if it went down
+                if backend is not None and not backend.is_alive():
+                    self._close_backend(backend)
+                    backend = None
+
+        if backend is not None:
+            self._close_backend(backend)
+
+    @staticmethod
+    def _close_backend(backend):
+        try:
+            backend.close()
+        except Exception:
+            pass
@@ -0,0 +1,79 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from lazy_import import lazy_module
+
+fitz = lazy_module("fitz")  # PyMuPDF
+
+# Document opened once per worker process by open_worker_document
+_worker_doc = None
+
+
+def resolve_workers(workers=None, jobs=None):
+    """Number of worker processes to use, never more than there are jobs"""
+    count = workers or os.cpu_count() or 1
+    if jobs is not None:
+        count = min(count, jobs)
+    return max(1, count)
+
+
+def imap_ordered(func, items, workers=None, initializer=None, initargs=(), window=None):
+    """
+    Yield func(item) for every item in input order.
+
+    At most `window` tasks (default: two per worker) are in flight, so results
+    never pile up faster than the caller consumes them. With a single worker
+    everything runs in-process and no pool is started.
+    """
+    items = list(items)
+    workers = resolve_workers(workers, len(items))
+
+    if workers == 1:
+        if initializer:
+            initializer(*initargs)
+        for item in items:
+            yield func(item)
+        return
+
+    window = window or workers * 2
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(func, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def imap_unordered(func, items, workers=None, initializer=None, initargs=()):
+    """Yield (item, func(item)) pairs as soon as each one finishes"""
+    items = list(items)
+    workers = resolve_workers(workers, len(items))
+
+    if workers == 1:
+        if initializer:
+            initializer(*initargs)
+        for item in items:
+            yield item, func(item)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as pool:
+        futures = {pool.submit(func, item): item for item in items}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def open_worker_document(pdf_path):
+    """
+    Initializer for imap_ordered and imap_unordered: open pdf_path once per
+    worker process, for every task it runs to reach through worker_document()
+    """
+    global _worker_doc
+    _worker_doc = fitz.open(pdf_path)
+
+
+def worker_document():
+    """The document open_worker_document opened in this process"""
+    return _worker_doc
@@ -0,0 +1,49 @@
+import os
+import sys
+
+import pytest
+
+# The tool modules import each other by plain module name, as when run from pdf_tool/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pdf_tool"))
+
+import fitz  # PyMuPDF  # noqa: E402
+
+
+def pytest_addoption(parser):
+    parser.addoption("--run-benchmarks", action="store_true", default=False,
+                     help="run the size and timing benchmarks marked 'benchmark'")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--run-benchmarks"):
+        return
+    skip = pytest.mark.skip(reason="benchmark: run with --run-benchmarks")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
+def write_text_pdf(path, pages=3, text="page {n}", width=300, height=400, rotations=None):
+    """Save a PDF whose page n (1-based) shows text.format(n=n), optionally rotated"""
+    doc = fitz.open()
+    for n in range(1, pages + 1):
+        page = doc.new_page(width=width, height=height)
+        page.insert_text((40, 80), text.format(n=n), fontsize=14)
+        if rotations:
+            page.set_rotation(rotations[(n - 1) % len(rotations)])
+    doc.save(path)
+    doc.close()
+    return str(path)
+
+
+def page_texts(path):
+    with fitz.open(path) as doc:
+        return [page.get_text().strip() for page in doc]
+
+
+@pytest.fixture
+def text_pdf(tmp_path):
+    """Factory for text PDFs in the test's temporary directory: text_pdf("a.pdf", pages=5)"""
+    def make(name="input.pdf", **options):
+        return write_text_pdf(tmp_path / name, **options)
+    return make
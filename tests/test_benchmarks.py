@@ -0,0 +1,93 @@
+"""
+Size and timing benchmarks. Skipped by default; run them with
+
+    python -m pytest -m benchmark --run-benchmarks -s
+
+The -s shows the measured tables next to the asserted claims.
+"""
+import os
+
+import fitz  # PyMuPDF
+import pytest
+
+from file_compression import LINEARIZE_AVAILABLE, PDFCompressor
+from file_converter import FileConverter
+
+pytestmark = pytest.mark.benchmark
+
+PHOTO_COUNT = 500
+
+# ~1 Mbit/s, the slow-client case the linearization work targets
+SLOW_CLIENT_BANDWIDTH = 125000
+
+
+def write_report_pdf(path, pages):
+    """Many small objects per page (text, fonts, links), like a generated report"""
+    doc = fitz.open()
+    for n in range(pages):
+        page = doc.new_page()
+        for line in range(30):
+            page.insert_text((50, 60 + line * 22), f"Report page {n + 1}, line {line + 1}: figures and totals",
+                             fontsize=10)
+        for link in range(5):
+            page.insert_link({"kind": fitz.LINK_URI, "uri": f"https://example.com/{n}/{link}",
+                              "from": fitz.Rect(50, 60 + link * 22 - 10, 300, 60 + link * 22)})
+    doc.save(path)
+    doc.close()
+
+
+def test_compression_packing_and_first_page_latency(tmp_path):
+    source = str(tmp_path / "report.pdf")
+    write_report_pdf(source, pages=400)
+
+    results = {row["variant"]: row for row in PDFCompressor().benchmark_compression(source, str(tmp_path),
+                                                                                    SLOW_CLIENT_BANDWIDTH)}
+
+    print(f"\n{'variant':<30}{'size':>12}{'save s':>9}{'page 1 bytes':>14}{'page 1 s':>10}")
+    for label, row in results.items():
+        assert "error" not in row, row
+        print(f"{label:<30}{row['size']:>12}{row['save_seconds']:>9.2f}"
+              f"{row['first_page_bytes']:>14}{row['first_page_seconds']:>10.2f}")
+
+    # Object streams shrink the file
+    assert results["object streams"]["size"] < results["plain"]["size"] * 0.9
+    if LINEARIZE_AVAILABLE:
+        # Linearized files show page 1 after a small fraction of the download
+        for label in ("linearized", "object streams + linearized"):
+            row = results[label]
+            assert row["first_page_bytes"] < row["size"] * 0.1
+            assert row["first_page_seconds"] < results["plain"]["first_page_seconds"] * 0.1
+
+
+def write_photos(directory, count, size=(1024, 768)):
+    """Smooth colour fields with sensor-like noise, saved as quality 90 JPEGs"""
+    np = pytest.importorskip("numpy")
+    Image = pytest.importorskip("PIL.Image")
+    rng = np.random.default_rng(7)
+    paths = []
+    for n in range(count):
+        coarse = Image.fromarray(rng.integers(0, 256, (6, 8, 3), dtype=np.uint8)).resize(size, Image.BICUBIC)
+        pixels = np.asarray(coarse, dtype=np.int16) + rng.normal(0, 6, (size[1], size[0], 3))
+        path = os.path.join(directory, f"photo_{n:03d}.jpg")
+        Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).save(path, quality=90)
+        paths.append(path)
+    return paths
+
+
+def test_jpeg_passthrough_on_a_photo_set(tmp_path):
+    photos = write_photos(str(tmp_path), PHOTO_COUNT)
+    input_bytes = sum(os.path.getsize(path) for path in photos)
+
+    results = FileConverter().benchmark_image_to_pdf(photos, str(tmp_path / "pdf"))
+
+    print(f"\n{PHOTO_COUNT} photos, {input_bytes} bytes of JPEG")
+    print(f"{'mode':<14}{'seconds':>9}{'output bytes':>14}")
+    for label, row in results.items():
+        assert row["failures"] == 0
+        print(f"{label:<14}{row['seconds']:>9.2f}{row['total_bytes']:>14}")
+
+    passthrough, re_encode = results["passthrough"], results["re-encode"]
+    # No decode or encode step: several times faster
+    assert passthrough["seconds"] < re_encode["seconds"] / 3
+    # The original JPEG data plus a small PDF wrapper per file
+    assert passthrough["total_bytes"] < input_bytes + PHOTO_COUNT * 4096
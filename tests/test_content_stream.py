@@ -0,0 +1,101 @@
+import pytest
+
+from content_stream import (ContentStreamError, format_number, optimize_content_stream, paints_anything,
+                            parse_operations, tokenize)
+
+
+def test_tokenize_keeps_strings_names_and_inline_images_whole():
+    data = b"/F1 12 Tf (a (nested) \\) string) Tj <48656c6c6f> Tj % comment\nBI /W 1 /H 1 ID \x01EI\n EI Q"
+
+    tokens = list(tokenize(data))
+
+    assert tokens == [
+        ("name", b"/F1"), ("number", b"12"), ("keyword", b"Tf"),
+        ("string", b"(a (nested) \\) string)"), ("keyword", b"Tj"),
+        ("string", b"<48656c6c6f>"), ("keyword", b"Tj"),
+        ("inline", b"BI /W 1 /H 1 ID \x01EI\n EI"), ("keyword", b"Q"),
+    ]
+
+
+def test_parse_operations_groups_operands_including_arrays_and_dictionaries():
+    data = b"[(A) -120 (B)] TJ /OC <</MCID 3>> BDC EMC"
+
+    assert [operator for _, operator in parse_operations(data)] == [b"TJ", b"BDC", b"EMC"]
+    operands, operator = next(parse_operations(data))
+    assert [token for _, token in operands] == [b"[", b"(A)", b"-120", b"(B)", b"]"]
+
+
+@pytest.mark.parametrize("data", [b"(unterminated Tj", b"1 0 0 1 0", b"<414243 Tj", b") Tj"])
+def test_malformed_streams_raise(data):
+    with pytest.raises(ContentStreamError):
+        list(parse_operations(data))
+
+
+@pytest.mark.parametrize("token, precision, expected", [
+    (b"12", 3, b"12"),
+    (b"0.50000", 3, b".5"),
+    (b"-0.1234", 2, b"-.12"),
+    (b"-0.0001", 3, b"0"),
+    (b"3.14159", 0, b"3"),
+])
+def test_format_number(token, precision, expected):
+    assert format_number(token, precision) == expected
+
+
+def test_optimize_drops_no_op_operators():
+    data = (b"q Q\n1 0 0 1 0 0 cm\n"
+            b"BT /F1 12 Tf 0 0 0 rg (a) Tj /F1 12 Tf 0 0 0 rg (b) Tj ET\n"
+            b"2 w 2 w 0 0 m 10 10 l S")
+
+    assert optimize_content_stream(data) == b"BT\n/F1 12 Tf\n0 0 0 rg\n(a)Tj\n(b)Tj\nET\n2 w\n0 0 m\n10 10 l\nS"
+
+
+def test_optimize_restores_state_after_q_Q():
+    data = b"1 0 0 rg q 0 1 0 rg 0 0 5 5 re f Q 1 0 0 rg 0 0 5 5 re f"
+
+    optimized = optimize_content_stream(data)
+
+    # The second red is a repeat of the state restored by Q
+    assert optimized.count(b"rg") == 2
+
+
+def test_optimize_forgets_state_set_by_other_operators():
+    data = b"1 w /GS0 gs 1 w 0 g /CS0 cs 0 g"
+
+    assert optimize_content_stream(data) == b"1 w\n/GS0 gs\n1 w\n0 g\n/CS0 cs\n0 g"
+
+
+def test_optimize_rounds_numbers_keeping_matrix_precision():
+    data = b"0.123456 0 0 0.123456 10.000001 20 cm 1.23456 2.34567 m"
+
+    assert optimize_content_stream(data, precision=2) == b".12346 0 0 .12346 10 20 cm\n1.23 2.35 m"
+
+
+def test_optimize_returns_unparseable_streams_unchanged():
+    data = b"BT (never closed Tj ET"
+
+    assert optimize_content_stream(data) == data
+
+
+@pytest.mark.parametrize("data", [
+    b"",
+    b" \n ",
+    b"q 1 0 0 1 10 10 cm 0 g /GS0 gs Q",
+    b"BT /F1 12 Tf 10 10 Td ET",
+    b"0 0 10 10 re n",
+    b"% just a comment\n",
+])
+def test_streams_that_paint_nothing(data):
+    assert not paints_anything(data)
+
+
+@pytest.mark.parametrize("data", [
+    b"0 0 10 10 re f",
+    b"BT /F1 12 Tf (x) Tj ET",
+    b"q /Im0 Do Q",
+    b"/Sh0 sh",
+    b"BI /W 1 /H 1 /BPC 8 /CS /G ID \x01 EI",
+    b"(unterminated Tj",
+])
+def test_streams_that_paint_or_cannot_be_parsed(data):
+    assert paints_anything(data)
@@ -0,0 +1,280 @@
+import os
+import random
+import zlib
+
+import fitz  # PyMuPDF
+import pytest
+
+import file_compression
+from conftest import page_texts
+from file_compression import PDFCompressor
+from pdf_objects import add_image_xobject, add_stream_object, append_page_content, set_page_resource
+
+
+def test_object_streams_pack_objects(tmp_path, text_pdf):
+    source = text_pdf(pages=5)
+    output = str(tmp_path / "packed.pdf")
+
+    success, message = PDFCompressor().compress_pdf(source, output, object_streams=True)
+
+    assert success, message
+    with open(output, "rb") as f:
+        data = f.read()
+    assert b"/ObjStm" in data and b"/XRef" in data
+    assert page_texts(output) == page_texts(source)
+
+
+def test_linearized_output_shows_page_one_early(tmp_path, text_pdf):
+    pytest.importorskip("pikepdf")
+    source = text_pdf(pages=20)
+    output = str(tmp_path / "web.pdf")
+
+    success, message = PDFCompressor().compress_pdf(source, output, linearize=True)
+
+    assert success, message
+    with open(output, "rb") as f:
+        assert b"/Linearized" in f.read(1024)
+    compressor = PDFCompressor()
+    assert compressor.first_page_bytes(output) < compressor.first_page_bytes(source)
+    assert page_texts(output) == page_texts(source)
+
+
+def test_linearize_without_pikepdf_names_the_package(tmp_path, text_pdf, monkeypatch):
+    monkeypatch.setattr(file_compression, "LINEARIZE_AVAILABLE", False)
+
+    success, message = PDFCompressor().compress_pdf(text_pdf(), str(tmp_path / "out.pdf"), linearize=True)
+
+    assert not success
+    assert "pip install pikepdf" in message
+
+
+def test_first_page_bytes_is_file_size_without_linearization(text_pdf):
+    source = text_pdf()
+    assert PDFCompressor().first_page_bytes(source) == os.path.getsize(source)
+
+
+
+def _logo_pixels(size=32):
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, size, size), False)
+    pix.set_rect(pix.irect, (200, 30, 30))
+    pix.set_rect(fitz.IRect(size // 4, size // 4, size * 3 // 4, size * 3 // 4), (20, 20, 220))
+    return bytes(pix.samples)
+
+
+def _draw_xobject(doc, name, xref):
+    page = doc.new_page(width=200, height=200)
+    set_page_resource(doc, page, "XObject", name, f"{xref} 0 R")
+    append_page_content(doc, page, f"q 100 0 0 100 50 50 cm /{name} Do Q".encode())
+
+
+def _renders(path):
+    with fitz.open(path) as doc:
+        return [page.get_pixmap(dpi=36).samples for page in doc]
+
+
+def test_duplicate_images_keep_form_xobject_streams(tmp_path):
+    # The same logo three times, stored differently so garbage collection cannot merge them;
+    # the third copy is only drawn from inside a form XObject
+    raw = _logo_pixels()
+    doc = fitz.open()
+    images = [add_image_xobject(doc, raw, 32, 32, None, "/DeviceRGB"),
+              add_image_xobject(doc, zlib.compress(raw, 1), 32, 32, "/FlateDecode", "/DeviceRGB"),
+              add_image_xobject(doc, zlib.compress(raw, 9), 32, 32, "/FlateDecode", "/DeviceRGB")]
+    form = add_stream_object(doc, f"/Type/XObject/Subtype/Form/BBox[0 0 1 1]"
+                                  f"/Resources<</XObject<</Im0 {images[2]} 0 R>>>>", b"/Im0 Do")
+    _draw_xobject(doc, "Im0", images[0])
+    _draw_xobject(doc, "Im0", images[1])
+    _draw_xobject(doc, "Fm0", form)
+    source = str(tmp_path / "logos.pdf")
+    doc.save(source)
+    doc.close()
+
+    output = str(tmp_path / "deduped.pdf")
+    success, message = PDFCompressor().compress_pdf(source, output)
+
+    assert success and "Merged 2 duplicate image(s)" in message
+    assert _renders(output) == _renders(source)
+    with fitz.open(output) as result:
+        images = {xref for xref in range(1, result.xref_length())
+                  if result.xref_get_key(xref, "Subtype") == ("name", "/Image")}
+        forms = [xref for xref in range(1, result.xref_length())
+                 if result.xref_get_key(xref, "Subtype") == ("name", "/Form")]
+        assert len(images) == 1
+        assert result.xref_stream(forms[0]) == b"/Im0 Do"
+
+
+def test_identically_encoded_images_are_compared_without_decoding(tmp_path, monkeypatch):
+    # A scan: every page image has the same size and filter; one page is repeated
+    doc = fitz.open()
+    for shade in (10, 90, 170, 170):
+        pixels = bytes([shade]) * (64 * 64)
+        xref = add_image_xobject(doc, zlib.compress(pixels), 64, 64, "/FlateDecode", "/DeviceGray")
+        _draw_xobject(doc, "Im0", xref)
+
+    decoded = []
+    pixmap = fitz.Pixmap
+    monkeypatch.setattr(fitz, "Pixmap", lambda *args: decoded.append(args) or pixmap(*args))
+
+    assert PDFCompressor().collapse_duplicate_images(doc) == 1
+    assert decoded == []
+
+
+def _write_scan(doc, draw, rotation=0, width=300, height=400):
+    """Append a page holding a noisy 150 dpi photo of what draw() paints, like a scanner's output"""
+    np = pytest.importorskip("numpy")
+    source = fitz.open()
+    draw(source.new_page(width=width, height=height))
+    pix = source[0].get_pixmap(dpi=150)
+    pixels = np.frombuffer(pix.samples, np.uint8).reshape(pix.height, pix.width, 3).astype(np.int16)
+    noise = np.random.default_rng(1).normal(0, 4, pixels.shape)
+    pixels = np.clip(pixels - 10 + noise, 0, 255).astype(np.uint8)
+    scan = fitz.Pixmap(fitz.csRGB, pix.width, pix.height, pixels.tobytes(), False)
+    page = doc.new_page(width=width, height=height)
+    page.insert_image(page.rect, stream=scan.tobytes("jpg", jpg_quality=90))
+    page.set_rotation(rotation)
+
+
+RED = (0.8, 0.1, 0.1)
+
+
+def _letter(page):
+    for line in range(12):
+        page.insert_text((30, 40 + line * 18), "The quick brown fox jumps over the dog", fontsize=10)
+    page.draw_rect(fitz.Rect(180, 280, 270, 330), color=RED, fill=RED)
+    page.insert_text((180, 360), "APPROVED", fontsize=18, color=RED)
+
+
+def _photo(page):
+    for y in range(0, 400, 10):
+        for x in range(0, 300, 10):
+            page.draw_rect(fitz.Rect(x, y, x + 10, y + 10), color=None, fill=(x / 300, y / 400, 0.5), width=0)
+
+
+def _full_letter(page):
+    for line in range(40):
+        page.insert_text((40, 50 + line * 17), f"{line + 1:02d} The quick brown fox jumps over the lazy dog, twice",
+                         fontsize=10)
+    page.draw_rect(fitz.Rect(380, 600, 560, 700), color=RED, fill=RED)
+    page.insert_text((380, 730), "APPROVED", fontsize=18, color=RED)
+
+
+def _pixel(path, page_number, point, dpi=72):
+    with fitz.open(path) as doc:
+        return doc[page_number].get_pixmap(dpi=dpi).pixel(*point)
+
+
+def test_mrc_keeps_the_colour_of_coloured_ink(tmp_path):
+    doc = fitz.open()
+    _write_scan(doc, _letter)
+    source = str(tmp_path / "letter.pdf")
+    doc.save(source)
+    doc.close()
+
+    output = str(tmp_path / "mrc.pdf")
+    success, message = PDFCompressor().compress_pdf(source, output, mrc=True)
+
+    assert success and "MRC applied to 1 scanned page(s)" in message
+    stamp = _pixel(output, 0, (225, 305))
+    assert all(abs(a - b) <= 30 for a, b in zip(stamp, _pixel(source, 0, (225, 305)))), stamp
+    assert stamp[0] > 150 and stamp[1] < 60 and stamp[2] < 60
+
+
+def test_mrc_leaves_photos_unchanged(tmp_path):
+    doc = fitz.open()
+    _write_scan(doc, _photo)
+    source = str(tmp_path / "photo.pdf")
+    doc.save(source)
+    doc.close()
+
+    output = str(tmp_path / "mrc.pdf")
+    success, message = PDFCompressor().compress_pdf(source, output, mrc=True)
+
+    assert success and "MRC" not in message
+    assert _renders(output) == _renders(source)
+
+
+def test_mrc_keeps_metadata_outline_annotations_and_rotation(tmp_path):
+    np = pytest.importorskip("numpy")
+    doc = fitz.open()
+    _write_scan(doc, _letter)
+    _write_scan(doc, _letter, rotation=90)
+    doc.set_metadata({"title": "Scan archive", "author": "Records"})
+    doc.set_toc([[1, "Letter", 1], [1, "Turned letter", 2]])
+    doc[0].add_text_annot((20, 20), "checked")
+    source = str(tmp_path / "archive.pdf")
+    doc.save(source)
+    doc.close()
+
+    output = str(tmp_path / "mrc.pdf")
+    success, message = PDFCompressor().compress_pdf(source, output, mrc=True)
+
+    assert success and "MRC applied to 2 scanned page(s)" in message
+    with fitz.open(output) as result:
+        assert result.metadata["title"] == "Scan archive"
+        assert result.get_toc() == [[1, "Letter", 1], [1, "Turned letter", 2]]
+        assert [annot.info["content"] for annot in result[0].annots()] == ["checked"]
+        assert result[1].rotation == 90
+    for before, after in zip(_renders(source), _renders(output)):
+        difference = np.abs(np.frombuffer(before, np.uint8).astype(int) - np.frombuffer(after, np.uint8))
+        assert difference.mean() < 8
+
+
+def test_mrc_is_much_smaller_than_plain_jpeg_recompression(tmp_path):
+    doc = fitz.open()
+    _write_scan(doc, _full_letter, width=612, height=792)
+    source = str(tmp_path / "letter.pdf")
+    doc.save(source)
+    doc.close()
+    # The plain alternative: the page re-encoded as one JPEG at the scan's resolution and the MRC layers' quality
+    jpeg = str(tmp_path / "jpeg.pdf")
+    with fitz.open(source) as scan, fitz.open() as out:
+        page = out.new_page(width=612, height=792)
+        page.insert_image(page.rect, stream=scan[0].get_pixmap(dpi=150).tobytes("jpg", jpg_quality=50))
+        out.save(jpeg, garbage=3, deflate=True)
+
+    output = str(tmp_path / "mrc.pdf")
+    success, message = PDFCompressor().compress_pdf(source, output, mrc=True)
+
+    assert success and "MRC applied to 1 scanned page(s)" in message
+    assert os.path.getsize(output) < os.path.getsize(jpeg) / 2, (os.path.getsize(output), os.path.getsize(jpeg))
+
+
+def _stroked_lines_pdf(path, count=400):
+    doc = fitz.open()
+    page = doc.new_page()
+    content = b"".join(b"%d.000000 %d.000000 m %d.000000 %d.000000 l S\n" % (i % 600, i % 800, (i * 7) % 600, (i * 3) % 800)
+                       for i in range(count))
+    append_page_content(doc, page, content)
+    doc.save(path)
+    doc.close()
+
+
+def test_content_stream_saving_is_measured_after_compression(tmp_path):
+    source = str(tmp_path / "lines.pdf")
+    _stroked_lines_pdf(source)
+    with fitz.open(source) as doc:
+        original = sum(len(zlib.compress(doc.xref_stream(xref))) for xref in doc[0].get_contents())
+        saved = PDFCompressor().optimize_content_streams(doc)
+        rewritten = len(zlib.compress(doc.xref_stream(doc[0].get_contents()[0])))
+
+    assert 0 < saved == original - rewritten
+
+
+def test_rewrite_that_compresses_worse_keeps_the_original_stream(tmp_path, monkeypatch):
+    source = str(tmp_path / "lines.pdf")
+    _stroked_lines_pdf(source)
+    with fitz.open(source) as doc:
+        contents = doc[0].get_contents()
+        original = b"\n".join(doc.xref_stream(xref) for xref in contents)
+    # Shorter than the original but incompressible, so it would deflate larger
+    noise = random.Random(0).randbytes(len(original) // 2)
+    assert len(zlib.compress(noise)) > len(zlib.compress(original))
+    monkeypatch.setattr(file_compression, "optimize_content_stream", lambda data, precision: noise)
+
+    output = str(tmp_path / "out.pdf")
+    success, message = PDFCompressor().compress_pdf(source, output, dedupe_images=False, optimize_content=True)
+
+    assert success and "Content streams reduced" not in message
+    with fitz.open(source) as doc:
+        assert PDFCompressor().optimize_content_streams(doc) == 0
+        assert doc[0].get_contents() == contents
@@ -0,0 +1,384 @@
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+import zipfile
+
+import fitz  # PyMuPDF
+import pytest
+
+import file_converter
+from conftest import page_texts
+from file_converter import ConversionPipeline, FileConverter
+from result_cache import ResultCache
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def _embedded_images(pdf_path):
+    """(filter, raw stream) of every image XObject in the file"""
+    with fitz.open(pdf_path) as doc:
+        return [(doc.xref_get_key(xref, "Filter")[1], doc.xref_stream_raw(xref))
+                for xref in range(1, doc.xref_length())
+                if doc.xref_get_key(xref, "Subtype") == ("name", "/Image")]
+
+
+@pytest.mark.parametrize("mode, save_options", [
+    ("RGB", {"quality": 90}),
+    ("RGB", {"quality": 90, "progressive": True}),
+    ("L", {"quality": 80}),
+    ("CMYK", {"quality": 90}),
+])
+def test_jpeg_passthrough_embeds_the_original_bytes(tmp_path, mode, save_options):
+    image = str(tmp_path / "photo.jpg")
+    Image.new(mode, (64, 48), "teal").save(image, **save_options)
+
+    success, message = FileConverter().image_to_pdf(image, str(tmp_path / "out"))
+
+    assert success, message
+    with open(image, "rb") as f:
+        assert _embedded_images(os.path.join(tmp_path, "out", "photo_converted.pdf")) == [("/DCTDecode", f.read())]
+
+
+def test_passthrough_off_re_encodes(tmp_path):
+    image = str(tmp_path / "photo.jpg")
+    Image.new("RGB", (64, 48), "teal").save(image, quality=95)
+
+    success, message = FileConverter().image_to_pdf(image, str(tmp_path / "out"), passthrough=False)
+
+    assert success, message
+    with open(image, "rb") as f:
+        original = f.read()
+    [(_, embedded)] = _embedded_images(os.path.join(tmp_path, "out", "photo_converted.pdf"))
+    assert embedded != original
+
+
+def test_compress_step_closes_the_document_it_opens(tmp_path, text_pdf, monkeypatch):
+    opened = []
+    as_document = file_converter._as_document
+    monkeypatch.setattr(file_converter, "_as_document", lambda data: opened.append(as_document(data)) or opened[-1])
+    output = str(tmp_path / "compressed.pdf")
+
+    success, message = ConversionPipeline(FileConverter(), ["compress"]).run(text_pdf(pages=2), output)
+
+    assert success, message
+    assert len(opened) == 1 and opened[0].is_closed
+    assert page_texts(output) == ["page 1", "page 2"]
+
+
+def _images(directory, count):
+    paths = []
+    for n in range(count):
+        paths.append(str(directory / f"image_{n}.png"))
+        Image.new("RGB", (40, 30), (n * 40, 90, 160)).save(paths[-1])
+    return paths
+
+
+# Stand-ins for _batch_convert_task; pool workers are forked, so they see the monkeypatched module
+needs_fork = pytest.mark.skipif(multiprocessing.get_start_method() != "fork",
+                                reason="pool workers only see monkeypatched tasks when forked")
+
+
+def _timed_task(conversion_type, input_path, output_dir):
+    start = time.time()
+    time.sleep(0.3)
+    with open(os.path.join(output_dir, os.path.basename(input_path) + ".times"), "w") as f:
+        f.write(f"{start} {time.time()}")
+    return True, "done"
+
+
+def _fail_once_task(conversion_type, input_path, output_dir):
+    marker = os.path.join(output_dir, os.path.basename(input_path) + ".failed")
+    if os.path.exists(marker):
+        return True, "done"
+    open(marker, "w").close()
+    return False, "first attempt fails"
+
+
+def _most_at_once(output_dir):
+    intervals = []
+    for name in os.listdir(output_dir):
+        if name.endswith(".times"):
+            with open(os.path.join(output_dir, name)) as f:
+                intervals.append([float(value) for value in f.read().split()])
+    return max(sum(1 for start, end in intervals if start <= moment < end) for moment, _ in intervals)
+
+
+@needs_fork
+@pytest.mark.parametrize("limit", [1, 2])
+def test_batch_pool_honours_the_per_type_limit(tmp_path, monkeypatch, limit):
+    monkeypatch.setattr(file_converter, "_batch_convert_task", _timed_task)
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+
+    summary = FileConverter().batch_convert_files(_images(tmp_path, 4), str(output_dir), workers=3,
+                                                  type_limits={"image_to_pdf": limit})
+
+    assert summary["successful"] == 4
+    assert _most_at_once(output_dir) == limit
+
+
+@needs_fork
+@pytest.mark.parametrize("retries, successful", [(1, 3), (0, 0)])
+def test_batch_pool_retries_failed_files(tmp_path, monkeypatch, retries, successful):
+    monkeypatch.setattr(file_converter, "_batch_convert_task", _fail_once_task)
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+
+    summary = FileConverter().batch_convert_files(_images(tmp_path, 3), str(output_dir), workers=2, retries=retries)
+
+    assert summary["successful"] == successful and summary["total"] == 3
+    assert summary["retried"] == (3 if retries else 0)
+    assert all(result["attempts"] == retries + 1 for result in summary["results"])
+
+
+def test_batch_pool_serves_repeat_files_from_the_cache(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    images = _images(tmp_path, 3)
+
+    first = FileConverter(cache=cache).batch_convert_files(images, str(tmp_path / "first"), workers=2)
+    second = FileConverter(cache=cache).batch_convert_files(images, str(tmp_path / "second"), workers=2)
+
+    assert first["successful"] == second["successful"] == 3
+    assert all("served from cache" in result["message"] for result in second["results"])
+    assert all(result["attempts"] == 0 for result in second["results"])
+    for name in ("image_0", "image_1", "image_2"):
+        with open(tmp_path / "first" / f"{name}_converted.pdf", "rb") as a, \
+                open(tmp_path / "second" / f"{name}_converted.pdf", "rb") as b:
+            assert a.read() == b.read()
+
+
+@pytest.mark.parametrize("limits", [{"image_to_pdf": 0}, {"pdf_to_word": -1}])
+def test_batch_rejects_limits_below_one(tmp_path, limits):
+    with pytest.raises(ValueError, match="at least 1"):
+        FileConverter().batch_convert_files(_images(tmp_path, 2), str(tmp_path / "out"), workers=2,
+                                            type_limits=limits)
+
+
+def _docx_body(path):
+    with zipfile.ZipFile(path) as docx:
+        return docx.read("word/document.xml")
+
+
+def test_parallel_pdf_to_word_matches_the_sequential_conversion(tmp_path, text_pdf):
+    pytest.importorskip("pdf2docx")
+    source = text_pdf(pages=5, text="Section {n}: terms and conditions")
+    output_dir = str(tmp_path / "docx")
+    progress = {}
+
+    assert FileConverter().pdf_to_word(source, output_dir, "plain.docx")[0]
+    for workers in (1, 3):
+        calls = progress[workers] = []
+        success, message = FileConverter().pdf_to_word(source, output_dir, f"workers{workers}.docx", workers=workers,
+                                                       progress_callback=lambda done, total: calls.append((done, total)))
+        assert success, message
+
+    plain = _docx_body(os.path.join(output_dir, "plain.docx"))
+    assert b"Section 3: terms and conditions" in plain
+    assert _docx_body(os.path.join(output_dir, "workers1.docx")) == plain
+    assert _docx_body(os.path.join(output_dir, "workers3.docx")) == plain
+    assert progress[1] == progress[3] == [(n, 5) for n in range(1, 6)]
+
+
+def _numbered_images(directory, numbers, size=(200, 100)):
+    """PNGs named scan_<n>.png whose red channel is n, in the order given"""
+    paths = []
+    for n in numbers:
+        paths.append(str(directory / f"scan_{n}.png"))
+        Image.new("RGB", size, (n, 0, 0)).save(paths[-1])
+    return paths
+
+
+def _page_reds(pdf_path):
+    with fitz.open(pdf_path) as doc:
+        return [page.get_pixmap(dpi=10).pixel(0, 0)[0] for page in doc]
+
+
+@pytest.mark.parametrize("order, expected", [("name", [1, 2, 10, 11]), ("given", [10, 2, 11, 1])])
+def test_images_to_pdf_orders_pages(tmp_path, order, expected):
+    images = _numbered_images(tmp_path, [10, 2, 11, 1])
+    output = str(tmp_path / "out" / "combined.pdf")
+
+    success, message = FileConverter().images_to_pdf(images, str(tmp_path / "out"), "combined.pdf", order=order)
+
+    assert success and message.startswith("4 images combined")
+    assert _page_reds(output) == expected
+    with fitz.open(output) as doc:
+        # Without a page size each page is the image at 100 dpi
+        assert {tuple(page.rect) for page in doc} == {(0, 0, 144, 72)}
+
+
+def test_images_to_pdf_fits_images_on_paper(tmp_path):
+    images = _numbered_images(tmp_path, [1], size=(400, 100)) + _numbered_images(tmp_path, [2], size=(100, 200))
+    output = str(tmp_path / "out" / "combined.pdf")
+
+    success, message = FileConverter().images_to_pdf(images, str(tmp_path / "out"), "combined.pdf",
+                                                     page_size="a4", margin=36)
+
+    assert success, message
+    with fitz.open(output) as doc:
+        # A landscape image gets a landscape page
+        assert [tuple(page.rect) for page in doc] == [(0, 0, 842, 595), (0, 0, 595, 842)]
+        for page, aspect in zip(doc, (4, 0.5)):
+            [info] = page.get_image_info()
+            box = fitz.Rect(info["bbox"])
+            assert box in fitz.Rect(36, 36, page.rect.width - 36, page.rect.height - 36)
+            assert box.width / box.height == pytest.approx(aspect)
+            # As large as the margins allow
+            assert box.width == pytest.approx(page.rect.width - 72) or box.height == pytest.approx(page.rect.height - 72)
+            assert (box.x0 + box.x1) / 2 == pytest.approx(page.rect.width / 2)
+            assert (box.y0 + box.y1) / 2 == pytest.approx(page.rect.height / 2)
+
+
+def test_pdf_to_images_exports_a_page_range_as_webp(tmp_path, text_pdf):
+    source = text_pdf(pages=12)
+    output_dir = tmp_path / "images"
+    progress = []
+
+    success, message = FileConverter().pdf_to_images(source, str(output_dir), "webp", dpi=36, pages="2-3, -1",
+                                                     workers=2, progress_callback=lambda *args: progress.append(args))
+
+    assert success and message.startswith("3 page(s) exported as WEBP images")
+    assert sorted(os.listdir(output_dir)) == ["input_page_02.webp", "input_page_03.webp", "input_page_12.webp"]
+    with Image.open(output_dir / "input_page_03.webp") as image:
+        assert image.format == "WEBP" and image.size == (150, 200)
+    assert progress == [(1, 3), (2, 3), (3, 3)]
+
+
+@pytest.mark.parametrize("fmt, colorspace, image_format, mode", [
+    ("jpg", "cmyk", "JPEG", "CMYK"),
+    ("png", "gray", "PNG", "L"),
+    ("jpg", "rgb", "JPEG", "RGB"),
+])
+def test_pdf_to_images_colorspaces(tmp_path, text_pdf, fmt, colorspace, image_format, mode):
+    output_dir = tmp_path / "images"
+
+    success, message = FileConverter().pdf_to_images(text_pdf(pages=1), str(output_dir), fmt, dpi=72,
+                                                     colorspace=colorspace)
+
+    assert success, message
+    [name] = os.listdir(output_dir)
+    with Image.open(output_dir / name) as image:
+        assert (image.format, image.mode, image.size) == (image_format, mode, (300, 400))
+        # The text is there: the darkest pixel is much darker than the paper
+        gray = image.convert("L")
+        assert gray.getextrema()[0] < 100 and gray.getpixel((5, 5)) > 240
+
+
+def test_pdf_to_images_cmyk_is_jpeg_only(tmp_path, text_pdf):
+    success, message = FileConverter().pdf_to_images(text_pdf(), str(tmp_path / "images"), "png", colorspace="cmyk")
+
+    assert not success and "CMYK output is only supported for JPEG" in message
+
+
+def _structured_pdf(path, pages):
+    doc = fitz.open()
+    for n in range(1, pages + 1):
+        page = doc.new_page(width=400, height=500)
+        page.insert_text((40, 60), f"Chapter {n}", fontsize=22)
+        page.insert_text((40, 100), "This paragraph is wrapped over two lines and the sec-", fontsize=10)
+        page.insert_text((40, 112), "ond line continues it.", fontsize=10)
+        page.insert_text((40, 150), "• first item", fontsize=10)
+        page.insert_text((40, 162), "• second item", fontsize=10)
+        page.insert_text((40, 200), "1. step one", fontsize=10)
+        page.insert_text((40, 212), "2. step two", fontsize=10)
+    doc.save(path)
+    doc.close()
+    return str(path)
+
+
+STRUCTURED_PAGE_MD = ("# Chapter {n}\n\nThis paragraph is wrapped over two lines and the second line continues it.\n\n"
+                      "- first item\n- second item\n\n1. step one\n2. step two\n\n")
+
+
+def test_pdf_to_text_writes_markdown_in_page_order(tmp_path):
+    source = _structured_pdf(tmp_path / "report.pdf", pages=5)
+
+    # One page per chunk on two workers, so chunks can finish out of order
+    success, message = FileConverter().pdf_to_text(source, str(tmp_path / "text"), "report.md", fmt="md",
+                                                   workers=2, chunk_size=1)
+
+    assert success and "from 5 page(s)" in message
+    with open(tmp_path / "text" / "report.md", encoding="utf-8") as f:
+        assert f.read() == "".join(f"<!-- Page {n} -->\n\n" + STRUCTURED_PAGE_MD.format(n=n) for n in range(1, 6))
+
+
+def test_pdf_to_text_plain_text_separates_pages_with_form_feeds(tmp_path):
+    source = _structured_pdf(tmp_path / "report.pdf", pages=2)
+
+    success, message = FileConverter().pdf_to_text(source, str(tmp_path / "text"), "report.txt", chunk_size=16)
+
+    assert success, message
+    with open(tmp_path / "text" / "report.txt", encoding="utf-8") as f:
+        pages = f.read().split("\f")
+    assert [page.splitlines()[0] for page in pages] == ["Chapter 1", "Chapter 2"]
+    assert "• first item\n• second item\n\n1. step one" in pages[1]
+
+
+def _fax_frame(black_left):
+    """A 1-bit 400x200 frame, black on the left or the right half"""
+    frame = Image.new("1", (400, 200), 1)
+    frame.paste(0, (0, 0, 200, 200) if black_left else (200, 0, 400, 200))
+    return frame
+
+
+def _page_halves(pdf_path):
+    """(left, right) grey value in the middle of each half, per page"""
+    halves = []
+    with fitz.open(pdf_path) as doc:
+        for page in doc:
+            pix = page.get_pixmap(dpi=36)
+            middle = pix.height // 2
+            halves.append((pix.pixel(pix.width // 4, middle)[0], pix.pixel(pix.width * 3 // 4, middle)[0]))
+    return halves
+
+
+def test_g4_tiff_frames_are_copied_without_decoding(tmp_path):
+    tiff = str(tmp_path / "fax.tif")
+    frames = [_fax_frame(True), _fax_frame(False), _fax_frame(True)]
+    frames[0].save(tiff, compression="group4", save_all=True, append_images=frames[1:], dpi=(200, 200))
+    with Image.open(tiff) as image:
+        strips = []
+        with open(tiff, "rb") as f:
+            for index in range(3):
+                image.seek(index)
+                f.seek(image.tag_v2[273][0])
+                strips.append(f.read(image.tag_v2[279][0]))
+
+    success, message = FileConverter().tiff_to_pdf(tiff, str(tmp_path / "out"))
+
+    assert success and "(3 page(s), 3 copied without decoding)" in message
+    output = os.path.join(tmp_path, "out", "fax_converted.pdf")
+    assert _embedded_images(output) == [("/CCITTFaxDecode", strip) for strip in strips]
+    assert _page_halves(output) == [(0, 255), (255, 0), (0, 255)]
+    with fitz.open(output) as doc:
+        assert tuple(doc[0].rect) == (0, 0, 144, 72)  # 400x200 pixels at 200 dpi
+
+
+def test_tiff_mixes_raw_bilevel_and_decoded_colour_frames(tmp_path):
+    tiff = str(tmp_path / "scan.tif")
+    colour = Image.new("RGB", (400, 200), (250, 250, 250))
+    colour.paste((0, 0, 0), (0, 0, 200, 200))
+    _fax_frame(False).save(tiff, compression="raw", save_all=True, append_images=[colour])
+
+    success, message = FileConverter().tiff_to_pdf(tiff, str(tmp_path / "out"))
+
+    assert success and "(2 page(s), 1 copied without decoding)" in message
+    output = os.path.join(tmp_path, "out", "scan_converted.pdf")
+    filters = [image_filter for image_filter, _ in _embedded_images(output)]
+    assert filters[0] == "/FlateDecode" and len(filters) == 2
+    left, right = _page_halves(output)[1]
+    assert _page_halves(output)[0] == (255, 0) and left < 10 and right > 240
+
+
+def test_pdf_to_word_does_not_need_docx2pdf():
+    pytest.importorskip("pdf2docx")
+    pytest.importorskip("docx")
+    # As on Linux, where docx2pdf is not installed: a None entry makes the module unfindable
+    script = ("import sys; sys.modules['docx2pdf'] = None; import file_converter; "
+              "print(file_converter.FileConverter().check_dependencies('pdf_to_word'))")
+    result = subprocess.run([sys.executable, "-c", script], cwd=os.path.dirname(file_converter.__file__),
+                            capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == "(True, 'Dependencies available')"
@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+
+from lazy_import import check_import_budget, is_available, lazy_module
+
+PDF_TOOL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pdf_tool")
+
+# Conversion backends file_converter must not load just by being imported
+BACKEND_MODULES = ("fitz", "PIL", "pdf2docx", "docx", "docx2pdf", "numpy")
+
+
+def test_file_converter_import_stays_within_budget():
+    within_budget, message = check_import_budget("file_converter", budget_seconds=0.5)
+
+    assert within_budget, message
+
+
+def test_importing_file_converter_loads_no_backend():
+    script = f"import sys, file_converter; print(','.join(m for m in {BACKEND_MODULES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", script], cwd=PDF_TOOL_DIR,
+                            capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == ""
+
+
+def test_lazy_module_imports_on_first_attribute_access():
+    proxy = lazy_module("colorsys")
+    sys.modules.pop("colorsys", None)
+
+    assert "colorsys" not in sys.modules
+    assert proxy.rgb_to_hsv(1, 0, 0) == (0, 1, 1)
+    assert "colorsys" in sys.modules
+
+
+def test_is_available_imports_nothing():
+    sys.modules.pop("colorsys", None)
+
+    assert is_available("colorsys", "json")
+    assert not is_available("colorsys", "no_such_module_here")
+    assert "colorsys" not in sys.modules
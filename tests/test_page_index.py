@@ -0,0 +1,164 @@
+import os
+
+import fitz  # PyMuPDF
+import pytest
+
+import page_index
+from conftest import page_texts, write_text_pdf
+from page_index import PageIndex, PageIndexError, index_path_for
+from page_selector import PageSelectionError
+from pdf_editor import PDFEditor
+
+
+@pytest.fixture(autouse=True)
+def _cache_home(tmp_path, monkeypatch):
+    """Keep default-location indexes inside the test's directory"""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path / "cache"))
+
+
+def test_extracts_pages_through_the_index(tmp_path, text_pdf):
+    source = text_pdf(pages=6, rotations=[0, 90])
+    output = str(tmp_path / "out.pdf")
+    index_dir = str(tmp_path / "not" / "yet" / "there")
+
+    success, message = PDFEditor().extract_pages(source, output, "5, 2", use_index=True, index_dir=index_dir)
+
+    assert success and "via page index" in message
+    assert os.path.isfile(index_path_for(source, index_dir))
+    assert page_texts(output) == ["page 2", "page 5"]
+    with fitz.open(output) as doc:
+        assert [page.rotation for page in doc] == [90, 0]
+
+
+def test_index_is_kept_in_the_user_cache_not_next_to_the_pdf(tmp_path, text_pdf):
+    source = text_pdf(pages=3)
+
+    PDFEditor().extract_pages(source, str(tmp_path / "out.pdf"), [0], use_index=True)
+
+    assert index_path_for(source).startswith(str(tmp_path / "cache"))
+    assert os.path.isfile(index_path_for(source))
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(page_index.INDEX_SUFFIX)]
+
+
+@pytest.mark.parametrize("pages", [[-1], [3], [0, 7]])
+def test_pages_outside_the_document_are_rejected(tmp_path, text_pdf, pages):
+    source = text_pdf(pages=3)
+    index = PageIndex.open(source, str(tmp_path / "index"))
+
+    with pytest.raises(PageIndexError, match="outside the document"):
+        index.write_pages(source, pages, str(tmp_path / "out.pdf"))
+    with pytest.raises(PageSelectionError):
+        PDFEditor().extract_pages(source, str(tmp_path / "out.pdf"), pages, use_index=True)
+
+
+def _edit_in_place(path, old, new):
+    """Overwrite bytes in the middle of the file, keeping its size"""
+    with open(path, "r+b") as f:
+        data = f.read()
+        assert len(old) == len(new) and data.count(old) == 1
+        f.seek(data.index(old))
+        f.write(new)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def test_in_place_edits_in_the_middle_are_detected(tmp_path):
+    source = write_text_pdf(tmp_path / "a.pdf", pages=3, height=444)
+    with fitz.open(source) as doc:
+        doc[1].set_mediabox(fitz.Rect(0, 0, 300, 400))
+        doc.saveIncr()
+    index_dir = str(tmp_path / "index")
+    index = PageIndex.open(source, index_dir)
+
+    _edit_in_place(source, b"0 0 300 400]", b"0 0 300 500]")
+
+    with pytest.raises(PageIndexError, match="changed"):
+        index.write_pages(source, [1], str(tmp_path / "out.pdf"))
+    assert PageIndex.load(index_path_for(source, index_dir), source) is None
+    rebuilt = PageIndex.open(source, index_dir)
+    assert rebuilt.fingerprint != index.fingerprint
+    rebuilt.write_pages(source, [1], str(tmp_path / "out.pdf"))
+    with fitz.open(str(tmp_path / "out.pdf")) as doc:
+        assert doc[0].mediabox == fitz.Rect(0, 0, 300, 500)
+
+
+def test_touched_file_keeps_its_index_without_rehashing_next_time(tmp_path, text_pdf, monkeypatch):
+    source = text_pdf(pages=2)
+    index_dir = str(tmp_path / "index")
+    index = PageIndex.open(source, index_dir)
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    assert PageIndex.load(index.index_path, source).fingerprint == index.fingerprint
+    monkeypatch.setattr(page_index, "file_fingerprint", lambda path: pytest.fail("hashed again"))
+    assert PageIndex.load(index.index_path, source) is not None
+
+
+def test_objects_replaced_by_incremental_updates_are_not_copied(tmp_path):
+    source = str(tmp_path / "updated.pdf")
+    doc = fitz.open()
+    for n in (1, 2):
+        doc.new_page(width=300, height=400).insert_text((40, 80), f"page {n} original")
+    doc.save(source)
+    doc.close()
+    # Rewrite page 1's content in two incremental updates; the old versions stay in the file
+    for version in (1, 2):
+        doc = fitz.open(source)
+        xref = doc[0].get_contents()[0]
+        doc.update_stream(xref, f"BT /F1 11 Tf 40 320 Td (page 1 version {version}) Tj ET".encode(), compress=False)
+        doc.save(source, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP)
+        doc.close()
+    output = str(tmp_path / "out.pdf")
+
+    PageIndex.open(source, str(tmp_path / "index")).write_pages(source, [1, 0], output)
+
+    assert page_texts(output) == ["page 2 original", "page 1 version 2"]
+    with open(output, "rb") as f:
+        data = f.read()
+    assert b"version 1" not in data
+
+
+def test_new_objects_do_not_take_numbers_copied_objects_refer_to(tmp_path):
+    # A text field whose widget sits on page 1 and whose parent field is the last object in the file
+    doc = fitz.open()
+    for n in range(1, 4):
+        doc.new_page(width=300, height=400).insert_text((40, 80), f"page {n}")
+    widget = fitz.Widget()
+    widget.field_type, widget.field_name, widget.rect = fitz.PDF_WIDGET_TYPE_TEXT, "name", fitz.Rect(40, 100, 200, 130)
+    doc[0].add_widget(widget)
+    widget_xref = next(doc[0].widgets()).xref
+    field = doc.get_new_xref()
+    doc.update_object(field, f"<</FT/Tx/T(person)/Kids[{widget_xref} 0 R]>>")
+    doc.xref_set_key(widget_xref, "Parent", f"{field} 0 R")
+    source = str(tmp_path / "form.pdf")
+    doc.save(source)
+    doc.close()
+    output = str(tmp_path / "out.pdf")
+
+    PageIndex.open(source, str(tmp_path / "index")).write_pages(source, [0], output)
+
+    with fitz.open(output) as result:
+        assert result.xref_get_key(widget_xref, "Parent") == ("xref", f"{field} 0 R")
+        pages_root = int(result.xref_get_key(result.pdf_catalog(), "Pages")[1].split()[0])
+        assert pages_root > field and result.pdf_catalog() > field
+        assert page_texts(output) == ["page 1"]
+
+
+def test_attributes_inherited_from_the_page_tree_are_kept(tmp_path, text_pdf):
+    with fitz.open(text_pdf(pages=3)) as doc:
+        root = int(doc.xref_get_key(doc.pdf_catalog(), "Pages")[1].split()[0])
+        doc.xref_set_key(root, "Rotate", "90")
+        doc.xref_set_key(root, "MediaBox", "[0 0 400 500]")
+        for page in doc:
+            doc.xref_set_key(page.xref, "Rotate", "null")
+            doc.xref_set_key(page.xref, "MediaBox", "null")
+        source = str(tmp_path / "inherited.pdf")
+        doc.save(source)
+    output = str(tmp_path / "out.pdf")
+
+    PageIndex.open(source, str(tmp_path / "index")).write_pages(source, [2], output)
+
+    with fitz.open(output) as result:
+        assert result[0].rotation == 90 and result[0].mediabox == fitz.Rect(0, 0, 400, 500)
+    assert page_texts(output) == ["page 3"]
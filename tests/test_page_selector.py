@@ -0,0 +1,77 @@
+import pytest
+
+from page_selector import (PageSelection, PageSelectionError, page_mask, parse_page_order, parse_pages,
+                           resolve_page_order, resolve_pages)
+
+
+@pytest.mark.parametrize("spec, expected", [
+    ("1", [0]),
+    ("2-4", [1, 2, 3]),
+    ("4-2", [1, 2, 3]),
+    ("8-", [7, 8, 9]),
+    ("-1, end", [9]),
+    ("-3--2", [7, 8]),
+    ("1-10:3", [0, 3, 6, 9]),
+    ("odd", [0, 2, 4, 6, 8]),
+    ("even", [1, 3, 5, 7, 9]),
+    ("2-7:odd", [2, 4, 6]),
+    ("all, !2-9", [0, 9]),
+    ("!odd", [1, 3, 5, 7, 9]),
+    ("!5, 4-6", [3, 5]),
+    ("3, 1, 3", [0, 2]),
+])
+def test_selections(spec, expected):
+    assert parse_pages(spec, 10) == expected
+
+
+@pytest.mark.parametrize("spec", ["", " , ", "0", "1-x", "odd:2", "5:2", "1-4:0", "1-4:x", "a"])
+def test_invalid_specs(spec):
+    with pytest.raises(PageSelectionError):
+        PageSelection(spec)
+
+
+@pytest.mark.parametrize("spec", ["11", "2-11", "-11"])
+def test_pages_outside_the_document(spec):
+    with pytest.raises(PageSelectionError, match="outside the document"):
+        parse_pages(spec, 10)
+
+
+def test_compiled_selection_applies_to_any_length():
+    selection = PageSelection("1, -1")
+
+    assert selection.indexes(3) == [0, 2]
+    assert selection.indexes(1000) == [0, 999]
+    assert selection.mask(3) == bytearray(b"\x01\x00\x01")
+
+
+@pytest.mark.parametrize("spec, expected", [
+    ("3, 1, 2", [2, 0, 1]),
+    ("end-1", [4, 3, 2, 1, 0]),
+    ("1, 1, 1", [0, 0, 0]),
+    ("1-5:2, 5-1:even", [0, 2, 4, 3, 1]),
+])
+def test_page_orders_keep_order_and_repeats(spec, expected):
+    assert parse_page_order(spec, 5) == expected
+
+
+@pytest.mark.parametrize("spec", ["!2", " , "])
+def test_invalid_page_orders(spec):
+    with pytest.raises(PageSelectionError):
+        parse_page_order(spec, 5)
+
+
+def test_resolve_accepts_strings_and_index_lists():
+    assert resolve_pages("2-3", 5) == [1, 2]
+    assert resolve_pages((4, 0), 5) == [4, 0]
+    assert resolve_page_order([4, 4, 0], 5) == [4, 4, 0]
+
+
+@pytest.mark.parametrize("resolve", [resolve_pages, resolve_page_order])
+@pytest.mark.parametrize("indexes", [[5], [-1], [0, 7]])
+def test_resolve_rejects_indexes_outside_the_document(resolve, indexes):
+    with pytest.raises(PageSelectionError, match=r"outside the document \(0-4\)"):
+        resolve(indexes, 5)
+
+
+def test_page_mask():
+    assert page_mask([0, 3, 3], 4) == bytearray(b"\x01\x00\x00\x01")
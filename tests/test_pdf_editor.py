@@ -0,0 +1,370 @@
+import os
+
+import fitz  # PyMuPDF
+import pytest
+
+from conftest import page_texts
+from page_selector import PageSelectionError
+from pdf_editor import PDFEditor
+
+
+def _rotations(path):
+    with fitz.open(path) as doc:
+        return [page.rotation for page in doc]
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_incremental_rotation_in_place_appends_an_update(text_pdf):
+    source = text_pdf(pages=4)
+    original = _read(source)
+
+    success, message = PDFEditor().rotate_pages(source, source, [0, 2], 90, incremental=True)
+
+    assert success and "in place" in message
+    updated = _read(source)
+    assert updated.startswith(original) and len(updated) > len(original)
+    assert _rotations(source) == [90, 0, 90, 0]
+
+
+def test_incremental_rotation_to_another_file_leaves_the_input_alone(tmp_path, text_pdf):
+    source = text_pdf(pages=3)
+    original = _read(source)
+    output = str(tmp_path / "rotated.pdf")
+
+    success, message = PDFEditor().rotate_pages(source, output, "2-3", 180, incremental=True)
+
+    assert success, message
+    assert _read(source) == original
+    assert _rotations(output) == [0, 180, 180]
+
+
+@pytest.mark.parametrize("pages", [[3], [-1], "4"])
+def test_rotation_rejects_pages_outside_the_document(tmp_path, text_pdf, pages):
+    source = text_pdf(pages=3)
+
+    with pytest.raises(PageSelectionError):
+        PDFEditor().rotate_pages(source, str(tmp_path / "out.pdf"), pages, 90, incremental=True)
+
+
+@pytest.mark.parametrize("in_place", [True, False])
+def test_incremental_rotation_does_not_write_through_hard_links(tmp_path, text_pdf, in_place):
+    source = text_pdf(pages=2)
+    target = source if in_place else str(tmp_path / "rotated.pdf")
+    if not in_place:
+        PDFEditor().rotate_pages(source, target, [0], 0, incremental=True)
+    # e.g. a ResultCache entry materialised with use_hardlinks=True
+    linked = str(tmp_path / "linked.pdf")
+    os.link(target, linked)
+    before = _read(linked)
+
+    success, message = PDFEditor().rotate_pages(source, target, [1], 90, incremental=True)
+
+    assert success, message
+    assert _rotations(target) == [0, 90]
+    assert _read(linked) == before
+    assert not os.path.samefile(target, linked)
+
+
+def _redact(source, tmp_path, **options):
+    output = str(tmp_path / "redacted.pdf")
+    success, message, counts = PDFEditor().redact_pdf(source, output, workers=1, **options)
+    assert success, message
+    with fitz.open(output) as doc:
+        return counts, [page.get_text() for page in doc]
+
+
+@pytest.mark.parametrize("written", ["conﬁdential", "ＣＯＮＦＩＤＥＮＴＩＡＬ"])
+def test_redaction_matches_ligatures_and_compatibility_characters(tmp_path, written):
+    doc = fitz.open()
+    page = doc.new_page(width=400, height=200)
+    writer = fitz.TextWriter(page.rect)
+    writer.append((30, 60), f"Strictly {written} draft", font=fitz.Font("cjk"), fontsize=14)
+    writer.write_text(page)
+    source = str(tmp_path / "ligature.pdf")
+    doc.save(source)
+    doc.close()
+
+    counts, texts = _redact(source, tmp_path, terms=["confidential"])
+
+    assert counts == {1: 1}
+    assert written[-3:] not in texts[0]
+    assert "Strictly" in texts[0] and "draft" in texts[0]
+
+
+def test_redaction_on_a_rotated_page(tmp_path):
+    doc = fitz.open()
+    page = doc.new_page(width=300, height=400)
+    page.insert_text((40, 80), "Name: Alice Example", fontsize=12)
+    page.insert_text((40, 300), "Reference kept", fontsize=12)
+    page.set_rotation(90)
+    source = str(tmp_path / "rotated.pdf")
+    doc.save(source)
+    doc.close()
+
+    counts, texts = _redact(source, tmp_path, terms=["Alice Example"])
+
+    assert counts == {1: 1}
+    assert "Alice" not in texts[0]
+    assert "Name:" in texts[0] and "Reference kept" in texts[0]
+
+
+def test_redaction_matches_across_lines_of_a_block(tmp_path):
+    doc = fitz.open()
+    page = doc.new_page(width=300, height=200)
+    page.insert_text((30, 60), "Please quote your account\nnumber 12345 on every letter", fontsize=12)
+    source = str(tmp_path / "wrapped.pdf")
+    doc.save(source)
+    doc.close()
+
+    counts, texts = _redact(source, tmp_path, patterns=[r"account\s+number \d+"])
+
+    assert counts == {1: 1}
+    assert "account" not in texts[0] and "12345" not in texts[0]
+    assert "Please quote your" in texts[0] and "on every letter" in texts[0]
+
+
+def test_remove_blank_pages(tmp_path):
+    np = pytest.importorskip("numpy")
+    doc = fitz.open()
+    doc.new_page(width=200, height=300).insert_text((30, 60), "first")
+    doc.new_page(width=200, height=300)  # no content at all
+    # A scanned back side: paper with faint noise, no ink
+    noise = np.random.default_rng(3).normal(245, 2, (300, 200)).clip(0, 255).astype(np.uint8)
+    scan = fitz.Pixmap(fitz.csGRAY, 200, 300, noise.tobytes(), False)
+    page = doc.new_page(width=200, height=300)
+    page.insert_image(page.rect, pixmap=scan)
+    doc.new_page(width=200, height=300).insert_text((30, 60), "last")
+    source = str(tmp_path / "duplex.pdf")
+    doc.save(source)
+    doc.close()
+    output = str(tmp_path / "clean.pdf")
+
+    success, message, blank = PDFEditor().remove_blank_pages(source, output, dry_run=True, workers=1)
+    assert success and sorted(blank) == [2, 3] and not os.path.exists(output)
+
+    success, message, blank = PDFEditor().remove_blank_pages(source, output, workers=1)
+    assert success, message
+    with fitz.open(output) as result:
+        assert [page.get_text().strip() for page in result] == ["first", "last"]
+
+
+def _pages(doc):
+    # Not the text: extracting it from a rotated page changes the page, which a journalled document refuses
+    return [(page.xref, page.rotation) for page in doc]
+
+
+def test_edit_session_undo_and_redo_step_between_edits(text_pdf):
+    with PDFEditor().open_session(text_pdf(pages=4)) as session:
+        original = _pages(session.doc)
+        assert session.apply("delete", pages_to_delete=[0])[0]
+        assert session.apply("rotate", rotate_pages=[0], rotation=90)[0]
+        edited = _pages(session.doc)
+        assert edited == [(original[1][0], 90), original[2], original[3]]
+
+        assert session.undo() == (True, "Undid rotate")
+        assert session.undo() == (True, "Undid delete")
+        assert _pages(session.doc) == original and not session.can_undo
+        assert session.redo()[0] and session.redo()[0]
+        assert _pages(session.doc) == edited and not session.can_redo
+        assert session.history() == ["delete", "rotate"]
+
+
+@pytest.mark.parametrize("undo_first", [False, True])
+def test_edit_session_rolls_back_a_failed_edit(text_pdf, undo_first):
+    def delete_then_fail(doc):
+        doc.delete_page(0)
+        raise ValueError("broken")
+
+    with PDFEditor().open_session(text_pdf(pages=3)) as session:
+        session._handlers["broken"] = delete_then_fail
+        session.apply("rotate", rotate_pages=[1], rotation=180)
+        if undo_first:
+            session.undo()
+        before, history = _pages(session.doc), session.history()
+
+        assert session.apply("broken") == (False, "Edit (broken) failed: broken")
+        # One that fails before changing anything
+        assert not session.apply("delete", pages_to_delete=[7])[0]
+
+        assert _pages(session.doc) == before and session.history() == history
+        # Neither the rolled back edit nor an edit undone before it can be redone
+        assert not session.can_redo and session.redo() == (False, "Nothing to redo")
+
+
+def test_new_edit_after_undo_drops_the_redo_history(text_pdf):
+    with PDFEditor().open_session(text_pdf(pages=3)) as session:
+        original = _pages(session.doc)
+        session.apply("delete", pages_to_delete=[0])
+        session.undo()
+        assert session.can_redo
+
+        session.apply("reverse")
+
+        assert not session.can_redo and session.redo() == (False, "Nothing to redo")
+        assert session.history() == ["reverse"]
+        assert _pages(session.doc) == original[::-1]
+
+
+def test_edit_session_commits_in_place(tmp_path, text_pdf):
+    source = text_pdf(pages=4)
+    show_errors = fitz.TOOLS.mupdf_display_errors()
+    session = PDFEditor().open_session(source)
+    session.apply("duplicate", pages=[0], copies=2)
+    session.undo()  # objects created by the undone edit are dropped on save
+    session.apply("delete", pages_to_delete="1-2")
+
+    success, message = session.commit(source)
+
+    assert success and message == f"Saved 1 edit(s) to: {source}"
+    assert page_texts(source) == ["page 3", "page 4"]
+    assert session.doc.is_closed and os.listdir(tmp_path) == ["input.pdf"]
+    assert fitz.TOOLS.mupdf_display_errors() == show_errors
+    assert session.commit(source) == (False, "The edit session is closed")
+
+
+def _objects(path, marker):
+    """xrefs of the objects in path whose definition contains marker"""
+    with fitz.open(path) as doc:
+        return [xref for xref in range(1, doc.xref_length()) if marker in doc.xref_object(xref, compressed=True)]
+
+
+def _line_directions(path, text):
+    """{page number: (direction, bbox)} of the lines reading text, as displayed (rotated)"""
+    found = {}
+    with fitz.open(path) as doc:
+        for page in doc:
+            # Text extraction reports the unrotated page
+            to_view = page.rotation_matrix
+            for block in page.get_text("dict")["blocks"]:
+                for line in block.get("lines", ()):
+                    if "".join(span["text"] for span in line["spans"]).strip() == text:
+                        direction = fitz.Point(line["dir"]) * to_view - fitz.Point(0, 0) * to_view
+                        found[page.number] = ((round(direction.x, 3), round(direction.y, 3)),
+                                              fitz.Rect(line["bbox"]) * to_view)
+    return found
+
+
+def test_stamps_bates_numbers_with_one_shared_font(tmp_path, text_pdf):
+    source = text_pdf(pages=5)
+    output = str(tmp_path / "stamped.pdf")
+
+    success, message = PDFEditor().stamp_pages(source, output, header="{filename} {page}/{total}",
+                                               footer="{bates}", pages="2-5", bates_prefix="ABC",
+                                               bates_start=7, bates_digits=4)
+
+    assert success and "Stamped 4 page(s)" in message
+    texts = page_texts(output)
+    assert texts[0] == "page 1"
+    assert [sorted(text.split("\n")) for text in texts[1:]] == [
+        ["ABC0007", "input.pdf 2/5", "page 2"], ["ABC0008", "input.pdf 3/5", "page 3"],
+        ["ABC0009", "input.pdf 4/5", "page 4"], ["ABC0010", "input.pdf 5/5", "page 5"]]
+    assert len(_objects(output, "/Type/Font")) == len(_objects(source, "/Type/Font")) + 1
+    with fitz.open(output) as doc:
+        fonts = {doc.xref_get_key(page.xref, "Resources/Font/FStamp")[1] for page in doc.pages(1)}
+        # The q stream opening each page's q/Q wrapper is shared as well
+        openings = {page.get_contents()[0] for page in doc.pages(1)}
+    assert len(fonts) == 1 and len(openings) == 1
+
+
+def test_stamps_stay_upright_on_rotated_pages(tmp_path, text_pdf):
+    source = text_pdf(pages=2, rotations=[0, 90])
+    output = str(tmp_path / "stamped.pdf")
+
+    PDFEditor().stamp_pages(source, output, footer="Footer {page}", margin=20, font_size=10)
+
+    for number in (0, 1):
+        direction, bbox = _line_directions(output, f"Footer {number + 1}")[number]
+        with fitz.open(output) as doc:
+            view = doc[number].rect
+        assert direction == (1, 0)
+        assert abs(bbox.y1 - (view.y1 - 20)) < 5 and abs((bbox.x0 + bbox.x1) / 2 - view.width / 2) < 2
+
+
+def _logo(path):
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 64, 64), False)
+    pix.set_rect(pix.irect, (200, 30, 30))
+    pix.save(path)
+    return str(path)
+
+
+def test_watermark_overlay_is_stored_once(tmp_path, text_pdf):
+    logo = _logo(tmp_path / "logo.png")
+    growth = {}
+    for pages in (10, 60):
+        source = text_pdf(f"in{pages}.pdf", pages=pages)
+        output = str(tmp_path / f"out{pages}.pdf")
+
+        success, message = PDFEditor().watermark_pages(source, output, logo, opacity=0.5)
+
+        assert success and f"Watermarked {pages} page(s)" in message
+        assert len(_objects(output, "/Subtype/Image")) == 1 and len(_objects(output, "/Subtype/Form")) == 1
+        growth[pages] = os.path.getsize(output) - os.path.getsize(source)
+        with fitz.open(output) as doc:
+            assert len({doc.xref_get_key(page.xref, "Resources/XObject/FWatermark")[1] for page in doc}) == 1
+            # Same-sized pages draw it with one shared stream
+            assert len({page.get_contents()[-1] for page in doc}) == 1
+    # Each further page only adds its references to the shared objects
+    assert (growth[60] - growth[10]) / 50 < 128, growth
+
+
+def test_watermark_stays_upright_on_rotated_pages(tmp_path, text_pdf):
+    overlay = str(tmp_path / "draft.pdf")
+    with fitz.open() as doc:
+        # Centred on the overlay page
+        doc.new_page(width=200, height=50).insert_text(((200 - fitz.get_text_length("DRAFT", fontsize=30)) / 2, 35),
+                                                      "DRAFT", fontsize=30)
+        doc.save(overlay)
+    source = text_pdf(pages=2, rotations=[0, 90])
+    output = str(tmp_path / "out.pdf")
+
+    success, message = PDFEditor().watermark_pages(source, output, overlay, position="center")
+
+    assert success, message
+    found = _line_directions(output, "DRAFT")
+    with fitz.open(output) as doc:
+        views = [page.rect for page in doc]
+    for number, view in enumerate(views):
+        direction, bbox = found[number]
+        assert direction == (1, 0)
+        assert abs((bbox.x0 + bbox.x1) / 2 - view.width / 2) < 2 and abs((bbox.y0 + bbox.y1) / 2 - view.height / 2) < 5
+
+
+def test_apply_edits_runs_the_steps_in_order_and_saves_once(tmp_path, text_pdf):
+    source = text_pdf(pages=5)
+    output = str(tmp_path / "edited.pdf")
+
+    success, message = PDFEditor().apply_edits(source, output, [
+        ("delete", {"pages_to_delete": "1"}),             # pages 2-5 left
+        ("reverse", {}),                                  # 5 4 3 2
+        ("duplicate", {"pages": [0], "copies": 2}),       # 5 5 4 3 2
+        ("rotate", {"rotate_pages": "-1", "rotation": 90}),
+        ("add_text", {"page_number": 2, "text": "Copy", "x": 40, "y": 150}),
+    ])
+
+    assert success and message == f"Applied 5 edit(s) and saved to: {output}"
+    assert [text.split("\n") for text in page_texts(output)] == [
+        ["page 5"], ["page 5", "Copy"], ["page 4"], ["page 3"], ["page 2"]]
+    assert _rotations(output) == [0, 0, 0, 0, 90]
+
+
+@pytest.mark.parametrize("existing", [False, True])
+def test_apply_edits_writes_nothing_when_a_step_fails(tmp_path, text_pdf, existing):
+    source = text_pdf(pages=3)
+    output = str(tmp_path / "edited.pdf")
+    if existing:
+        text_pdf("edited.pdf", pages=1)
+
+    success, message = PDFEditor().apply_edits(source, output, [
+        ("delete", {"pages_to_delete": [0]}),
+        ("rotate", {"rotate_pages": [2], "rotation": 90}),  # only two pages are left
+    ])
+
+    assert not success and message.startswith("Edit #2 (rotate) failed:")
+    if existing:
+        assert page_texts(output) == ["page 1"]
+    else:
+        assert not os.path.exists(output)
@@ -0,0 +1,118 @@
+import fitz  # PyMuPDF
+
+from pdf_objects import (add_image_mask, add_image_xobject, add_stream_object, append_page_content, copy_object,
+                         set_page_order, set_page_resource)
+
+
+def _reopen(doc):
+    return fitz.open(stream=doc.tobytes(garbage=1), filetype="pdf")
+
+
+def _text_doc(pages=3, size=(200, 300)):
+    doc = fitz.open()
+    for n in range(1, pages + 1):
+        doc.new_page(width=size[0], height=size[1]).insert_text((20, 40), f"page {n}")
+    return doc
+
+
+def _nest_last_pages(doc, count, **attributes):
+    """Move the last `count` pages under an intermediate /Pages node that holds attributes for them"""
+    root = int(doc.xref_get_key(doc.pdf_catalog(), "Pages")[1].split()[0])
+    pages = [doc[i].xref for i in range(len(doc))]
+    node = doc.get_new_xref()
+    nested = pages[-count:]
+    extra = "".join(f"/{key} {value}" for key, value in attributes.items())
+    doc.update_object(node, f"<</Type/Pages/Parent {root} 0 R/Kids[{' '.join(f'{x} 0 R' for x in nested)}]"
+                            f"/Count {count}{extra}>>")
+    for xref in nested:
+        doc.xref_set_key(xref, "Parent", f"{node} 0 R")
+        for key in attributes:
+            doc.xref_set_key(xref, key, "null")
+    kids = [f"{x} 0 R" for x in pages[:-count]] + [f"{node} 0 R"]
+    doc.xref_set_key(root, "Kids", "[" + " ".join(kids) + "]")
+    return pages
+
+
+def test_set_page_order_reorders_repeats_and_flattens_the_tree():
+    doc = _text_doc()
+    pages = _nest_last_pages(doc, 2, Rotate=90, MediaBox="[0 0 400 500]")
+    doc = _reopen(doc)
+    assert [page.rotation for page in doc] == [0, 90, 90]
+    pages = [page.xref for page in doc]
+    doc[2].add_text_annot((10, 10), "note")
+
+    set_page_order(doc, [pages[2], pages[0], pages[2]])
+
+    result = _reopen(doc)
+    assert [page.get_text().strip() for page in result] == ["page 3", "page 1", "page 3"]
+    # Attributes inherited from the dropped intermediate node moved onto the pages
+    assert [page.rotation for page in result] == [90, 0, 90]
+    assert [tuple(page.mediabox) for page in result] == [(0, 0, 400, 500), (0, 0, 200, 300), (0, 0, 400, 500)]
+    # The repeat shares the content but not the annotations
+    assert [len(list(page.annots())) for page in result] == [1, 0, 0]
+
+
+def test_copy_object_drops_keys_and_shares_references():
+    doc = _text_doc(pages=1)
+    page = doc[0].xref
+
+    copy = copy_object(doc, page, drop=("Parent",))
+
+    assert doc.xref_get_key(copy, "Parent")[0] == "null"
+    assert doc.xref_get_key(copy, "Contents") == doc.xref_get_key(page, "Contents")
+
+
+def test_add_stream_object_stores_data_as_given():
+    doc = fitz.open()
+    data = b"\xff\xd8 pretend JPEG"
+
+    xref = add_image_xobject(doc, data, 4, 2, "/DCTDecode", "/DeviceRGB")
+
+    assert doc.xref_stream_raw(xref) == data
+    assert doc.xref_get_key(xref, "Filter") == ("name", "/DCTDecode")
+    assert doc.xref_get_key(xref, "Length") == ("int", str(len(data)))
+
+
+def test_image_mask_paints_zero_samples_unless_told_otherwise():
+    for paint_ones, expected in ((False, (255, 0, 0)), (True, (255, 255, 255))):
+        doc = fitz.open()
+        page = doc.new_page(width=10, height=10)
+        mask = add_image_mask(doc, b"\x00", 1, 1, paint_ones=paint_ones)
+        set_page_resource(doc, page, "XObject", "M", f"{mask} 0 R")
+        append_page_content(doc, page, b"1 0 0 rg 10 0 0 10 0 0 cm /M Do")
+
+        assert _reopen(doc)[0].get_pixmap().pixel(5, 5) == expected
+
+
+def test_set_page_resource_follows_indirect_and_inherited_resources():
+    doc = _text_doc(pages=2)
+    pages = [page.xref for page in doc]
+    shared = add_stream_object(doc, "/Type/XObject/Subtype/Form/BBox[0 0 1 1]", b"")
+    # Page 1 keeps its resources in a separate object, page 2 inherits them from the tree root
+    kind, reference = doc.xref_get_key(pages[0], "Resources")
+    assert kind == "xref"
+    resources = int(reference.split()[0])
+    root = int(doc.xref_get_key(doc.pdf_catalog(), "Pages")[1].split()[0])
+    doc.xref_set_key(root, "Resources", doc.xref_object(int(doc.xref_get_key(pages[1], "Resources")[1].split()[0])))
+    doc.xref_set_key(pages[1], "Resources", "null")
+
+    set_page_resource(doc, doc[0], "XObject", "Fm0", f"{shared} 0 R")
+    set_page_resource(doc, doc[1], "XObject", "Fm0", f"{shared} 0 R")
+
+    assert doc.xref_get_key(resources, "XObject/Fm0") == ("xref", f"{shared} 0 R")
+    assert doc.xref_get_key(pages[1], "Resources/XObject/Fm0") == ("xref", f"{shared} 0 R")
+    assert "Font" in doc.xref_get_key(pages[1], "Resources")[1]  # inherited entries kept
+    assert doc.xref_get_key(root, "Resources/XObject")[0] == "null"
+
+
+def test_appended_content_is_isolated_from_the_existing_graphics_state():
+    doc = fitz.open()
+    page = doc.new_page(width=20, height=10)
+    append_page_content(doc, page, b"0 0 1 rg 2 0 0 2 0 0 cm")  # left unbalanced on purpose
+
+    append_page_content(doc, page, b"0 0 10 10 re f")
+    append_page_content(doc, page, b"q 0 1 0 rg 0 0 20 10 re f Q", prepend=True)
+
+    pix = _reopen(doc)[0].get_pixmap()
+    assert pix.pixel(5, 5) == (0, 0, 0)  # default black, unscaled
+    assert pix.pixel(15, 5) == (0, 255, 0)  # the prepended background
@@ -0,0 +1,144 @@
+import os
+import stat
+
+import pytest
+
+from file_compression import PDFCompressor
+from file_converter import FileConverter
+from result_cache import ResultCache
+from word_backends import FunctionBackend
+
+
+def _write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+    return str(path)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(str(tmp_path / "cache"))
+
+
+def test_key_covers_content_operation_and_options(tmp_path, cache):
+    first = _write(tmp_path / "a.bin", b"same")
+    second = _write(tmp_path / "b.bin", b"same")
+    other = _write(tmp_path / "c.bin", b"different")
+
+    key = cache.make_key(first, "compress", {"level": 1})
+
+    assert cache.make_key(second, "compress", {"level": 1}) == key
+    assert cache.make_key(other, "compress", {"level": 1}) != key
+    assert cache.make_key(first, "convert", {"level": 1}) != key
+    assert cache.make_key(first, "compress", {"level": 2}) != key
+
+
+def test_store_then_fetch(tmp_path, cache):
+    result = _write(tmp_path / "result.pdf", b"%PDF result")
+    key = cache.make_key(result, "op")
+    output = str(tmp_path / "out" / "copy.pdf")
+
+    assert not cache.fetch(key, output)
+    cache.store(key, result)
+    assert cache.fetch(key, output)
+
+    with open(output, "rb") as f:
+        assert f.read() == b"%PDF result"
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1, "size_bytes": 11}
+
+
+def test_index_survives_a_new_instance(tmp_path, cache):
+    result = _write(tmp_path / "result.pdf", b"data")
+    cache.store("key", result)
+
+    assert ResultCache(cache.cache_dir).fetch("key", str(tmp_path / "out.pdf"))
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"), max_bytes=10)
+    result = _write(tmp_path / "result.bin", b"12345")
+    cache.store("old", result)
+    cache.store("used", result)
+    cache.fetch("old", str(tmp_path / "out.bin"))
+
+    cache.store("new", result)
+
+    assert sorted(cache._index) == ["new", "old"]
+    assert not os.path.exists(cache._object_path("used"))
+
+
+def test_copied_results_are_independent_of_the_cache(tmp_path, cache):
+    cache.store("key", _write(tmp_path / "result.pdf", b"original"))
+    output = str(tmp_path / "out.pdf")
+    cache.fetch("key", output)
+
+    _write(output, b"edited")
+
+    assert cache.fetch("key", output)
+    with open(output, "rb") as f:
+        assert f.read() == b"original"
+
+
+def test_cached_files_are_read_only_so_hardlinked_results_are_too(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"), use_hardlinks=True)
+    cache.store("key", _write(tmp_path / "result.pdf", b"original"))
+    output = str(tmp_path / "out.pdf")
+
+    assert cache.fetch("key", output)
+    assert cache.fetch("key", output)  # fetching again over the link is fine
+
+    assert os.path.samefile(output, cache._object_path("key"))
+    assert not os.stat(output).st_mode & (stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH)
+    cache.store("key", _write(tmp_path / "result.pdf", b"replaced"))
+    cache.clear()
+    assert cache.stats()["entries"] == 0
+
+
+def test_compress_pdf_serves_repeats_from_the_cache(tmp_path, cache, text_pdf):
+    compressor = PDFCompressor(cache=cache)
+    source = text_pdf()
+
+    assert "cached" not in compressor.compress_pdf(source, str(tmp_path / "one.pdf"))[1]
+    assert "cached" in compressor.compress_pdf(source, str(tmp_path / "two.pdf"))[1]
+    assert "cached" not in compressor.compress_pdf(source, str(tmp_path / "three.pdf"), object_streams=True)[1]
+
+
+def test_conversion_options_are_part_of_the_key(tmp_path, cache):
+    pytest.importorskip("PIL")
+    from PIL import Image
+    image = str(tmp_path / "photo.jpg")
+    Image.new("RGB", (40, 30), (200, 40, 40)).save(image)
+    converter = FileConverter(cache=cache)
+
+    assert "from cache" not in converter.convert_file(image, str(tmp_path / "out"))[1]
+    assert "from cache" in converter.convert_file(image, str(tmp_path / "out"))[1]
+    assert "from cache" not in converter.convert_file(image, str(tmp_path / "out"), passthrough=False)[1]
+
+
+class _UpperBackend(FunctionBackend):
+    name = "upper"
+
+    def __init__(self):
+        super().__init__(lambda source, target: _write(target, open(source, "rb").read().upper()))
+
+
+class _LowerBackend(FunctionBackend):
+    name = "lower"
+
+    def __init__(self):
+        super().__init__(lambda source, target: _write(target, open(source, "rb").read().lower()))
+
+
+def test_word_backend_is_part_of_the_key(tmp_path, cache):
+    document = _write(tmp_path / "letter.docx", b"Word Text")
+    output_dir = str(tmp_path / "out")
+
+    for backend, expected in ((_UpperBackend, b"WORD TEXT"), (_LowerBackend, b"word text")):
+        converter = FileConverter(cache=cache, word_backend=backend)
+        try:
+            success, message = converter.convert_file(document, output_dir)
+        finally:
+            converter.close()
+        assert success and "from cache" not in message
+        with open(os.path.join(output_dir, "letter_converted.pdf"), "rb") as f:
+            assert f.read() == expected
@@ -0,0 +1,138 @@
+import os
+import threading
+
+import pytest
+
+import file_converter
+from file_converter import FileConverter
+from word_backends import FunctionBackend, WordConversionPool
+
+
+class RecordingBackend(FunctionBackend):
+    """Copies input to output upper-cased; fails on names in `failing` and records its life cycle"""
+
+    instances = []
+
+    def __init__(self, failing=(), dies_on_failure=False):
+        super().__init__(self._convert)
+        self.failing = set(failing)
+        self.dies_on_failure = dies_on_failure
+        self.alive = True
+        self.events = []
+        self.threads = set()
+        RecordingBackend.instances.append(self)
+
+    def start(self):
+        self.events.append("start")
+
+    def _convert(self, input_path, output_path):
+        self.threads.add(threading.get_ident())
+        name = os.path.basename(input_path)
+        if name in self.failing:
+            self.failing.discard(name)
+            self.alive = not self.dies_on_failure
+            raise RuntimeError(f"cannot render {name}")
+        with open(input_path, "rb") as source, open(output_path, "wb") as target:
+            target.write(source.read().upper())
+
+    def is_alive(self):
+        return self.alive
+
+    def close(self):
+        self.events.append("close")
+
+
+@pytest.fixture(autouse=True)
+def _forget_instances():
+    RecordingBackend.instances = []
+
+
+def _documents(directory, count):
+    paths = []
+    for n in range(count):
+        path = os.path.join(directory, f"doc{n}.docx")
+        with open(path, "wb") as f:
+            f.write(f"document {n}".encode())
+        paths.append(path)
+    return paths
+
+
+def test_pool_spreads_jobs_over_warm_backends(tmp_path):
+    documents = _documents(str(tmp_path), 8)
+
+    with WordConversionPool(RecordingBackend, workers=2) as pool:
+        futures = [pool.submit(path, path + ".pdf") for path in documents]
+        outputs = [future.result(timeout=10) for future in futures]
+
+    assert outputs == [path + ".pdf" for path in documents]
+    with open(documents[3] + ".pdf", "rb") as f:
+        assert f.read() == b"DOCUMENT 3"
+    # One backend per worker thread, each started once and reused for every job it took
+    assert 1 <= len(RecordingBackend.instances) <= 2
+    for backend in RecordingBackend.instances:
+        assert backend.events == ["start", "close"]
+        assert len(backend.threads) == 1
+
+
+def test_failed_job_reports_its_error_and_keeps_a_live_backend(tmp_path):
+    good, bad = _documents(str(tmp_path), 2)
+
+    with WordConversionPool(lambda: RecordingBackend(failing={"doc1.docx"})) as pool:
+        with pytest.raises(RuntimeError, match="cannot render doc1.docx"):
+            pool.convert(bad, bad + ".pdf", timeout=10)
+        assert pool.convert(good, good + ".pdf", timeout=10) == good + ".pdf"
+
+    assert len(RecordingBackend.instances) == 1
+
+
+def test_crashed_backend_is_replaced(tmp_path):
+    good, bad = _documents(str(tmp_path), 2)
+
+    with WordConversionPool(lambda: RecordingBackend(failing={"doc1.docx"}, dies_on_failure=True)) as pool:
+        with pytest.raises(RuntimeError):
+            pool.convert(bad, bad + ".pdf", timeout=10)
+        pool.convert(good, good + ".pdf", timeout=10)
+
+    crashed, replacement = RecordingBackend.instances
+    assert crashed.events == ["start", "close"]
+    assert replacement.events == ["start", "close"]
+
+
+def test_close_finishes_queued_jobs_then_refuses_new_ones(tmp_path):
+    documents = _documents(str(tmp_path), 5)
+    pool = WordConversionPool(RecordingBackend)
+    futures = [pool.submit(path, path + ".pdf") for path in documents]
+
+    pool.close()
+
+    assert all(future.done() and not future.exception() for future in futures)
+    assert RecordingBackend.instances[0].events == ["start", "close"]
+    with pytest.raises(RuntimeError, match="closed"):
+        pool.submit(documents[0], documents[0] + ".pdf")
+    pool.close()  # closing twice is harmless
+
+
+def test_batch_retries_a_failed_word_document(tmp_path):
+    documents = _documents(str(tmp_path), 3)
+    converter = FileConverter(word_backend=lambda: RecordingBackend(failing={"doc1.docx"}))
+
+    try:
+        summary = converter.batch_convert_files(documents, str(tmp_path / "out"), workers=2, retries=1)
+    finally:
+        converter.close()
+
+    assert summary["successful"] == 3 and summary["failed"] == 0
+    assert summary["retried"] == 1
+    assert sorted(os.listdir(tmp_path / "out")) == [f"doc{n}_converted.pdf" for n in range(3)]
+    assert RecordingBackend.instances[0].events[-1] == "close"
+
+
+def test_batch_convert_closes_its_converter(tmp_path, monkeypatch):
+    closed = []
+    monkeypatch.setattr(FileConverter, "close", lambda self: closed.append(self))
+    monkeypatch.setattr(FileConverter, "batch_convert_files", lambda self, *args, **kwargs: 1 / 0)
+
+    with pytest.raises(ZeroDivisionError):
+        file_converter.batch_convert(_documents(str(tmp_path), 1), str(tmp_path))
+
+    assert len(closed) == 1
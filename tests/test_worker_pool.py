@@ -0,0 +1,19 @@
+import pytest
+
+from conftest import page_texts
+from worker_pool import imap_ordered, imap_unordered, open_worker_document, worker_document
+
+
+def _page_text(index):
+    return worker_document()[index].get_text().strip()
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_tasks_reach_the_document_opened_once_per_worker(text_pdf, workers):
+    source = text_pdf(pages=6)
+
+    ordered = list(imap_ordered(_page_text, range(6), workers, open_worker_document, (source,)))
+    unordered = dict(imap_unordered(_page_text, range(6), workers, open_worker_document, (source,)))
+
+    assert ordered == page_texts(source)
+    assert [unordered[index] for index in range(6)] == ordered